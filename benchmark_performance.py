@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Banc de performance du moteur d'evaluation et de la base de donnees
+
+Construit des bases SQLite reproductibles (graine fixe) de 1k a 1M agents, avec les
+regles de import_all_rules.py, les equivalences de import_equivalences.py et les
+distributions de grades, notes et diplomes de core/data_generator.py, puis chronometre
+les operations critiques. Les resultats sont ecrits en JSON; --baseline compare a une
+execution de reference et signale les regressions (code retour 1).
+
+Exécuter :
+    python benchmark_performance.py
+    python benchmark_performance.py --tailles 1000 10000 100000 1000000
+    python benchmark_performance.py --sortie data/benchmarks/reference.json
+    python benchmark_performance.py --baseline data/benchmarks/reference.json --seuil 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import DATA_DIR
+from core.database import db_manager, DatabaseManager
+from core.connection_pool import pool_connexions
+from core.data_generator import DataGenerator
+from core.evaluator import evaluator, np
+from core.exports import lignes_export_agents, lignes_export_evaluations, exporter_excel
+from import_all_rules import get_all_rules_from_documents
+from import_equivalences import get_default_equivalences
+
+BENCHMARK_DIR = DATA_DIR / "benchmarks"
+FIXTURES_DIR = BENCHMARK_DIR / "fixtures"
+
+TAILLES_DEFAUT = [1000, 10000]
+GRAINE_DEFAUT = 42
+
+# Date de reference fixe: les fixtures ne dependent pas du jour d'execution
+DATE_FIXTURE = date(2025, 1, 1)
+
+# Repartition par grade de DataGenerator.generate_test_dataset
+REPARTITION_GRADES = {
+    "2e Classe": 0.15,
+    "Caporal": 0.20,
+    "Caporal-chef": 0.15,
+    "Sergent": 0.12,
+    "Sergent-chef": 0.10,
+    "Adjudant": 0.08,
+    "Adjudant-chef": 0.06,
+    "Sous-Lieutenant": 0.04,
+    "Lieutenant": 0.04,
+    "Capitaine": 0.03,
+    "Commandant": 0.02,
+    "Lieutenant-Colonel": 0.01
+}
+
+# Ecarts en dessous de ce seuil (secondes) ignores dans la comparaison (bruit de mesure)
+PLANCHER_BRUIT = 0.005
+
+# ==================== FIXTURES ====================
+
+def chemin_fixture(taille: int, graine: int) -> Path:
+    return FIXTURES_DIR / f"agents_{taille}_graine{graine}.db"
+
+def construire_fixture(taille: int, graine: int, regenerer: bool = False) -> Path:
+    """Creer (ou reutiliser) une base de taille agents, identique pour une graine donnee"""
+    chemin = chemin_fixture(taille, graine)
+    if chemin.exists() and not regenerer:
+        return chemin
+
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    if chemin.exists():
+        # Les connexions persistantes pointeraient encore vers l'ancien fichier
+        pool_connexions(chemin).fermer()
+        chemin.unlink()
+
+    print(f"🏗️ Generation de la fixture {chemin.name}...")
+    debut = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = DatabaseManager(chemin)
+        for regle in get_all_rules_from_documents():
+            base.create_rule(regle)
+        for principal, equivalent in get_default_equivalences():
+            base.create_equivalence(principal, equivalent)
+
+    rnd = random.Random(graine)
+    generateur = DataGenerator()
+    grades = list(REPARTITION_GRADES)
+    poids = list(REPARTITION_GRADES.values())
+
+    with base.get_connection() as conn:
+        agents, diplomes = [], []
+        for agent_id in range(1, taille + 1):
+            ligne, diplomes_agent = _generer_agent(rnd, generateur, agent_id,
+                                                  rnd.choices(grades, poids)[0])
+            agents.append(ligne)
+            diplomes.extend(diplomes_agent)
+
+            if len(agents) >= 10000 or agent_id == taille:
+                conn.executemany("""
+                    INSERT INTO agents (
+                        id, statut, matricule, nom, prenom, date_naissance, age,
+                        grade_actuel, date_incorporation, date_entree_grade,
+                        anciennete_service, anciennete_grade, ecole,
+                        note_annee_moins_2, note_annee_moins_1, note_annee_courante,
+                        statut_disciplinaire, unite_provenance
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, agents)
+                conn.executemany("""
+                    INSERT INTO diplomes_historique (agent_id, diplome, date_obtention, etablissement)
+                    VALUES (?, ?, ?, ?)
+                """, diplomes)
+                conn.commit()
+                agents, diplomes = [], []
+
+    print(f"✅ {taille} agents generes en {time.perf_counter() - debut:.1f}s")
+    return chemin
+
+def _generer_agent(rnd: random.Random, generateur: DataGenerator, agent_id: int, grade: str):
+    """Ligne agents et lignes diplomes_historique d'un agent (memes lois que DataGenerator)"""
+    categorie = generateur.get_category_from_grade(grade)
+    if categorie == "militaires_rang":
+        age, service = rnd.randint(19, 35), rnd.randint(1, 15)
+        notes = ["TB"] * 1 + ["B"] * 3 + ["AB"] * 3 + ["P"] * 2
+    elif categorie == "sous_officiers":
+        age, service = rnd.randint(25, 45), rnd.randint(5, 25)
+        notes = ["TB"] * 2 + ["B"] * 4 + ["AB"] * 2 + ["P"] * 1
+    else:
+        age, service = rnd.randint(25, 55), rnd.randint(3, 30)
+        notes = ["TB"] * 4 + ["B"] * 3 + ["AB"] * 1
+    anciennete_grade = rnd.randint(1, min(6, service))
+
+    date_incorporation = DATE_FIXTURE - timedelta(days=service * 365)
+    ligne = (
+        agent_id, 'Actif', f"BM{agent_id:07d}",
+        rnd.choice(generateur.noms), rnd.choice(generateur.prenoms),
+        (DATE_FIXTURE - timedelta(days=age * 365 + rnd.randint(0, 365))).isoformat(), age,
+        grade, date_incorporation.isoformat(),
+        (DATE_FIXTURE - timedelta(days=anciennete_grade * 365)).isoformat(),
+        float(service), float(anciennete_grade), rnd.choice(generateur.ecoles),
+        rnd.choice(notes), rnd.choice(notes), rnd.choice(notes),
+        "RAS" if rnd.random() < 0.85 else rnd.choice(["Avertissement", "Blame", "Punition"]),
+        rnd.choice(generateur.unites)
+    )
+
+    possibles = generateur.diplomes_par_grade[categorie]
+    diplomes = [
+        (agent_id, nom,
+         (date_incorporation + timedelta(days=rnd.randint(30, service * 300))).isoformat(),
+         rnd.choice(generateur.ecoles))
+        for nom in rnd.sample(possibles, rnd.randint(1, min(3, len(possibles))))
+    ]
+    return ligne, diplomes
+
+# ==================== OPERATIONS CHRONOMETREES ====================
+
+def _reinitialiser_evaluations():
+    """Effacer les resultats pour que chaque campagne mesuree parte du meme etat"""
+    with db_manager.get_connection() as conn:
+        for table in ("evaluation_results", "evaluation_empreintes",
+                      "evaluation_changements", "evaluation_runs"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+
+def _statistiques_dashboard():
+    db_manager.get_stats()
+    db_manager.get_evaluation_counts()
+    db_manager.count_agents()
+
+def _export_agents(dossier: Path):
+    exporter_excel(lignes_export_agents(db_manager.get_all_agents()), dossier / "agents.xlsx", "Agents")
+
+def _export_evaluations(dossier: Path):
+    lignes = lignes_export_evaluations(db_manager.get_all_agents(), db_manager.get_evaluation_results())
+    exporter_excel(lignes, dossier / "evaluations.xlsx", "Évaluations", engine='openpyxl')
+
+def operations_disponibles(dossier_exports: Path) -> Dict[str, Dict[str, Any]]:
+    """Operations mesurees: fonction et preparation (non chronometree) avant chaque mesure"""
+    operations = {
+        "get_all_agents": {"fn": db_manager.get_all_agents},
+        "get_agents_evaluation_data": {"fn": db_manager.get_agents_evaluation_data},
+        "evaluer_tous_agents_python": {"fn": lambda: evaluator.evaluer_tous_agents(),
+                                       "avant": _reinitialiser_evaluations},
+        "evaluer_tous_agents_numpy": {"fn": lambda: evaluator.evaluer_tous_agents(moteur="numpy"),
+                                      "avant": _reinitialiser_evaluations},
+        "iter_evaluations": {"fn": lambda: sum(1 for _ in evaluator.iter_evaluations()),
+                             "avant": _reinitialiser_evaluations},
+        "dashboard_stats": {"fn": _statistiques_dashboard},
+        "export_agents": {"fn": lambda: _export_agents(dossier_exports)},
+        "export_evaluations": {"fn": lambda: _export_evaluations(dossier_exports)},
+    }
+    if np is None:
+        del operations["evaluer_tous_agents_numpy"]
+    return operations
+
+def mesurer(fn: Callable[[], Any], repetitions: int, avant: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Chronometrer fn (sortie standard masquee); retourne min, mediane et mesures en secondes"""
+    mesures = []
+    for _ in range(repetitions):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if avant:
+                avant()
+            debut = time.perf_counter()
+            fn()
+            mesures.append(time.perf_counter() - debut)
+    return {
+        "min_s": round(min(mesures), 6),
+        "mediane_s": round(statistics.median(mesures), 6),
+        "mesures_s": [round(m, 6) for m in mesures]
+    }
+
+def executer_benchmark(tailles: List[int], graine: int, repetitions: int,
+                       operations: Optional[List[str]] = None, regenerer: bool = False) -> Dict[str, Any]:
+    """Construire les fixtures, mesurer chaque operation et retourner le rapport"""
+    chemin_initial = db_manager.db_path
+    resultats: Dict[str, Dict[str, Any]] = {}
+
+    with tempfile.TemporaryDirectory() as dossier_exports:
+        disponibles = operations_disponibles(Path(dossier_exports))
+        choisies = operations or list(disponibles)
+
+        try:
+            for taille in tailles:
+                # Rebrancher le gestionnaire global (partage par toute l'application) sur la fixture
+                db_manager.db_path = construire_fixture(taille, graine, regenerer)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    db_manager.init_database()
+                    db_manager.equivalences_version += 1
+
+                resultats[str(taille)] = {}
+                for nom in choisies:
+                    if nom not in disponibles:
+                        print(f"⚠️ Operation inconnue ou indisponible: {nom}")
+                        continue
+                    mesure = mesurer(disponibles[nom]["fn"], repetitions, disponibles[nom].get("avant"))
+                    resultats[str(taille)][nom] = mesure
+                    print(f"   {taille:>8} agents  {nom:30s} {mesure['mediane_s']:9.3f}s")
+        finally:
+            db_manager.db_path = chemin_initial
+            db_manager.equivalences_version += 1
+
+    return {
+        "version": 1,
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "graine": graine,
+            "repetitions": repetitions,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "numpy": np.__version__ if np is not None else None,
+            "plateforme": platform.platform(),
+            "processeurs": os.cpu_count()
+        },
+        "resultats": resultats
+    }
+
+# ==================== COMPARAISON ====================
+
+def comparer(rapport: Dict[str, Any], reference: Dict[str, Any], seuil: float) -> List[Dict[str, Any]]:
+    """
+    Comparer les medianes a une execution de reference
+
+    Une operation regresse si elle est plus lente de plus de seuil (0.20 = +20%)
+    et d'au moins PLANCHER_BRUIT secondes. Retourne la liste des regressions.
+    """
+    regressions = []
+    print(f"\n📊 Comparaison avec la reference du {reference.get('meta', {}).get('date', '?')} "
+          f"(seuil +{seuil:.0%})")
+    for taille, operations in rapport["resultats"].items():
+        for nom, mesure in operations.items():
+            base = reference.get("resultats", {}).get(taille, {}).get(nom)
+            if base is None:
+                continue
+            avant, apres = base["mediane_s"], mesure["mediane_s"]
+            ratio = apres / avant if avant > 0 else float("inf")
+            regression = ratio > 1 + seuil and apres - avant > PLANCHER_BRUIT
+            marque = "❌" if regression else "✅"
+            print(f"   {marque} {taille:>8} {nom:30s} {avant:9.3f}s -> {apres:9.3f}s  (x{ratio:.2f})")
+            if regression:
+                regressions.append({"taille": int(taille), "operation": nom,
+                                    "reference_s": avant, "mesure_s": apres, "ratio": round(ratio, 3)})
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Banc de performance (evaluation et base de donnees)")
+    parser.add_argument("--tailles", type=int, nargs="+", default=TAILLES_DEFAUT,
+                        help="nombres d'agents des fixtures (ex: 1000 10000 100000 1000000)")
+    parser.add_argument("--graine", type=int, default=GRAINE_DEFAUT, help="graine de generation")
+    parser.add_argument("--repetitions", type=int, default=3, help="mesures par operation")
+    parser.add_argument("--operations", nargs="+", help="sous-ensemble d'operations a mesurer")
+    parser.add_argument("--regenerer", action="store_true", help="reconstruire les fixtures existantes")
+    parser.add_argument("--sortie", type=Path, help="fichier JSON des resultats")
+    parser.add_argument("--baseline", type=Path, help="JSON de reference pour detecter les regressions")
+    parser.add_argument("--seuil", type=float, default=0.20, help="ralentissement tolere (0.20 = +20%%)")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Banc de performance: {', '.join(str(t) for t in args.tailles)} agents")
+    rapport = executer_benchmark(args.tailles, args.graine, max(1, args.repetitions),
+                                 args.operations, args.regenerer)
+
+    code_retour = 0
+    if args.baseline:
+        reference = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = comparer(rapport, reference, args.seuil)
+        rapport["comparaison"] = {"baseline": str(args.baseline), "seuil": args.seuil,
+                                  "regressions": regressions}
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) detectee(s)")
+            code_retour = 1
+        else:
+            print("\n✅ Aucune regression")
+
+    sortie = args.sortie or BENCHMARK_DIR / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    sortie.parent.mkdir(parents=True, exist_ok=True)
+    sortie.write_text(json.dumps(rapport, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"💾 Resultats: {sortie}")
+    return code_retour
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -52,6 +52,10 @@ ECHELLE_NOTES_DEFAULT = [
 # Statuts
 STATUTS_AGENT = ["Actif", "Radie", "En conge", "Detache"]
 
+# Statuts d'evaluation: le code stocke en base est l'indice dans ce tuple
+# (l'ordre est aussi le rang utilise pour retenir la meilleure regle)
+STATUTS_EVALUATION = ("aucun", "non_proposable", "bientot", "proposable")
+
 # Annee de reference
 ANNEE_REFERENCE = datetime.now().year
 
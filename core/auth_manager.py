@@ -10,6 +10,8 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 import json
 
+from core.connection_pool import pool_connexions
+
 class AuthManager:
     """Gestionnaire d'authentification et de permissions"""
     
@@ -66,10 +68,8 @@ class AuthManager:
         self.create_default_admin()
     
     def get_connection(self):
-        """Obtenir une connexion à la base de données"""
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Obtenir une connexion à la base de données (partagée avec db_manager, voir core/connection_pool.py)"""
+        return pool_connexions(self.db_path).connexion()
     
     def init_database(self):
         """Initialiser les tables d'authentification"""
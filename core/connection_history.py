@@ -9,6 +9,8 @@ from pathlib import Path
 import platform
 import socket
 
+from core.connection_pool import pool_connexions
+
 class ConnectionHistoryManager:
     """Gestionnaire de l'historique des connexions"""
     
@@ -22,10 +24,8 @@ class ConnectionHistoryManager:
         self.init_database()
     
     def get_connection(self):
-        """Obtenir une connexion à la base de données"""
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Obtenir une connexion à la base de données (partagée avec db_manager, voir core/connection_pool.py)"""
+        return pool_connexions(self.db_path).connexion()
     
     def init_database(self):
         """Initialiser la table d'historique des connexions"""
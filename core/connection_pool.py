@@ -0,0 +1,181 @@
+"""
+Connexions SQLite persistantes partagees
+core/connection_pool.py
+
+Une seule PoolConnexions par fichier de base (pool_connexions), partagee par
+DatabaseManager, AuthManager et ConnectionHistoryManager:
+- le thread principal (interface) garde sa propre connexion pour toute la session;
+- les threads secondaires (taches de fond) empruntent une connexion d'un pool borne,
+  rendue explicitement en sortie de "with connexions_du_thread():" (ou par liberer()).
+Les PRAGMA ne sont executes qu'a l'ouverture de chaque connexion (foreign_keys
+active les suppressions en cascade declarees par les tables). Les appels
+"with conn:" existants restent valides: ils valident ou annulent la transaction
+en cours sans fermer la connexion.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=10000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+class PoolConnexions:
+    """Connexions persistantes par thread pour un fichier de base"""
+
+    def __init__(self, chemin: Union[str, Path], taille_max: int = 8, timeout: float = 30.0):
+        self.chemin = Path(chemin)
+        self.taille_max = max(1, taille_max)
+        self.timeout = timeout
+        self.connexions_ouvertes = 0
+        self._condition = threading.Condition()
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        """Etat vide (creation, ou processus fils: les connexions heritees ne sont pas reutilisees)"""
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._principale: Optional[sqlite3.Connection] = None
+        self._libres: List[sqlite3.Connection] = []
+        # Connexions pretees aux threads secondaires: ident -> (thread, connexion)
+        self._pretees: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+
+    def _ouvrir(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.chemin, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        self.connexions_ouvertes += 1
+        return conn
+
+    def connexion(self) -> sqlite3.Connection:
+        """Connexion du thread courant (ouverte ou empruntee au premier appel)"""
+        if self._pid != os.getpid():
+            with self._condition:
+                self._reinitialiser()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        thread = threading.current_thread()
+        if thread is threading.main_thread():
+            if self._principale is None:
+                self._principale = self._ouvrir()
+            conn = self._principale
+        else:
+            conn = self._emprunter(thread)
+
+        self._local.conn = conn
+        return conn
+
+    def _emprunter(self, thread: threading.Thread) -> sqlite3.Connection:
+        echeance = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                self._recuperer_threads_termines()
+                if self._libres:
+                    conn = self._libres.pop()
+                elif len(self._pretees) < self.taille_max:
+                    conn = self._ouvrir()
+                else:
+                    restant = echeance - time.monotonic()
+                    if restant <= 0:
+                        raise sqlite3.OperationalError(
+                            f"Pool de connexions sature ({self.taille_max} threads actifs)"
+                        )
+                    # Reveille par liberer(); a l'echeance, derniere recuperation des
+                    # connexions de threads termines sans les avoir rendues
+                    self._condition.wait(restant)
+                    continue
+                self._pretees[thread.ident] = (thread, conn)
+                return conn
+
+    def _recuperer_threads_termines(self):
+        # Filet de securite pour les threads qui n'ont pas rendu leur connexion
+        for ident, (thread, conn) in list(self._pretees.items()):
+            if not thread.is_alive():
+                del self._pretees[ident]
+                self._rendre(conn)
+
+    def _rendre(self, conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._libres.append(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ Connexion ecartee du pool: {e}")
+            self.connexions_ouvertes -= 1
+
+    def liberer(self):
+        """Rendre au pool la connexion du thread courant (threads secondaires uniquement)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn is self._principale:
+            return
+        self._local.conn = None
+        with self._condition:
+            self._pretees.pop(threading.get_ident(), None)
+            self._rendre(conn)
+            self._condition.notify()
+
+    def fermer(self):
+        """Fermer toutes les connexions connues (fin de processus)"""
+        if self._pid != os.getpid():
+            return
+        with self._condition:
+            connexions = self._libres + [conn for _, conn in self._pretees.values()]
+            if self._principale is not None:
+                connexions.append(self._principale)
+            for conn in connexions:
+                try:
+                    # Statistiques des index mises a jour si les requetes de la session en ont besoin
+                    conn.execute("PRAGMA optimize")
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._reinitialiser()
+            self.connexions_ouvertes = 0
+
+_pools: Dict[Path, PoolConnexions] = {}
+_verrou_pools = threading.Lock()
+
+@contextmanager
+def connexions_du_thread():
+    """
+    Rendre aux pools, en sortie de bloc, les connexions empruntees par le thread courant
+
+    A utiliser (bloc ou decorateur) dans les taches de fond:
+        @connexions_du_thread()
+        def charger(): ...
+    """
+    try:
+        yield
+    finally:
+        for pool in list(_pools.values()):
+            pool.liberer()
+
+def pool_connexions(chemin: Union[str, Path]) -> PoolConnexions:
+    """Pool partage pour un fichier de base (cree au premier appel)"""
+    chemin = Path(chemin)
+    pool = _pools.get(chemin)
+    if pool is None:
+        with _verrou_pools:
+            pool = _pools.get(chemin)
+            if pool is None:
+                pool = _pools[chemin] = PoolConnexions(chemin)
+    return pool
+
+@atexit.register
+def fermer_pools():
+    """Fermer les connexions de tous les pools (point de controle WAL)"""
+    for pool in list(_pools.values()):
+        pool.fermer()
@@ -218,17 +218,14 @@ class DataGenerator:
         
         # Les inserer en base
         print("💾 Insertion en base de donnees...")
-        success_count = 0
+        resume = db_manager.create_agents_bulk(agent.to_dict() for agent in agents)
         
-        for agent in agents:
-            try:
-                agent_id = db_manager.create_agent(agent.to_dict())
-                if agent_id:
-                    success_count += 1
-            except Exception as e:
-                print(f"❌ Erreur insertion {agent.matricule}: {e}")
+        for matricule in resume['conflits']:
+            print(f"⚠️ Matricule deja utilise: {matricule}")
+        for matricule, erreur in resume['erreurs']:
+            print(f"❌ Erreur insertion {matricule}: {erreur}")
         
-        print(f"✅ {success_count}/{len(agents)} agents inseres avec succes")
+        print(f"✅ {resume['inseres']}/{len(agents)} agents inseres avec succes")
         
         # Afficher les statistiques finales
         final_stats = db_manager.get_stats()
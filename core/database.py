@@ -3,38 +3,140 @@ Gestionnaire de base de donnees SQLite - VERSION COMPLETE CORRIGÉE
 core/database.py
 """
 import sqlite3
+import base64
+import json
 import logging
+import re
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Mapping, Sequence, Set, Tuple
+from types import MappingProxyType
+from datetime import date, datetime, timedelta
+from difflib import SequenceMatcher
 import sys
 
 # Import config
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DATABASE_PATH, ECHELLE_NOTES_DEFAULT
+from config import DATABASE_PATH, ECHELLE_NOTES_DEFAULT, STATUTS_EVALUATION
+from core.connection_pool import pool_connexions
+from core.instance_paresseuse import InstanceParesseuse
 
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+COLONNES_INSERTION_AGENT = """
+        statut, matricule, nom, prenom, date_naissance, age,
+        grade_actuel, date_incorporation, date_entree_grade,
+        anciennete_service, anciennete_grade, ecole,
+        note_annee_moins_2, note_annee_moins_1, note_annee_courante,
+        statut_disciplinaire, unite_provenance
+"""
+
+INSERT_AGENT = f"""
+    INSERT INTO agents ({COLONNES_INSERTION_AGENT}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_DIPLOME = """
+    INSERT INTO diplomes_historique (agent_id, diplome, date_obtention, etablissement)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Ordre de la liste des agents et colonnes de tri autorisees (NOT NULL: cle de pagination)
+ORDRE_AGENTS = ('grade_actuel', 'nom', 'prenom')
+COLONNES_TRI_AGENTS = ('grade_actuel', 'nom', 'prenom', 'matricule', 'date_naissance',
+                       'date_incorporation', 'date_entree_grade')
+
+# Tables de reference (compteur dans versions_reference) et cles du cache qui en dependent
+CACHE_PAR_TABLE_REFERENCE = {
+    'regles_avancement': ('regles', 'index_regles'),
+    'equivalences_diplomes': ('equivalences',),
+    'echelles_notes': ('echelle_notes',),
+}
+
 class DatabaseManager:
     """Gestionnaire de la base de donnees SQLite avec gestion amelioree des verrous"""
     
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or DATABASE_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Incremente a chaque invalidation du cache de reference (voir evaluator.load_equivalences)
+        self.equivalences_version = 0
+        # Vrai si les index agents_fts / agents_trigrammes sont disponibles (SQLite compile avec FTS5)
+        self.recherche_fts = False
+        self.recherche_trigrammes = False
+        # Cache des tables de reference (regles, equivalences, echelle de notes), voir _reference
+        self.version_reference = 0
+        self._cache_reference: Dict[str, Any] = {}
+        self._chemin_reference: Optional[Path] = None
+        # Compteurs de versions_reference deja vus, par table
+        self._versions_tables: Dict[str, int] = {}
         self.init_database()
     
     def get_connection(self) -> sqlite3.Connection:
-        """Obtenir une connexion a la base de donnees avec timeout"""
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA synchronous=NORMAL")
-        conn.execute("PRAGMA cache_size=10000")
-        conn.execute("PRAGMA temp_store=MEMORY")
-        return conn
+        """
+        Connexion persistante du thread courant (voir core/connection_pool.py)
+        
+        PRAGMA appliques une seule fois a l'ouverture; "with conn:" valide ou annule
+        la transaction sans fermer la connexion.
+        """
+        return pool_connexions(self.db_path).connexion()
+    
+    # ==================== CACHE DES TABLES DE REFERENCE ====================
+    
+    def _invalider_reference(self, table: Optional[str] = None):
+        """
+        Vider le cache d'une table de reference (toutes si table est None)
+        
+        equivalences_version n'avance que si les equivalences sont concernees.
+        """
+        if table is None:
+            self._cache_reference = {}
+        else:
+            self._cache_reference = {cle: valeur for cle, valeur in self._cache_reference.items()
+                                     if cle not in CACHE_PAR_TABLE_REFERENCE[table]}
+        self.version_reference += 1
+        if table in (None, 'equivalences_diplomes'):
+            self.equivalences_version += 1
+    
+    def verifier_cache_reference(self):
+        """
+        Invalider le cache des tables de reference modifiees par une autre connexion
+        
+        Chaque table de reference a un compteur dans versions_reference, incremente par
+        des triggers a chaque ecriture (autre processus, autre thread ou ce gestionnaire):
+        seules les tables dont le compteur a change sont rechargees. Les ecritures sur
+        les agents ou les resultats ne touchent pas ces compteurs.
+        """
+        if self._chemin_reference != self.db_path:
+            self._chemin_reference = self.db_path
+            self._versions_tables = {}
+            self._invalider_reference()
+        with self.get_connection() as conn:
+            versions = conn.execute(f"""
+                SELECT nom, version FROM versions_reference
+                WHERE nom IN ({', '.join('?' * len(CACHE_PAR_TABLE_REFERENCE))})
+            """, list(CACHE_PAR_TABLE_REFERENCE)).fetchall()
+        for table, version in versions:
+            if self._versions_tables.get(table) != version:
+                self._versions_tables[table] = version
+                self._invalider_reference(table)
+    
+    def _reference(self, cle: str, charger: Callable[[], Any]) -> Any:
+        """
+        Valeur en cache de cle, chargee par charger() au premier appel
+        
+        Les valeurs partagees ne doivent pas etre modifiees par les appelants.
+        Un chargement concurrent d'une ecriture n'est pas conserve.
+        """
+        self.verifier_cache_reference()
+        valeur = self._cache_reference.get(cle)
+        if valeur is None:
+            version = self.version_reference
+            valeur = charger()
+            if version == self.version_reference:
+                self._cache_reference[cle] = valeur
+        return valeur
     
     def init_database(self):
         """Initialiser la base de donnees avec les tables"""
@@ -90,6 +192,22 @@ class DatabaseManager:
                         )
                     """)
                     
+                    # Index de la liste paginee (query_agents) et du pre-filtrage SQL des
+                    # candidats par grade (voir core/rule_sql.py); le rowid (id) y est implicite
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_agents_liste
+                        ON agents (grade_actuel, nom, prenom)
+                    """)
+                    conn.execute("DROP INDEX IF EXISTS idx_agents_grade_actuel")
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_agents_statut_grade
+                        ON agents (statut, grade_actuel)
+                    """)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_diplomes_historique_agent
+                        ON diplomes_historique (agent_id, actif, diplome)
+                    """)
+                    
                     # Table regles d'avancement - VERSION COMPLETE
                     conn.execute("""
                         CREATE TABLE IF NOT EXISTS regles_avancement (
@@ -105,6 +223,7 @@ class DatabaseManager:
                             anciennete_grade_specifique INTEGER DEFAULT 0,
                             
                             diplomes_requis TEXT,
+                            expression_diplomes TEXT,
                             note_min_courante TEXT,
                             notes_interdites_n1_n2 TEXT,
                             
@@ -118,6 +237,16 @@ class DatabaseManager:
                         )
                     """)
                     
+                    # Colonnes ajoutees apres la creation initiale des tables
+                    self._ajouter_colonne(conn, 'regles_avancement', 'expression_diplomes', 'TEXT')
+                    self._migrer_expressions_diplomes(conn)
+                    
+                    # Regles actives par grade source (get_rules_by_grade, get_rules_index)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_regles_actif_grade
+                        ON regles_avancement (actif, grade_source, type_avancement)
+                    """)
+                    
                     # Table echelles de notes
                     conn.execute("""
                         CREATE TABLE IF NOT EXISTS echelles_notes (
@@ -139,6 +268,119 @@ class DatabaseManager:
                             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                         )
                     """)
+                    # Recherche dans les deux sens (get_equivalents, get_equivalence)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_equivalences_principal
+                        ON equivalences_diplomes (diplome_principal, diplome_equivalent)
+                    """)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_equivalences_equivalent
+                        ON equivalences_diplomes (diplome_equivalent, diplome_principal)
+                    """)
+                    
+                    # Table empreintes d'evaluation (reevaluation incrementale)
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS evaluation_empreintes (
+                            agent_id INTEGER PRIMARY KEY,
+                            empreinte TEXT NOT NULL,
+                            evalue_le DATETIME,
+                            FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE
+                        )
+                    """)
+                    
+                    # Table resultats d'evaluation structures (un resultat courant par agent)
+                    # statut: indice dans STATUTS_EVALUATION ('aucun': pas de regle active pour le grade);
+                    # conditions_manquantes: codes separes par des virgules (voir
+                    # rule_compiler.CODES_CONDITIONS); constats: conditions de la regle retenue avec
+                    # leurs parametres, en JSON (rule_compiler.encoder_constats), pour les details
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS evaluation_results (
+                            agent_id INTEGER PRIMARY KEY,
+                            statut INTEGER NOT NULL,
+                            grade_cible TEXT,
+                            type_avancement TEXT,
+                            regle_id INTEGER,
+                            run_id INTEGER,
+                            conditions_manquantes TEXT,
+                            constats TEXT,
+                            evalue_le DATETIME,
+                            FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE,
+                            FOREIGN KEY (regle_id) REFERENCES regles_avancement(id) ON DELETE SET NULL
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_evaluation_results_statut_grade
+                        ON evaluation_results (statut, grade_cible)
+                    """)
+                    self._ajouter_colonne(conn, 'evaluation_results', 'constats', 'TEXT')
+                    self._migrer_resultats_evaluation(conn)
+                    # Resultats sans regle enregistres comme non proposables avant le statut 'aucun'
+                    conn.execute("""
+                        UPDATE evaluation_results SET statut = 0
+                        WHERE statut = 1 AND grade_cible = 'Aucun' AND regle_id IS NULL
+                    """)
+                    
+                    # Historique des campagnes d'evaluation: seuls les changements de resultat
+                    # (statut, grade cible, type d'avancement) sont conserves par campagne
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS evaluation_runs (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            demarre_le DATETIME NOT NULL,
+                            hash_regles TEXT,
+                            nb_agents INTEGER DEFAULT 0,
+                            nb_changements INTEGER DEFAULT 0,
+                            duree REAL
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS evaluation_changements (
+                            run_id INTEGER NOT NULL,
+                            agent_id INTEGER NOT NULL,
+                            ancien_statut INTEGER,
+                            nouveau_statut INTEGER NOT NULL,
+                            ancien_grade_cible TEXT,
+                            nouveau_grade_cible TEXT,
+                            ancien_type_avancement TEXT,
+                            nouveau_type_avancement TEXT,
+                            PRIMARY KEY (run_id, agent_id),
+                            FOREIGN KEY (run_id) REFERENCES evaluation_runs(id) ON DELETE CASCADE,
+                            FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_evaluation_changements_agent
+                        ON evaluation_changements (agent_id)
+                    """)
+                    conn.execute("""
+                        CREATE VIEW IF NOT EXISTS v_changements_dernier_run AS
+                        SELECT c.*, a.matricule, a.nom, a.prenom, a.grade_actuel
+                        FROM evaluation_changements c
+                        JOIN agents a ON a.id = c.agent_id
+                        WHERE c.run_id = (SELECT MAX(id) FROM evaluation_runs)
+                    """)
+                    
+                    # Dates d'eligibilite par agent et regle applicable (voir core/eligibility.py):
+                    # premiere date ou les conditions d'anciennete sont remplies (NULL si jamais);
+                    # autres_conditions_ok indique si diplomes et notes le sont deja
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS dates_eligibilite (
+                            agent_id INTEGER NOT NULL,
+                            regle_id INTEGER NOT NULL,
+                            grade_cible TEXT,
+                            type_avancement TEXT,
+                            date_eligibilite DATE,
+                            autres_conditions_ok INTEGER NOT NULL,
+                            conditions_bloquantes TEXT,
+                            calcule_le DATETIME,
+                            PRIMARY KEY (agent_id, regle_id),
+                            FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE,
+                            FOREIGN KEY (regle_id) REFERENCES regles_avancement(id) ON DELETE CASCADE
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_dates_eligibilite_date
+                        ON dates_eligibilite (autres_conditions_ok, date_eligibilite)
+                    """)
                     
                     # Inserer echelle de notes par defaut si vide
                     existing_notes = conn.execute("SELECT COUNT(*) FROM echelles_notes").fetchone()[0]
@@ -150,7 +392,28 @@ class DatabaseManager:
                             """, (note, valeur, description))
                         print("✅ Echelle de notes initialisee")
                     
+                    # Compteurs de modification des tables de reference (cache, voir _reference)
+                    self._creer_versions_reference(conn)
+                    
+                    # Recherche classee par prefixe (search_agents_ranked), par sous-chaine
+                    # (search_agents) et approchee (search_agents_fuzzy)
+                    self.recherche_fts = self._creer_index_recherche(
+                        conn, 'agents_fts',
+                        "content='agents', content_rowid='id', "
+                        "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+                    )
+                    # Sans contenu: valeurs entourees d'espaces, pour que les trigrammes de debut
+                    # et de fin de mot rapprochent aussi les mots courts ("peit" / "petit")
+                    self.recherche_trigrammes = self._creer_index_recherche(
+                        conn, 'agents_trigrammes', "content='', tokenize='trigram'",
+                        expression="' ' || {colonne} || ' '"
+                    )
+                    
+                    # Compteurs du tableau de bord (get_dashboard_stats)
+                    self._creer_statistiques(conn)
+                    
                     conn.commit()
+                    self._invalider_reference()
                     print("✅ Base de donnees initialisee avec succes")
                     return
                     
@@ -162,6 +425,230 @@ class DatabaseManager:
                 else:
                     raise e
 
+    def _ajouter_colonne(self, conn: sqlite3.Connection, table: str, colonne: str, definition: str):
+        """Ajouter une colonne a une table existante si elle est absente"""
+        colonnes = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if colonne not in colonnes:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {colonne} {definition}")
+            print(f"✅ Colonne {table}.{colonne} ajoutee")
+
+    def _creer_index_recherche(self, conn: sqlite3.Connection, table: str, options: str,
+                               expression: str = "{colonne}") -> bool:
+        """
+        Index plein texte FTS5 table (nom, prenom, matricule) des agents
+        
+        Tenu a jour par des triggers sur agents; rempli a sa creation sur une base
+        existante. expression: valeur indexee pour chaque colonne. Retourne False si
+        SQLite n'a pas FTS5 ou le tokenizer demande.
+        """
+        colonnes = ('nom', 'prenom', 'matricule')
+        valeurs = {prefixe: ", ".join(expression.format(colonne=prefixe + colonne) for colonne in colonnes)
+                   for prefixe in ('', 'new.', 'old.')}
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(nom, prenom, matricule, {options})")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Index de recherche {table} indisponible: {e}")
+            return False
+        
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_insertion AFTER INSERT ON agents BEGIN
+                INSERT INTO {table} (rowid, nom, prenom, matricule) VALUES (new.id, {valeurs['new.']});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_suppression AFTER DELETE ON agents BEGIN
+                INSERT INTO {table} ({table}, rowid, nom, prenom, matricule)
+                VALUES ('delete', old.id, {valeurs['old.']});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_modification
+            AFTER UPDATE OF nom, prenom, matricule ON agents BEGIN
+                INSERT INTO {table} ({table}, rowid, nom, prenom, matricule)
+                VALUES ('delete', old.id, {valeurs['old.']});
+                INSERT INTO {table} (rowid, nom, prenom, matricule) VALUES (new.id, {valeurs['new.']});
+            END
+        """)
+        if not existe:
+            conn.execute(f"INSERT INTO {table} (rowid, nom, prenom, matricule) SELECT id, {valeurs['']} FROM agents")
+            print(f"✅ Index de recherche {table} construit")
+        return True
+
+    def _creer_versions_reference(self, conn: sqlite3.Connection):
+        """
+        Table versions_reference: un compteur par table de reference
+        
+        Incremente par des triggers a chaque insertion, modification ou suppression,
+        quelle que soit la connexion qui ecrit (voir verifier_cache_reference).
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS versions_reference (
+                nom TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        for table in CACHE_PAR_TABLE_REFERENCE:
+            conn.execute("INSERT OR IGNORE INTO versions_reference (nom) VALUES (?)", (table,))
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()}
+                    AFTER {operation} ON {table} BEGIN
+                        UPDATE versions_reference SET version = version + 1 WHERE nom = '{table}';
+                    END
+                """)
+
+    def _creer_statistiques(self, conn: sqlite3.Connection):
+        """
+        Table statistiques_agents: nombre d'agents par (dimension, valeur)
+        
+        Dimensions: 'total' (valeur ''), 'statut', 'grade' et 'unite' (agents actifs),
+        'evaluation' (code de statut de evaluation_results). Tenue a jour par des triggers
+        sur agents et evaluation_results; reconstruite a sa creation sur une base existante.
+        Une valeur dont le compteur retombe a 0 garde sa ligne.
+        """
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'statistiques_agents'"
+        ).fetchone() is not None
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS statistiques_agents (
+                dimension TEXT NOT NULL,
+                valeur TEXT NOT NULL,
+                nombre INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, valeur)
+            ) WITHOUT ROWID
+        """)
+        
+        def compteurs(ligne: str, signe: str) -> str:
+            actif = f"{signe} * ({ligne}.statut IS 'Actif')"
+            return f"""
+                INSERT INTO statistiques_agents (dimension, valeur, nombre)
+                VALUES ('total', '', {signe}),
+                       ('statut', COALESCE({ligne}.statut, ''), {signe}),
+                       ('grade', COALESCE({ligne}.grade_actuel, ''), {actif}),
+                       ('unite', COALESCE({ligne}.unite_provenance, ''), {actif})
+                ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + excluded.nombre;
+            """
+        
+        def compteur_evaluation(ligne: str, signe: str) -> str:
+            return f"""
+                INSERT INTO statistiques_agents (dimension, valeur, nombre)
+                VALUES ('evaluation', CAST({ligne}.statut AS TEXT), {signe})
+                ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + excluded.nombre;
+            """
+        
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS statistiques_agents_insertion AFTER INSERT ON agents BEGIN
+                {compteurs('new', '1')}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS statistiques_agents_suppression AFTER DELETE ON agents BEGIN
+                {compteurs('old', '-1')}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS statistiques_agents_modification
+            AFTER UPDATE OF statut, grade_actuel, unite_provenance ON agents
+            WHEN old.statut IS NOT new.statut OR old.grade_actuel IS NOT new.grade_actuel
+                 OR old.unite_provenance IS NOT new.unite_provenance
+            BEGIN
+                {compteurs('old', '-1')}
+                {compteurs('new', '1')}
+            END
+        """)
+        # evaluation_results est ecrit par upsert (save_evaluation_results): un INSERT OR
+        # REPLACE ne declencherait pas le trigger de suppression de la ligne remplacee
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS statistiques_evaluation_insertion
+            AFTER INSERT ON evaluation_results BEGIN
+                {compteur_evaluation('new', '1')}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS statistiques_evaluation_suppression
+            AFTER DELETE ON evaluation_results BEGIN
+                {compteur_evaluation('old', '-1')}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS statistiques_evaluation_modification
+            AFTER UPDATE OF statut ON evaluation_results WHEN old.statut IS NOT new.statut BEGIN
+                {compteur_evaluation('old', '-1')}
+                {compteur_evaluation('new', '1')}
+            END
+        """)
+        
+        if not existe:
+            self._reconstruire_statistiques(conn)
+            print("✅ Statistiques du tableau de bord construites")
+    
+    def _reconstruire_statistiques(self, conn: sqlite3.Connection):
+        """Recalculer statistiques_agents depuis agents et evaluation_results"""
+        conn.execute("DELETE FROM statistiques_agents")
+        conn.execute("""
+            INSERT INTO statistiques_agents (dimension, valeur, nombre)
+            SELECT 'total', '', COUNT(*) FROM agents
+            UNION ALL
+            SELECT 'statut', COALESCE(statut, ''), COUNT(*) FROM agents GROUP BY 2
+            UNION ALL
+            SELECT 'grade', COALESCE(grade_actuel, ''), COUNT(*) FROM agents WHERE statut = 'Actif' GROUP BY 2
+            UNION ALL
+            SELECT 'unite', COALESCE(unite_provenance, ''), COUNT(*) FROM agents WHERE statut = 'Actif' GROUP BY 2
+            UNION ALL
+            SELECT 'evaluation', CAST(statut AS TEXT), COUNT(*) FROM evaluation_results GROUP BY 2
+        """)
+
+    def _migrer_expressions_diplomes(self, conn: sqlite3.Connection):
+        """
+        Ecrire dans expression_diplomes la logique autrefois codee en dur dans le moteur:
+        Adjudant → Adjudant-chef avec B.M.P.1, C.M.2 et C.T.2 = B.M.P.1 & (C.M.2 | C.T.2)
+        """
+        regles = [
+            row['id'] for row in conn.execute("""
+                SELECT id, diplomes_requis FROM regles_avancement
+                WHERE grade_source = 'Adjudant' AND grade_cible = 'Adjudant-chef'
+                  AND COALESCE(expression_diplomes, '') = ''
+            """)
+            if {d.strip() for d in (row['diplomes_requis'] or '').split(',') if d.strip()}
+            == {'B.M.P.1', 'C.M.2', 'C.T.2'}
+        ]
+        if regles:
+            conn.executemany(
+                "UPDATE regles_avancement SET expression_diplomes = 'B.M.P.1 & (C.M.2 | C.T.2)' WHERE id = ?",
+                [(regle_id,) for regle_id in regles]
+            )
+            print(f"✅ {len(regles)} regle(s) Adjudant → Adjudant-chef migree(s) vers expression_diplomes")
+
+    def _migrer_resultats_evaluation(self, conn: sqlite3.Connection):
+        """Alimenter evaluation_results depuis agents.resultat_evaluation (bases anterieures)"""
+        if conn.execute("SELECT 1 FROM evaluation_results LIMIT 1").fetchone():
+            return
+        
+        libelles = (("Bientot proposable ", "bientot"), ("Non proposable ", "non_proposable"),
+                    ("Proposable ", "proposable"))
+        lignes = []
+        for row in conn.execute("""
+            SELECT id, resultat_evaluation, derniere_evaluation FROM agents
+            WHERE resultat_evaluation IS NOT NULL AND resultat_evaluation != ''
+        """):
+            texte = row['resultat_evaluation']
+            for libelle, statut in libelles:
+                if texte.startswith(libelle) and ' -> ' in texte:
+                    type_avancement, grade_cible = texte[len(libelle):].split(' -> ', 1)
+                    lignes.append((row['id'], STATUTS_EVALUATION.index(statut), grade_cible,
+                                   type_avancement, row['derniere_evaluation']))
+                    break
+        
+        if lignes:
+            conn.executemany("""
+                INSERT INTO evaluation_results (agent_id, statut, grade_cible, type_avancement, evalue_le)
+                VALUES (?, ?, ?, ?, ?)
+            """, lignes)
+            print(f"✅ {len(lignes)} resultat(s) d'evaluation migre(s) vers evaluation_results")
+
     # ==================== GESTION DES AGENTS ====================
     
     def create_agent(self, agent_data: Dict[str, Any]) -> int:
@@ -171,33 +658,7 @@ class DatabaseManager:
         for attempt in range(max_retries):
             try:
                 with self.get_connection() as conn:
-                    cursor = conn.execute("""
-                        INSERT INTO agents (
-                            statut, matricule, nom, prenom, date_naissance, age,
-                            grade_actuel, date_incorporation, date_entree_grade,
-                            anciennete_service, anciennete_grade, ecole,
-                            note_annee_moins_2, note_annee_moins_1, note_annee_courante,
-                            statut_disciplinaire, unite_provenance
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        agent_data.get('statut', 'Actif'),
-                        agent_data['matricule'],
-                        agent_data['nom'],
-                        agent_data['prenom'],
-                        agent_data['date_naissance'],
-                        agent_data.get('age'),
-                        agent_data['grade_actuel'],
-                        agent_data['date_incorporation'],
-                        agent_data['date_entree_grade'],
-                        agent_data.get('anciennete_service'),
-                        agent_data.get('anciennete_grade'),
-                        agent_data.get('ecole', ''),
-                        agent_data.get('note_annee_moins_2', ''),
-                        agent_data.get('note_annee_moins_1', ''),
-                        agent_data.get('note_annee_courante', ''),
-                        agent_data.get('statut_disciplinaire', 'RAS'),
-                        agent_data.get('unite_provenance', '')
-                    ))
+                    cursor = conn.execute(INSERT_AGENT, self._ligne_agent(agent_data))
                     agent_id = cursor.lastrowid
                     
                     # Ajouter les diplomes si presents
@@ -231,15 +692,191 @@ class DatabaseManager:
     
     def _add_diplome_direct(self, conn: sqlite3.Connection, agent_id: int, diplome_data: Dict[str, Any]):
         """Ajouter un diplome directement avec une connexion existante"""
-        conn.execute("""
-            INSERT INTO diplomes_historique (agent_id, diplome, date_obtention, etablissement)
-            VALUES (?, ?, ?, ?)
-        """, (
+        conn.execute(INSERT_DIPLOME, self._ligne_diplome(agent_id, diplome_data))
+    
+    @staticmethod
+    def _ligne_agent(agent_data: Mapping[str, Any]) -> Tuple:
+        """Parametres de INSERT_AGENT (KeyError si un champ obligatoire manque)"""
+        return (
+            agent_data.get('statut', 'Actif'),
+            agent_data['matricule'],
+            agent_data['nom'],
+            agent_data['prenom'],
+            agent_data['date_naissance'],
+            agent_data.get('age'),
+            agent_data['grade_actuel'],
+            agent_data['date_incorporation'],
+            agent_data['date_entree_grade'],
+            agent_data.get('anciennete_service'),
+            agent_data.get('anciennete_grade'),
+            agent_data.get('ecole', ''),
+            agent_data.get('note_annee_moins_2', ''),
+            agent_data.get('note_annee_moins_1', ''),
+            agent_data.get('note_annee_courante', ''),
+            agent_data.get('statut_disciplinaire', 'RAS'),
+            agent_data.get('unite_provenance', '')
+        )
+    
+    @staticmethod
+    def _ligne_diplome(agent_id: Optional[int], diplome_data: Mapping[str, Any]) -> Tuple:
+        """
+        Parametres de INSERT_DIPLOME (ValueError si le nom ou la date d'obtention manque)
+        
+        Accepte les deux formats, comme update_agent: 'nom' (Diplome.to_dict) ou
+        'diplome' (lignes de diplomes_historique).
+        """
+        if not isinstance(diplome_data, Mapping):
+            raise ValueError(f"diplome mal forme: {diplome_data!r}")
+        nom = diplome_data.get('nom') or diplome_data.get('diplome')
+        if not nom:
+            raise ValueError("diplome sans nom")
+        if not diplome_data.get('date_obtention'):
+            raise ValueError(f"diplome {nom} sans date d'obtention")
+        return (
             agent_id,
-            diplome_data['nom'],
+            nom,
             diplome_data['date_obtention'],
             diplome_data.get('etablissement', '')
-        ))
+        )
+    
+    def create_agents_bulk(self, agents: Iterable[Mapping[str, Any]], batch_size: int = 5000) -> Dict[str, Any]:
+        """
+        Inserer des agents (et leurs diplomes) par lots, une transaction par lot
+        
+        agents: dictionnaires au format de create_agent, consommes au fil de l'eau.
+        Les matricules deja en base ou repetes dans l'import ne sont pas inseres et
+        sont listes dans le resume; un agent incomplet ou dont un diplome est
+        incomplet n'est pas insere et est liste dans 'erreurs' ('diplomes_rejetes'
+        compte ces diplomes). Retourne {'inseres', 'conflits', 'erreurs', 'diplomes',
+        'diplomes_rejetes', 'duree_s'}.
+        """
+        debut = time.perf_counter()
+        resume = {'inseres': 0, 'conflits': [], 'erreurs': [], 'diplomes': 0,
+                  'diplomes_rejetes': 0, 'duree_s': 0.0}
+        vus: Set[str] = set()
+        lot: List[Mapping[str, Any]] = []
+        
+        for agent_data in agents:
+            matricule = agent_data.get('matricule')
+            if matricule in vus:
+                resume['conflits'].append(matricule)
+                continue
+            if matricule is not None:
+                vus.add(matricule)
+            lot.append(agent_data)
+            if len(lot) >= batch_size:
+                self._inserer_lot_agents(lot, resume)
+                lot = []
+        if lot:
+            self._inserer_lot_agents(lot, resume)
+        
+        resume['duree_s'] = time.perf_counter() - debut
+        print(f"✅ {resume['inseres']} agents inseres en {resume['duree_s']:.1f}s "
+              f"({len(resume['conflits'])} conflit(s) de matricule, {len(resume['erreurs'])} erreur(s))")
+        return resume
+    
+    def _inserer_lot_agents(self, lot: List[Mapping[str, Any]], resume: Dict[str, Any]):
+        """Un lot de create_agents_bulk: executemany dans une seule transaction, annulee en cas d'erreur"""
+        lignes: Dict[str, Tuple] = {}
+        diplomes_agents: Dict[str, List[Mapping[str, Any]]] = {}
+        erreurs: List[Tuple[Optional[str], str]] = []
+        conflits: List[str] = []
+        diplomes_rejetes = 0
+        for agent_data in lot:
+            try:
+                ligne = self._ligne_agent(agent_data)
+            except KeyError as e:
+                erreurs.append((agent_data.get('matricule'), f"champ manquant: {e}"))
+                continue
+            # Diplomes valides avant l'insertion: un diplome incomplet ferait
+            # echouer l'executemany et annuler tout le lot
+            invalides = []
+            for diplome in agent_data.get('diplomes') or []:
+                try:
+                    self._ligne_diplome(None, diplome)
+                except ValueError as e:
+                    invalides.append(str(e))
+            if invalides:
+                diplomes_rejetes += len(invalides)
+                erreurs.append((agent_data['matricule'], "; ".join(invalides)))
+                continue
+            lignes[agent_data['matricule']] = ligne
+            diplomes_agents[agent_data['matricule']] = agent_data.get('diplomes') or []
+        
+        try:
+            with self.get_connection() as conn:
+                existants = set()
+                matricules = list(lignes)
+                for debut in range(0, len(matricules), 500):
+                    tranche = matricules[debut:debut + 500]
+                    existants.update(row[0] for row in conn.execute(
+                        f"SELECT matricule FROM agents WHERE matricule IN ({','.join('?' * len(tranche))})", tranche
+                    ))
+                for matricule in existants:
+                    del lignes[matricule]
+                conflits.extend(sorted(existants))
+                
+                try:
+                    self._inserer_agents_en_bloc(conn, lignes.values())
+                except sqlite3.IntegrityError:
+                    # Ligne invalide ou conflit apparu depuis la verification: ligne par ligne
+                    conn.rollback()
+                    for matricule, ligne in list(lignes.items()):
+                        try:
+                            conn.execute(INSERT_AGENT, ligne)
+                        except sqlite3.IntegrityError as e:
+                            del lignes[matricule]
+                            if "UNIQUE" in str(e):
+                                conflits.append(matricule)
+                            else:
+                                erreurs.append((matricule, str(e)))
+                
+                ids: Dict[str, int] = {}
+                matricules = list(lignes)
+                for debut in range(0, len(matricules), 500):
+                    tranche = matricules[debut:debut + 500]
+                    ids.update(conn.execute(
+                        f"SELECT matricule, id FROM agents WHERE matricule IN ({','.join('?' * len(tranche))})", tranche
+                    ).fetchall())
+                
+                diplomes = [self._ligne_diplome(agent_id, diplome)
+                            for matricule, agent_id in ids.items()
+                            for diplome in diplomes_agents[matricule]]
+                conn.executemany(INSERT_DIPLOME, diplomes)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"❌ Erreur insertion du lot ({len(lot)} agents): {e}")
+            resume['erreurs'].extend((agent_data.get('matricule'), str(e)) for agent_data in lot)
+            return
+        
+        resume['inseres'] += len(ids)
+        resume['conflits'].extend(conflits)
+        resume['erreurs'].extend(erreurs)
+        resume['diplomes'] += len(diplomes)
+        resume['diplomes_rejetes'] += diplomes_rejetes
+    
+    def _inserer_agents_en_bloc(self, conn: sqlite3.Connection, lignes: Iterable[Tuple]):
+        """
+        Inserer des lignes INSERT_AGENT en une seule instruction (INSERT ... SELECT)
+        
+        Les triggers des index de recherche (agents_fts, agents_trigrammes) indexent
+        alors le lot d'un bloc: avec une instruction par ligne, FTS5 ecrit ses
+        donnees a chaque ligne (environ 5 fois plus lent).
+        """
+        conn.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS agents_import AS
+            SELECT {COLONNES_INSERTION_AGENT} FROM agents WHERE 0
+        """)
+        conn.execute("DELETE FROM temp.agents_import")
+        conn.executemany(f"""
+            INSERT INTO temp.agents_import ({COLONNES_INSERTION_AGENT})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, lignes)
+        conn.execute(f"""
+            INSERT INTO agents ({COLONNES_INSERTION_AGENT})
+            SELECT {COLONNES_INSERTION_AGENT} FROM temp.agents_import ORDER BY rowid
+        """)
+        conn.execute("DELETE FROM temp.agents_import")
     
     def get_all_agents(self) -> List[Dict[str, Any]]:
         """Recuperer tous les agents"""
@@ -254,9 +891,10 @@ class DatabaseManager:
                     """)
                     agents = [dict(row) for row in cursor.fetchall()]
                     
-                    # Ajouter les diplomes pour chaque agent
+                    # Diplomes de tous les agents en une seule lecture
+                    diplomes = self._diplomes_par_agent(conn)
                     for agent in agents:
-                        agent['diplomes'] = self.get_diplomes_by_agent(agent['id'])
+                        agent['diplomes'] = diplomes.get(agent['id'], [])
                     
                     return agents
                     
@@ -269,6 +907,323 @@ class DatabaseManager:
         
         return []
     
+    def query_agents(self, filters: Optional[Mapping[str, Any]] = None,
+                     order_by: Sequence[str] = ORDRE_AGENTS, after_key: Optional[str] = None,
+                     limit: Optional[int] = 100) -> Dict[str, Any]:
+        """
+        Une page d'agents, paginee par cle (keyset) sur order_by puis id
+        
+        filters: grade_actuel, unite_provenance, statut, statut_evaluation
+        ('proposable', 'bientot', 'non_proposable') et texte (sous-chaine du nom,
+        du prenom ou du matricule, via agents_trigrammes des 3 caracteres). after_key: curseur retourne par la page
+        precedente; limit None: toutes les lignes restantes. Retourne {'agents': [...],
+        'curseur': jeton de la page suivante ou None}. Les diplomes ne sont pas
+        charges (voir get_agent_by_id).
+        L'ordre par defaut est servi par idx_agents_liste sans tri.
+        """
+        order_by = tuple(order_by)
+        if not order_by or any(colonne not in COLONNES_TRI_AGENTS for colonne in order_by):
+            raise ValueError(f"Ordre non supporte: {order_by} (colonnes: {', '.join(COLONNES_TRI_AGENTS)})")
+        colonnes_cle = order_by + ('id',)
+        
+        conditions, params = self._filtres_agents(filters)
+        if after_key is not None:
+            ordre_curseur, cle = self._lire_curseur(after_key)
+            if ordre_curseur != order_by:
+                raise ValueError("Curseur obtenu avec un autre ordre de tri")
+            conditions.append(f"({', '.join(colonnes_cle)}) > ({', '.join('?' * len(cle))})")
+            params.extend(cle)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.get_connection() as conn:
+            agents = [dict(row) for row in conn.execute(
+                f"SELECT * FROM agents {where} ORDER BY {', '.join(colonnes_cle)} LIMIT ?",
+                params + [-1 if limit is None else limit + 1]
+            )]
+        
+        curseur = None
+        if limit is not None and len(agents) > limit:
+            agents = agents[:limit]
+            curseur = self._creer_curseur(order_by, [agents[-1][colonne] for colonne in colonnes_cle])
+        return {'agents': agents, 'curseur': curseur}
+    
+    def get_unites(self) -> List[str]:
+        """Unites de provenance renseignees (triees)"""
+        with self.get_connection() as conn:
+            return [row[0] for row in conn.execute("""
+                SELECT DISTINCT unite_provenance FROM agents
+                WHERE unite_provenance IS NOT NULL AND unite_provenance != ''
+                ORDER BY unite_provenance
+            """)]
+    
+    def search_agents(self, query: str, filters: Optional[Mapping[str, Any]] = None,
+                      after_key: Optional[str] = None, limit: Optional[int] = 100) -> Dict[str, Any]:
+        """
+        Une page des agents dont le nom, le prenom ou le matricule contient query
+        
+        Filtre texte de query_agents (meme ordre, meme pagination par curseur);
+        filters: autres filtres de query_agents. Sans texte: aucune ligne.
+        """
+        if not (query or "").strip():
+            return {'agents': [], 'curseur': None}
+        return self.query_agents({**(filters or {}), 'texte': query}, after_key=after_key, limit=limit)
+    
+    def search_agents_ranked(self, query: str, filters: Optional[Mapping[str, Any]] = None,
+                             limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Agents dont le nom, le prenom ou le matricule commencent par chacun des termes
+        de query (dans un ordre quelconque), du plus pertinent au moins pertinent (bm25)
+        
+        filters: filtres de query_agents, appliques dans la meme requete. Sans FTS5,
+        recherche par sous-chaine (search_agents, ordre de la liste).
+        """
+        termes = re.findall(r"\w+", query or "")
+        if not termes:
+            return []
+        if not self.recherche_fts:
+            return self.search_agents(query, filters, limit=limit)['agents']
+        
+        expression = " ".join('"' + terme + '"*' for terme in termes)
+        conditions, params = self._filtres_agents(filters, alias='a')
+        filtre = "".join(f" AND {condition}" for condition in conditions)
+        with self.get_connection() as conn:
+            return [dict(row) for row in conn.execute(f"""
+                SELECT a.* FROM agents_fts
+                JOIN agents a ON a.id = agents_fts.rowid
+                WHERE agents_fts MATCH ?{filtre}
+                ORDER BY bm25(agents_fts)
+                LIMIT ?
+            """, [expression, *params, limit])]
+    
+    def search_agents_fuzzy(self, query: str, filters: Optional[Mapping[str, Any]] = None,
+                            limit: int = 50, seuil: float = 0.6, nb_candidats: int = 200) -> List[Dict[str, Any]]:
+        """
+        Agents dont le nom, le prenom ou le matricule ressemble a query
+        (SequenceMatcher.ratio >= seuil), du plus proche au moins proche
+        
+        Seuls les nb_candidats agents partageant le plus de trigrammes avec query
+        (agents_trigrammes, mots entoures d'espaces) sont compares: une valeur sans
+        aucun trigramme commun n'est pas retenue. Moins de 3 caracteres: candidats par
+        sous-chaine (search_agents). Sans index trigramme, tous les agents filtres sont compares.
+        """
+        texte = (query or "").strip().lower()
+        if not texte:
+            return []
+        
+        if not self.recherche_trigrammes:
+            candidats = self.query_agents(filters, limit=None)['agents']
+        elif len(texte) < 3:
+            candidats = self.search_agents(texte, filters, limit=nb_candidats)['agents']
+        else:
+            mots = f" {texte} "
+            trigrammes = sorted({mots[i:i + 3] for i in range(len(mots) - 2)})
+            expression = " OR ".join('"' + trigramme.replace('"', '""') + '"' for trigramme in trigrammes)
+            conditions, params = self._filtres_agents(filters, alias='a')
+            filtre = "".join(f" AND {condition}" for condition in conditions)
+            with self.get_connection() as conn:
+                candidats = [dict(row) for row in conn.execute(f"""
+                    SELECT a.* FROM agents_trigrammes
+                    JOIN agents a ON a.id = agents_trigrammes.rowid
+                    WHERE agents_trigrammes MATCH ?{filtre}
+                    ORDER BY bm25(agents_trigrammes)
+                    LIMIT ?
+                """, [expression, *params, nb_candidats])]
+        
+        notes = []
+        for agent in candidats:
+            score = max(SequenceMatcher(None, texte, str(agent.get(champ) or '').lower()).ratio()
+                        for champ in ('nom', 'prenom', 'matricule'))
+            if score >= seuil:
+                notes.append((score, agent))
+        notes.sort(key=lambda note: note[0], reverse=True)
+        return [agent for _, agent in notes[:limit]]
+    
+    def _filtres_agents(self, filters: Optional[Mapping[str, Any]], alias: str = '') -> Tuple[List[str], List[Any]]:
+        """Clauses WHERE (et parametres) des filtres de query_agents (colonnes prefixees par alias)"""
+        conditions: List[str] = []
+        params: List[Any] = []
+        filters = filters or {}
+        a = f"{alias}." if alias else ""
+        
+        for colonne in ('grade_actuel', 'unite_provenance', 'statut'):
+            if filters.get(colonne):
+                conditions.append(f"{a}{colonne} = ?")
+                params.append(filters[colonne])
+        
+        statut_evaluation = filters.get('statut_evaluation')
+        if statut_evaluation:
+            codes = [STATUTS_EVALUATION.index(statut_evaluation)]
+            if statut_evaluation == 'non_proposable':
+                codes.append(STATUTS_EVALUATION.index('aucun'))
+            conditions.append(
+                f"{a}id IN (SELECT agent_id FROM evaluation_results WHERE statut IN ({','.join('?' * len(codes))}))"
+            )
+            params.extend(codes)
+        
+        texte = (filters.get('texte') or '').strip()
+        if texte:
+            if self.recherche_trigrammes and len(texte) >= 3:
+                # Pre-filtrage par l'index trigramme: une valeur qui contient texte contient
+                # ses trigrammes a la suite (phrase); LIKE reste le critere exact
+                conditions.append(f"{a}id IN (SELECT rowid FROM agents_trigrammes WHERE agents_trigrammes MATCH ?)")
+                params.append('"' + texte.replace('"', '""') + '"')
+            motif = '%' + texte.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append(f"({a}nom LIKE ? ESCAPE '\\' OR {a}prenom LIKE ? ESCAPE '\\' OR {a}matricule LIKE ? ESCAPE '\\')")
+            params.extend([motif] * 3)
+        
+        return conditions, params
+    
+    @staticmethod
+    def _creer_curseur(order_by: Tuple[str, ...], cle: List[Any]) -> str:
+        donnees = json.dumps([list(order_by), cle], separators=(',', ':'))
+        return base64.urlsafe_b64encode(donnees.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _lire_curseur(jeton: str) -> Tuple[Tuple[str, ...], List[Any]]:
+        try:
+            order_by, cle = json.loads(base64.urlsafe_b64decode(jeton.encode('ascii')))
+            return tuple(order_by), list(cle)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Curseur invalide: {e}")
+    
+    def get_agents_evaluation_data(self, agent_ids: Optional[Sequence[int]] = None
+                                   ) -> Tuple[List[Dict[str, Any]], Dict[int, List[str]]]:
+        """
+        Charger uniquement les colonnes utiles a l'evaluation (2 requetes au total)
+        
+        Retourne (agents, diplomes) ou diplomes associe a chaque agent_id la liste
+        des noms de diplomes actifs, dans le meme ordre que get_diplomes_by_agent.
+        agent_ids: restreindre a ces agents (2 requetes par tranche de 500 identifiants).
+        """
+        colonnes = """
+            SELECT id, matricule, nom, prenom, grade_actuel,
+                   anciennete_service, anciennete_grade,
+                   note_annee_courante, note_annee_moins_1, note_annee_moins_2
+            FROM agents
+        """
+        with self.get_connection() as conn:
+            diplomes: Dict[int, List[str]] = {}
+            
+            if agent_ids is None:
+                agents = [dict(row) for row in conn.execute(colonnes + " ORDER BY grade_actuel, nom, prenom")]
+                
+                for row in conn.execute("""
+                    SELECT agent_id, diplome FROM diplomes_historique 
+                    WHERE actif = 1
+                    ORDER BY agent_id, date_obtention DESC
+                """):
+                    diplomes.setdefault(row['agent_id'], []).append(row['diplome'])
+                
+                return agents, diplomes
+            
+            agents = []
+            ids = list(agent_ids)
+            for debut in range(0, len(ids), 500):
+                tranche = ids[debut:debut + 500]
+                marqueurs = ','.join('?' * len(tranche))
+                agents.extend(dict(row) for row in conn.execute(
+                    colonnes + f" WHERE id IN ({marqueurs})", tranche
+                ))
+                for row in conn.execute(f"""
+                    SELECT agent_id, diplome FROM diplomes_historique
+                    WHERE actif = 1 AND agent_id IN ({marqueurs})
+                    ORDER BY agent_id, date_obtention DESC
+                """, tranche):
+                    diplomes.setdefault(row['agent_id'], []).append(row['diplome'])
+            
+            agents.sort(key=lambda a: (a['grade_actuel'], a['nom'], a['prenom']))
+            return agents, diplomes
+    
+    def get_candidate_agent_ids(self, grade_actuel: str, condition: str, params: Sequence[Any]) -> Set[int]:
+        """
+        Identifiants des agents d'un grade verifiant une condition SQL (voir core/rule_sql.py)
+        
+        La condition porte sur les alias a (agents) et n (echelles_notes de la note courante).
+        """
+        with self.get_connection() as conn:
+            return {row[0] for row in conn.execute(f"""
+                SELECT a.id
+                FROM agents a
+                LEFT JOIN echelles_notes n ON n.note = a.note_annee_courante
+                WHERE a.grade_actuel = ? AND ({condition})
+            """, [grade_actuel, *params])}
+    
+    def get_agent_ids_outside_grades(self, grades: Sequence[str]) -> Set[int]:
+        """Identifiants des agents dont le grade actuel n'est pas dans grades (ou n'est pas renseigne)"""
+        with self.get_connection() as conn:
+            return {row[0] for row in conn.execute(f"""
+                SELECT id FROM agents
+                WHERE grade_actuel IS NULL OR grade_actuel NOT IN ({', '.join('?' * len(grades))})
+            """, list(grades))}
+    
+    def get_note_scale(self) -> Dict[str, int]:
+        """Echelle de notes enregistree (note -> valeur numerique)"""
+        def charger():
+            with self.get_connection() as conn:
+                return {row['note']: row['valeur_numerique']
+                        for row in conn.execute("SELECT note, valeur_numerique FROM echelles_notes")}
+        return dict(self._reference('echelle_notes', charger))
+    
+    def table_exists(self, table: str) -> bool:
+        """Vrai si la table existe (tables creees par des scripts de migration)"""
+        with self.get_connection() as conn:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone() is not None
+
+    def count_agents(self, filters: Optional[Mapping[str, Any]] = None) -> int:
+        """Nombre total d'agents (tous statuts), ou de ceux retenus par les filtres de query_agents"""
+        conditions, params = self._filtres_agents(filters)
+        with self.get_connection() as conn:
+            if not conditions:
+                row = conn.execute(
+                    "SELECT nombre FROM statistiques_agents WHERE dimension = 'total' AND valeur = ''"
+                ).fetchone()
+                return row[0] if row else 0
+            return conn.execute(f"SELECT COUNT(*) FROM agents WHERE {' AND '.join(conditions)}", params).fetchone()[0]
+
+    def iter_agents_evaluation_data(self, batch_size: int = 1000
+                                    ) -> Iterator[Tuple[List[Dict[str, Any]], Dict[int, List[str]]]]:
+        """
+        Parcourir les donnees d'evaluation par lots de batch_size agents
+
+        Pagination par cle (id > dernier id lu): chaque lot coute deux requetes
+        (agents puis diplomes du lot) et la memoire reste bornee par la taille du lot.
+        Meme format que get_agents_evaluation_data, mais agents tries par id.
+        """
+        batch_size = max(1, batch_size)
+        dernier_id = 0
+
+        while True:
+            with self.get_connection() as conn:
+                agents = [dict(row) for row in conn.execute("""
+                    SELECT id, matricule, nom, prenom, grade_actuel,
+                           anciennete_service, anciennete_grade,
+                           note_annee_courante, note_annee_moins_1, note_annee_moins_2
+                    FROM agents
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                """, (dernier_id, batch_size))]
+
+                if not agents:
+                    return
+
+                diplomes: Dict[int, List[str]] = {}
+                for row in conn.execute("""
+                    SELECT agent_id, diplome FROM diplomes_historique
+                    WHERE actif = 1 AND agent_id BETWEEN ? AND ?
+                    ORDER BY agent_id, date_obtention DESC
+                """, (agents[0]['id'], agents[-1]['id'])):
+                    diplomes.setdefault(row['agent_id'], []).append(row['diplome'])
+
+            # Transaction terminee avant de rendre la main a l'appelant
+            yield agents, diplomes
+
+            if len(agents) < batch_size:
+                return
+            dernier_id = agents[-1]['id']
+
     def get_agent_by_id(self, agent_id: int) -> Optional[Dict[str, Any]]:
         """Recuperer un agent par son ID"""
         try:
@@ -277,7 +1232,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 if row:
                     agent = dict(row)
-                    agent['diplomes'] = self.get_diplomes_by_agent(agent_id)
+                    agent['diplomes'] = self._diplomes_par_agent(conn, [agent_id]).get(agent_id, [])
                     return agent
         except Exception as e:
             print(f"❌ Erreur get_agent_by_id: {e}")
@@ -291,7 +1246,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 if row:
                     agent = dict(row)
-                    agent['diplomes'] = self.get_diplomes_by_agent(agent['id'])
+                    agent['diplomes'] = self._diplomes_par_agent(conn, [agent['id']]).get(agent['id'], [])
                     return agent
         except Exception as e:
             print(f"❌ Erreur get_agent_by_matricule: {e}")
@@ -359,8 +1314,337 @@ class DatabaseManager:
             traceback.print_exc()
             return False
     
+    def save_evaluation_results(self, rows: List[Tuple[str, str, int]],
+                                empreintes: Optional[List[Tuple[int, str, str]]] = None,
+                                resultats: Optional[List[Tuple]] = None) -> int:
+        """
+        Ecrire un lot de resultats d'evaluation dans une seule transaction
+        
+        rows: tuples (resultat_evaluation, derniere_evaluation, agent_id)
+        empreintes: tuples (agent_id, empreinte, evalue_le) enregistres dans la meme transaction
+        resultats: lignes evaluation_results (agent_id, statut, grade_cible, type_avancement,
+                   regle_id, run_id, conditions_manquantes, constats, evalue_le)
+        Retourne le nombre de lignes ecrites.
+        """
+        if not rows:
+            return 0
+        
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                with self.get_connection() as conn:
+                    conn.executemany("""
+                        UPDATE agents 
+                        SET resultat_evaluation = ?1, derniere_evaluation = ?2, updated_at = ?2
+                        WHERE id = ?3
+                    """, rows)
+                    if empreintes:
+                        conn.executemany("""
+                            INSERT OR REPLACE INTO evaluation_empreintes (agent_id, empreinte, evalue_le)
+                            VALUES (?, ?, ?)
+                        """, empreintes)
+                    if resultats:
+                        self._enregistrer_changements(conn, resultats)
+                        conn.executemany("""
+                            INSERT INTO evaluation_results (
+                                agent_id, statut, grade_cible, type_avancement,
+                                regle_id, run_id, conditions_manquantes, constats, evalue_le
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (agent_id) DO UPDATE SET
+                                statut = excluded.statut, grade_cible = excluded.grade_cible,
+                                type_avancement = excluded.type_avancement, regle_id = excluded.regle_id,
+                                run_id = excluded.run_id, conditions_manquantes = excluded.conditions_manquantes,
+                                constats = excluded.constats, evalue_le = excluded.evalue_le
+                        """, resultats)
+                    conn.commit()
+                    return len(rows)
+            except sqlite3.OperationalError as e:
+                if "database is locked" in str(e) and attempt < max_retries - 1:
+                    time.sleep(0.1 * (2 ** attempt))
+                    continue
+                raise e
+        return 0
+    
+    def _enregistrer_changements(self, conn: sqlite3.Connection, resultats: List[Tuple]):
+        """
+        Enregistrer dans evaluation_changements les resultats differents du resultat courant
+        
+        Appele avant l'ecriture du lot dans evaluation_results (meme transaction).
+        Les resultats hors campagne (run_id NULL) ne sont pas historises.
+        """
+        nouveaux = {r[0]: r for r in resultats if r[5] is not None}
+        if not nouveaux:
+            return
+        
+        anciens: Dict[int, sqlite3.Row] = {}
+        ids = list(nouveaux)
+        for debut in range(0, len(ids), 500):
+            morceau = ids[debut:debut + 500]
+            for row in conn.execute(f"""
+                SELECT agent_id, statut, grade_cible, type_avancement FROM evaluation_results
+                WHERE agent_id IN ({','.join('?' * len(morceau))})
+            """, morceau):
+                anciens[row['agent_id']] = row
+        
+        changements = []
+        for agent_id, (_, statut, grade_cible, type_avancement, _, run_id, _, _, _) in nouveaux.items():
+            ancien = anciens.get(agent_id)
+            if ancien is not None and (ancien['statut'], ancien['grade_cible'], ancien['type_avancement']) == \
+                    (statut, grade_cible, type_avancement):
+                continue
+            changements.append((
+                run_id, agent_id,
+                ancien['statut'] if ancien else None, statut,
+                ancien['grade_cible'] if ancien else None, grade_cible,
+                ancien['type_avancement'] if ancien else None, type_avancement
+            ))
+        
+        if changements:
+            conn.executemany("""
+                INSERT OR REPLACE INTO evaluation_changements (
+                    run_id, agent_id, ancien_statut, nouveau_statut,
+                    ancien_grade_cible, nouveau_grade_cible,
+                    ancien_type_avancement, nouveau_type_avancement
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, changements)
+    
+    # ==================== CAMPAGNES D'EVALUATION ====================
+    
+    def start_evaluation_run(self, hash_regles: Optional[str] = None) -> int:
+        """Ouvrir une campagne d'evaluation et retourner son identifiant"""
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO evaluation_runs (demarre_le, hash_regles) VALUES (?, ?)",
+                (datetime.now().isoformat(), hash_regles)
+            )
+            conn.commit()
+            return cursor.lastrowid
+    
+    def finish_evaluation_run(self, run_id: int, nb_agents: int, duree: float) -> int:
+        """Cloturer une campagne (nombre d'agents, duree en secondes); retourne le nombre de changements"""
+        with self.get_connection() as conn:
+            nb_changements = conn.execute(
+                "SELECT COUNT(*) FROM evaluation_changements WHERE run_id = ?", (run_id,)
+            ).fetchone()[0]
+            conn.execute("""
+                UPDATE evaluation_runs SET nb_agents = ?, nb_changements = ?, duree = ?
+                WHERE id = ?
+            """, (nb_agents, nb_changements, duree, run_id))
+            conn.commit()
+            return nb_changements
+    
+    def get_evaluation_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Dernieres campagnes d'evaluation, de la plus recente a la plus ancienne"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("SELECT * FROM evaluation_runs ORDER BY id DESC LIMIT ?", (limit,))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Erreur get_evaluation_runs: {e}")
+            return []
+    
+    def get_changes_since_last_run(self, run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Agents dont le resultat a change lors d'une campagne (par defaut la derniere)
+        
+        Les statuts sont decodes en noms (None pour un agent evalue pour la premiere fois).
+        """
+        try:
+            with self.get_connection() as conn:
+                if run_id is None:
+                    cursor = conn.execute("SELECT * FROM v_changements_dernier_run ORDER BY nom, prenom")
+                else:
+                    cursor = conn.execute("""
+                        SELECT c.*, a.matricule, a.nom, a.prenom, a.grade_actuel
+                        FROM evaluation_changements c
+                        JOIN agents a ON a.id = c.agent_id
+                        WHERE c.run_id = ?
+                        ORDER BY a.nom, a.prenom
+                    """, (run_id,))
+                
+                changements = []
+                for row in cursor.fetchall():
+                    changement = dict(row)
+                    for cle in ('ancien_statut', 'nouveau_statut'):
+                        if changement[cle] is not None:
+                            changement[cle] = STATUTS_EVALUATION[changement[cle]]
+                    changements.append(changement)
+                return changements
+        except Exception as e:
+            print(f"❌ Erreur get_changes_since_last_run: {e}")
+            return []
+    
+    def get_evaluation_counts(self) -> Dict[str, int]:
+        """
+        Nombre d'agents evalues par statut (compteurs de statistiques_agents)
+        
+        Retourne {'proposable', 'bientot', 'non_proposable', 'evalues'}; les agents sans
+        regle applicable ('aucun') sont comptes comme non proposables.
+        """
+        comptes = {'proposable': 0, 'bientot': 0, 'non_proposable': 0, 'evalues': 0}
+        try:
+            with self.get_connection() as conn:
+                for row in conn.execute("""
+                    SELECT valeur, nombre FROM statistiques_agents
+                    WHERE dimension = 'evaluation' AND nombre > 0
+                """):
+                    code = int(row['valeur'])
+                    statut = STATUTS_EVALUATION[code] if 0 <= code < len(STATUTS_EVALUATION) else 'aucun'
+                    cle = 'non_proposable' if statut == 'aucun' else statut
+                    comptes[cle] += row['nombre']
+                    comptes['evalues'] += row['nombre']
+        except Exception as e:
+            print(f"❌ Erreur get_evaluation_counts: {e}")
+        return comptes
+    
+    def get_agent_ids_by_evaluation_status(self, statut: str, grade_cible: Optional[str] = None) -> Set[int]:
+        """Identifiants des agents ayant un statut d'evaluation donne (optionnellement vers un grade cible)"""
+        codes = [STATUTS_EVALUATION.index(statut)]
+        if statut == 'non_proposable':
+            codes.append(STATUTS_EVALUATION.index('aucun'))
+        
+        query = f"SELECT agent_id FROM evaluation_results WHERE statut IN ({','.join('?' * len(codes))})"
+        params: List[Any] = list(codes)
+        if grade_cible:
+            query += " AND grade_cible = ?"
+            params.append(grade_cible)
+        
+        try:
+            with self.get_connection() as conn:
+                return {row[0] for row in conn.execute(query, params)}
+        except Exception as e:
+            print(f"❌ Erreur get_agent_ids_by_evaluation_status: {e}")
+            return set()
+    
+    def get_evaluation_results(self) -> Dict[int, Dict[str, Any]]:
+        """Resultats structures par agent_id (statut decode en nom, conditions en liste)"""
+        try:
+            with self.get_connection() as conn:
+                return {row['agent_id']: self._resultat_evaluation(row)
+                        for row in conn.execute("SELECT * FROM evaluation_results")}
+        except Exception as e:
+            print(f"❌ Erreur get_evaluation_results: {e}")
+            return {}
+    
+    def get_evaluation_result(self, agent_id: int) -> Optional[Dict[str, Any]]:
+        """Resultat structure d'un agent (voir get_evaluation_results), None s'il n'a pas ete evalue"""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT * FROM evaluation_results WHERE agent_id = ?", (agent_id,)).fetchone()
+                return self._resultat_evaluation(row) if row else None
+        except Exception as e:
+            print(f"❌ Erreur get_evaluation_result: {e}")
+            return None
+    
+    @staticmethod
+    def _resultat_evaluation(row: sqlite3.Row) -> Dict[str, Any]:
+        resultat = dict(row)
+        resultat['statut'] = STATUTS_EVALUATION[row['statut']]
+        resultat['conditions_manquantes'] = (
+            row['conditions_manquantes'].split(',') if row['conditions_manquantes'] else []
+        )
+        return resultat
+    
+    def get_grade_history(self, agent_ids: Optional[Sequence[int]] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Periodes actives de historique_grades par agent_id, en une requete (tous les agents
+        par defaut, sinon une par tranche de 500 identifiants), triees par date_debut.
+        Dictionnaire vide si la table n'existe pas (voir migrate_historique_grades.py).
+        """
+        query = "SELECT agent_id, grade, date_debut, date_fin FROM historique_grades WHERE actif = 1"
+        if agent_ids is None:
+            requetes = [(query + " ORDER BY agent_id, date_debut", [])]
+        else:
+            ids = list(agent_ids)
+            requetes = [
+                (query + f" AND agent_id IN ({','.join('?' * len(ids[debut:debut + 500]))})"
+                 " ORDER BY agent_id, date_debut", ids[debut:debut + 500])
+                for debut in range(0, len(ids), 500)
+            ]
+        
+        historique: Dict[int, List[Dict[str, Any]]] = {}
+        try:
+            with self.get_connection() as conn:
+                for requete, params in requetes:
+                    for row in conn.execute(requete, params):
+                        historique.setdefault(row['agent_id'], []).append(dict(row))
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                print(f"❌ Erreur get_grade_history: {e}")
+        return historique
+    
+    def get_career_dates(self) -> Dict[int, Tuple[str, str]]:
+        """Dates d'incorporation et d'entree dans le grade par agent_id"""
+        with self.get_connection() as conn:
+            return {
+                row['id']: (row['date_incorporation'], row['date_entree_grade'])
+                for row in conn.execute("SELECT id, date_incorporation, date_entree_grade FROM agents")
+            }
+    
+    def save_eligibility_dates(self, rows: List[Tuple]) -> int:
+        """
+        Remplacer le contenu de dates_eligibilite (une seule transaction)
+        
+        rows: (agent_id, regle_id, grade_cible, type_avancement, date_eligibilite,
+               autres_conditions_ok, conditions_bloquantes, calcule_le)
+        """
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM dates_eligibilite")
+            conn.executemany("""
+                INSERT INTO dates_eligibilite (
+                    agent_id, regle_id, grade_cible, type_avancement, date_eligibilite,
+                    autres_conditions_ok, conditions_bloquantes, calcule_le
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+            return len(rows)
+    
+    def get_agents_eligible_between(self, debut: date, fin: date,
+                                    autres_conditions_ok: bool = True) -> List[Dict[str, Any]]:
+        """
+        Agents dont les conditions d'anciennete d'une regle seront remplies entre debut et fin inclus
+        
+        Requete par intervalle sur l'index (autres_conditions_ok, date_eligibilite). Par defaut,
+        seuls les agents remplissant deja les autres conditions (diplomes, notes) sont retenus.
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("""
+                    SELECT e.*, a.matricule, a.nom, a.prenom, a.grade_actuel
+                    FROM dates_eligibilite e
+                    JOIN agents a ON a.id = e.agent_id
+                    WHERE e.autres_conditions_ok = ? AND e.date_eligibilite BETWEEN ? AND ?
+                    ORDER BY e.date_eligibilite, a.nom, a.prenom
+                """, (int(autres_conditions_ok), debut.isoformat(), fin.isoformat()))
+                eligibles = []
+                for row in cursor.fetchall():
+                    eligible = dict(row)
+                    eligible['conditions_bloquantes'] = (
+                        row['conditions_bloquantes'].split(',') if row['conditions_bloquantes'] else []
+                    )
+                    eligibles.append(eligible)
+                return eligibles
+        except Exception as e:
+            print(f"❌ Erreur get_agents_eligible_between: {e}")
+            return []
+    
+    def get_agents_eligible_within(self, jours: int = 90) -> List[Dict[str, Any]]:
+        """Agents qui deviennent eligibles (anciennete) dans les prochains jours"""
+        aujourdhui = date.today()
+        return self.get_agents_eligible_between(aujourdhui, aujourdhui + timedelta(days=jours))
+    
+    def get_evaluation_fingerprints(self) -> Dict[int, str]:
+        """Empreintes enregistrees lors de la derniere evaluation de chaque agent"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("SELECT agent_id, empreinte FROM evaluation_empreintes")
+                return {row['agent_id']: row['empreinte'] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"❌ Erreur get_evaluation_fingerprints: {e}")
+            return {}
+    
     def delete_agent(self, agent_id: int) -> bool:
-        """Supprimer un agent"""
+        """Supprimer un agent (diplomes, resultats, empreinte, changements et dates d'eligibilite en cascade)"""
         try:
             with self.get_connection() as conn:
                 conn.execute("DELETE FROM agents WHERE id = ?", (agent_id,))
@@ -396,16 +1680,36 @@ class DatabaseManager:
         """Recuperer les diplomes d'un agent"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT * FROM diplomes_historique 
-                    WHERE agent_id = ? AND actif = 1
-                    ORDER BY date_obtention DESC
-                """, (agent_id,))
-                return [dict(row) for row in cursor.fetchall()]
+                return self._diplomes_par_agent(conn, [agent_id]).get(agent_id, [])
         except Exception as e:
             print(f"❌ Erreur get_diplomes: {e}")
             return []
     
+    def _diplomes_par_agent(self, conn: sqlite3.Connection,
+                            agent_ids: Optional[Sequence[int]] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Diplomes actifs groupes par agent_id (plus recent d'abord)
+        
+        Sans agent_ids: un seul parcours de diplomes_historique; sinon lecture par
+        tranches de 500 identifiants (limite de parametres SQLite).
+        """
+        query = "SELECT * FROM diplomes_historique WHERE actif = 1"
+        if agent_ids is None:
+            requetes = [(query + " ORDER BY agent_id, date_obtention DESC", [])]
+        else:
+            ids = list(agent_ids)
+            requetes = [
+                (query + f" AND agent_id IN ({','.join('?' * len(ids[debut:debut + 500]))})"
+                 " ORDER BY agent_id, date_obtention DESC", ids[debut:debut + 500])
+                for debut in range(0, len(ids), 500)
+            ]
+        
+        diplomes: Dict[int, List[Dict[str, Any]]] = {}
+        for requete, params in requetes:
+            for row in conn.execute(requete, params):
+                diplomes.setdefault(row['agent_id'], []).append(dict(row))
+        return diplomes
+    
     # ==================== GESTION DES REGLES D'AVANCEMENT ====================
     
     def create_rule(self, rule_data: Dict[str, Any]) -> int:
@@ -417,9 +1721,9 @@ class DatabaseManager:
                         categorie, grade_source, grade_cible, type_avancement,
                         anciennete_service_min, anciennete_grade_min,
                         grade_specifique, anciennete_grade_specifique,
-                        diplomes_requis, note_min_courante, notes_interdites_n1_n2,
+                        diplomes_requis, expression_diplomes, note_min_courante, notes_interdites_n1_n2,
                         conditions_speciales, statut, actif
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     rule_data.get('categorie', ''),
                     rule_data['grade_source'],
@@ -430,6 +1734,7 @@ class DatabaseManager:
                     rule_data.get('grade_specifique'),
                     rule_data.get('anciennete_grade_specifique', 0),
                     ','.join(rule_data.get('diplomes_requis', [])),
+                    rule_data.get('expression_diplomes') or None,
                     rule_data.get('note_min_courante'),
                     ','.join(rule_data.get('notes_interdites_n1_n2', [])),
                     rule_data.get('conditions_speciales', ''),
@@ -438,6 +1743,7 @@ class DatabaseManager:
                 ))
                 rule_id = cursor.lastrowid
                 conn.commit()
+                self._invalider_reference('regles_avancement')
                 print(f"✅ Regle {rule_data['grade_source']} → {rule_data['grade_cible']} creee avec ID {rule_id}")
                 return rule_id
         except Exception as e:
@@ -446,7 +1752,7 @@ class DatabaseManager:
     
     def get_all_rules(self) -> List[Dict[str, Any]]:
         """Recuperer toutes les regles"""
-        try:
+        def charger():
             with self.get_connection() as conn:
                 cursor = conn.execute("""
                     SELECT * FROM regles_avancement 
@@ -460,49 +1766,29 @@ class DatabaseManager:
                         END,
                         grade_source
                 """)
-                rules = []
-                for row in cursor.fetchall():
-                    rule = dict(row)
-                    # Convertir les listes de string en listes Python
-                    if rule.get('diplomes_requis'):
-                        rule['diplomes_requis'] = [d.strip() for d in rule['diplomes_requis'].split(',') if d.strip()]
-                    else:
-                        rule['diplomes_requis'] = []
-                    
-                    if rule.get('notes_interdites_n1_n2'):
-                        rule['notes_interdites_n1_n2'] = [n.strip() for n in rule['notes_interdites_n1_n2'].split(',') if n.strip()]
-                    else:
-                        rule['notes_interdites_n1_n2'] = []
-                    
-                    rules.append(rule)
-                return rules
+                return tuple(self._row_to_rule(row) for row in cursor.fetchall())
+        
+        try:
+            return [self._copie_regle(rule) for rule in self._reference('regles', charger)]
         except Exception as e:
             print(f"❌ Erreur recuperation regles: {e}")
             return []
     
     def get_rule_by_id(self, rule_id: int) -> Optional[Dict[str, Any]]:
-        """Recuperer une regle par son ID"""
+        """
+        Recuperer une regle par son ID, active ou desactivee
+        
+        Les regles actives sont lues dans l'index en cache; une regle desactivee
+        (delete_rule, toggle_rule_status) est lue en base.
+        """
         try:
+            for rule in self.get_rules_index().values():
+                for regle in rule:
+                    if regle['id'] == rule_id:
+                        return self._copie_regle(regle)
             with self.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT * FROM regles_avancement WHERE id = ? AND actif = 1
-                """, (rule_id,))
-                row = cursor.fetchone()
-                if row:
-                    rule = dict(row)
-                    # Convertir les listes
-                    if rule.get('diplomes_requis'):
-                        rule['diplomes_requis'] = [d.strip() for d in rule['diplomes_requis'].split(',') if d.strip()]
-                    else:
-                        rule['diplomes_requis'] = []
-                    
-                    if rule.get('notes_interdites_n1_n2'):
-                        rule['notes_interdites_n1_n2'] = [n.strip() for n in rule['notes_interdites_n1_n2'].split(',') if n.strip()]
-                    else:
-                        rule['notes_interdites_n1_n2'] = []
-                    
-                    return rule
-            return None
+                row = conn.execute("SELECT * FROM regles_avancement WHERE id = ?", (rule_id,)).fetchone()
+                return self._row_to_rule(row) if row else None
         except Exception as e:
             print(f"❌ Erreur get_rule_by_id: {e}")
             return None
@@ -526,6 +1812,7 @@ class DatabaseManager:
                         grade_specifique = ?,
                         anciennete_grade_specifique = ?,
                         diplomes_requis = ?,
+                        expression_diplomes = ?,
                         note_min_courante = ?,
                         notes_interdites_n1_n2 = ?,
                         conditions_speciales = ?,
@@ -542,6 +1829,7 @@ class DatabaseManager:
                     rule_data.get('grade_specifique'),
                     rule_data.get('anciennete_grade_specifique', 0),
                     diplomes_str,
+                    rule_data.get('expression_diplomes') or None,
                     rule_data.get('note_min_courante'),
                     notes_interdites_str,
                     rule_data.get('conditions_speciales', ''),
@@ -549,6 +1837,7 @@ class DatabaseManager:
                     rule_id
                 ))
                 conn.commit()
+                self._invalider_reference('regles_avancement')
                 print(f"✅ Regle ID {rule_id} mise a jour")
                 return True
         except Exception as e:
@@ -563,6 +1852,7 @@ class DatabaseManager:
                     UPDATE regles_avancement SET actif = 0 WHERE id = ?
                 """, (rule_id,))
                 conn.commit()
+                self._invalider_reference('regles_avancement')
                 print(f"✅ Regle ID {rule_id} desactivee")
                 return True
         except Exception as e:
@@ -572,31 +1862,60 @@ class DatabaseManager:
     def get_rules_by_grade(self, grade_source: str) -> List[Dict[str, Any]]:
         """Recuperer les regles pour un grade source donne"""
         try:
+            return [self._copie_regle(rule) for rule in self.get_rules_index().get(grade_source, ())]
+        except Exception as e:
+            print(f"❌ Erreur get_rules_by_grade: {e}")
+            return []
+    
+    def get_rules_index(self) -> Mapping[str, Tuple[Dict[str, Any], ...]]:
+        """
+        Charger toutes les regles actives en une seule requete, indexees par grade_source.
+        
+        L'index retourne est en lecture seule et destine aux evaluations en lot:
+        il remplace un appel a get_rules_by_grade par agent. Il est partage (cache des
+        tables de reference) jusqu'a la prochaine modification des regles.
+        """
+        def charger():
             with self.get_connection() as conn:
                 cursor = conn.execute("""
                     SELECT * FROM regles_avancement 
-                    WHERE grade_source = ? AND actif = 1
-                    ORDER BY type_avancement
-                """, (grade_source,))
-                rules = []
+                    WHERE actif = 1
+                    ORDER BY grade_source, type_avancement
+                """)
+                index: Dict[str, List[Dict[str, Any]]] = {}
                 for row in cursor.fetchall():
-                    rule = dict(row)
-                    # Convertir les listes
-                    if rule.get('diplomes_requis'):
-                        rule['diplomes_requis'] = [d.strip() for d in rule['diplomes_requis'].split(',') if d.strip()]
-                    else:
-                        rule['diplomes_requis'] = []
-                    
-                    if rule.get('notes_interdites_n1_n2'):
-                        rule['notes_interdites_n1_n2'] = [n.strip() for n in rule['notes_interdites_n1_n2'].split(',') if n.strip()]
-                    else:
-                        rule['notes_interdites_n1_n2'] = []
-                    
-                    rules.append(rule)
-                return rules
+                    rule = self._row_to_rule(row)
+                    index.setdefault(rule['grade_source'], []).append(rule)
+                return MappingProxyType({grade: tuple(rules) for grade, rules in index.items()})
+        
+        try:
+            return self._reference('index_regles', charger)
         except Exception as e:
-            print(f"❌ Erreur get_rules_by_grade: {e}")
-            return []
+            print(f"❌ Erreur get_rules_index: {e}")
+            return MappingProxyType({})
+    
+    def _row_to_rule(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convertir une ligne regles_avancement en dict (listes Python pour les champs CSV)"""
+        rule = dict(row)
+        if rule.get('diplomes_requis'):
+            rule['diplomes_requis'] = [d.strip() for d in rule['diplomes_requis'].split(',') if d.strip()]
+        else:
+            rule['diplomes_requis'] = []
+        
+        if rule.get('notes_interdites_n1_n2'):
+            rule['notes_interdites_n1_n2'] = [n.strip() for n in rule['notes_interdites_n1_n2'].split(',') if n.strip()]
+        else:
+            rule['notes_interdites_n1_n2'] = []
+        
+        return rule
+    
+    @staticmethod
+    def _copie_regle(rule: Dict[str, Any]) -> Dict[str, Any]:
+        """Copie modifiable d'une regle du cache"""
+        copie = dict(rule)
+        copie['diplomes_requis'] = list(rule['diplomes_requis'])
+        copie['notes_interdites_n1_n2'] = list(rule['notes_interdites_n1_n2'])
+        return copie
     
     def toggle_rule_status(self, rule_id: int) -> bool:
         """Activer/Desactiver une regle"""
@@ -616,6 +1935,7 @@ class DatabaseManager:
                         UPDATE regles_avancement SET statut = ? WHERE id = ?
                     """, (new_status, rule_id))
                     conn.commit()
+                    self._invalider_reference('regles_avancement')
                     print(f"✅ Regle ID {rule_id} changee de {current_status} a {new_status}")
                     return True
             return False
@@ -635,6 +1955,7 @@ class DatabaseManager:
                 """, (diplome_principal, diplome_equivalent))
                 equiv_id = cursor.lastrowid
                 conn.commit()
+                self._invalider_reference('equivalences_diplomes')
                 print(f"✅ Equivalence {diplome_principal} ↔️ {diplome_equivalent} creee avec ID {equiv_id}")
                 return equiv_id
         except Exception as e:
@@ -643,14 +1964,17 @@ class DatabaseManager:
     
     def get_all_equivalences(self) -> List[Dict[str, Any]]:
         """Recuperer toutes les equivalences"""
-        try:
+        def charger():
             with self.get_connection() as conn:
                 cursor = conn.execute("""
                     SELECT * FROM equivalences_diplomes 
                     WHERE actif = 1
                     ORDER BY diplome_principal, diplome_equivalent
                 """)
-                return [dict(row) for row in cursor.fetchall()]
+                return tuple(dict(row) for row in cursor.fetchall())
+        
+        try:
+            return [dict(equiv) for equiv in self._reference('equivalences', charger)]
         except Exception as e:
             print(f"❌ Erreur recuperation equivalences: {e}")
             return []
@@ -691,6 +2015,7 @@ class DatabaseManager:
                     UPDATE equivalences_diplomes SET actif = 0 WHERE id = ?
                 """, (equiv_id,))
                 conn.commit()
+                self._invalider_reference('equivalences_diplomes')
                 print(f"✅ Equivalence ID {equiv_id} supprimee")
                 return True
         except Exception as e:
@@ -707,6 +2032,7 @@ class DatabaseManager:
                     WHERE id = ?
                 """, (diplome_principal, diplome_equivalent, equiv_id))
                 conn.commit()
+                self._invalider_reference('equivalences_diplomes')
                 print(f"✅ Equivalence ID {equiv_id} mise a jour")
                 return True
         except Exception as e:
@@ -716,73 +2042,67 @@ class DatabaseManager:
     def get_equivalents(self, diplome: str) -> List[str]:
         """Obtenir tous les diplomes equivalents a un diplome donne"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT diplome_equivalent FROM equivalences_diplomes 
-                    WHERE diplome_principal = ? AND actif = 1
-                    UNION
-                    SELECT diplome_principal FROM equivalences_diplomes 
-                    WHERE diplome_equivalent = ? AND actif = 1
-                """, (diplome, diplome))
-                return [row['diplome_equivalent'] if 'diplome_equivalent' in row.keys() else row['diplome_principal'] for row in cursor.fetchall()]
+            equivalents = set()
+            for equiv in self.get_all_equivalences():
+                if equiv['diplome_principal'] == diplome:
+                    equivalents.add(equiv['diplome_equivalent'])
+                if equiv['diplome_equivalent'] == diplome:
+                    equivalents.add(equiv['diplome_principal'])
+            return sorted(equivalents)
         except Exception as e:
             print(f"❌ Erreur get_equivalents: {e}")
             return []
     
     # ==================== STATISTIQUES ====================
     
-    def get_stats(self) -> Dict[str, Any]:
-        """Recuperer les statistiques generales"""
+    def get_dashboard_stats(self) -> Dict[str, Any]:
+        """
+        Compteurs du tableau de bord lus dans statistiques_agents (quelques lignes,
+        independamment du nombre d'agents)
+        
+        Retourne {'total_agents', 'par_statut', 'par_grade', 'par_unite', 'evaluation'};
+        par_grade et par_unite ne comptent que les agents actifs, evaluation a les
+        cles de get_evaluation_counts.
+        """
+        stats: Dict[str, Any] = {'total_agents': 0, 'par_statut': {}, 'par_grade': {}, 'par_unite': {}}
+        dimensions = {'statut': 'par_statut', 'grade': 'par_grade', 'unite': 'par_unite'}
         try:
             with self.get_connection() as conn:
-                # Total agents
-                total_agents = conn.execute("SELECT COUNT(*) FROM agents WHERE statut = 'Actif'").fetchone()[0]
-                
-                # Repartition par grade
-                grade_stats = conn.execute("""
-                    SELECT grade_actuel, COUNT(*) as count 
-                    FROM agents 
-                    WHERE statut = 'Actif'
-                    GROUP BY grade_actuel
-                    ORDER BY count DESC
-                """).fetchall()
-                
-                # Stats par statut d'evaluation (pour plus tard)
-                eval_stats = {
-                    'proposables': 0,
-                    'bientot': 0, 
-                    'non_proposables': 0
-                }
-                
-                return {
-                    'total_agents': total_agents,
-                    'grade_stats': [dict(row) for row in grade_stats],
-                    'eval_stats': eval_stats
-                }
+                for row in conn.execute("""
+                    SELECT dimension, valeur, nombre FROM statistiques_agents
+                    WHERE dimension IN ('total', 'statut', 'grade', 'unite') AND nombre > 0
+                    ORDER BY dimension, nombre DESC, valeur
+                """):
+                    if row['dimension'] == 'total':
+                        stats['total_agents'] = row['nombre']
+                    else:
+                        stats[dimensions[row['dimension']]][row['valeur']] = row['nombre']
         except Exception as e:
-            print(f"❌ Erreur get_stats: {e}")
-            return {
-                'total_agents': 0,
-                'grade_stats': [],
-                'eval_stats': {'proposables': 0, 'bientot': 0, 'non_proposables': 0}
+            print(f"❌ Erreur get_dashboard_stats: {e}")
+        stats['evaluation'] = self.get_evaluation_counts()
+        return stats
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Recuperer les statistiques generales (agents actifs, voir get_dashboard_stats)"""
+        stats = self.get_dashboard_stats()
+        comptes = stats['evaluation']
+        return {
+            'total_agents': stats['par_statut'].get('Actif', 0),
+            'grade_stats': [{'grade_actuel': grade, 'count': nombre}
+                            for grade, nombre in stats['par_grade'].items()],
+            'eval_stats': {
+                'proposables': comptes['proposable'],
+                'bientot': comptes['bientot'],
+                'non_proposables': comptes['non_proposable']
             }
+        }
     
     def get_agents_count_by_status(self) -> Dict[str, int]:
         """Recuperer le nombre d'agents par statut"""
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT statut, COUNT(*) as count 
-                    FROM agents 
-                    GROUP BY statut
-                """)
-                return {row['statut']: row['count'] for row in cursor.fetchall()}
-        except Exception as e:
-            print(f"❌ Erreur get_agents_count_by_status: {e}")
-            return {}
+        return self.get_dashboard_stats()['par_statut']
 
-# Instance globale
-db_manager = DatabaseManager()
+# Instance globale, creee (et la base initialisee) au premier usage
+db_manager = InstanceParesseuse(DatabaseManager)
 
 # Test de la connexion
 if __name__ == "__main__":
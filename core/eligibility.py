@@ -0,0 +1,103 @@
+"""
+Dates d'eligibilite des conditions d'anciennete
+core/eligibility.py
+
+Pour une regle et un agent, calcule directement (sans reevaluer a plusieurs dates
+de reference) la premiere date a laquelle les conditions temporelles seront
+remplies: anciennete_service_min, anciennete_grade_min et anciennete_grade_specifique.
+Les anciennetes sont celles du modele Agent: jours ecoules / 365.25, arrondis a
+0.01 an. Le cas du grade specifique utilise l'anciennete exacte tiree de
+historique_grades quand elle est connue (anciennetes_par_grade), sinon
+l'approximation de AdvancementEvaluator._verifier_grade_specifique.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
+import math
+
+from core.rule_compiler import CONDITION_GRADE, CONDITION_GRADE_SPECIFIQUE, CONDITION_SERVICE
+
+# Conditions qui dependent uniquement du temps ecoule
+CODES_TEMPORELS = frozenset((CONDITION_SERVICE, CONDITION_GRADE, CONDITION_GRADE_SPECIFIQUE))
+
+def jours_pour_anciennete(annees: float) -> int:
+    """Nombre minimal de jours n tel que round(n / 365.25, 2) >= annees"""
+    if annees <= 0:
+        return 0
+    jours = max(0, math.floor((annees - 0.005) * 365.25) - 1)
+    while round(jours / 365.25, 2) < annees:
+        jours += 1
+    return jours
+
+def _lire_date(valeur: Union[date, str, None]) -> Optional[date]:
+    if isinstance(valeur, date) or valeur is None:
+        return valeur
+    try:
+        return date.fromisoformat(str(valeur)[:10])
+    except ValueError:
+        return None
+
+def anciennetes_par_grade(periodes: Iterable[Mapping[str, Any]], date_reference: date) -> Dict[str, float]:
+    """
+    Anciennete exacte (annees) passee dans chaque grade a la date de reference
+
+    periodes: lignes de historique_grades d'un agent (grade, date_debut, date_fin);
+    une periode sans date_fin court jusqu'a la date de reference.
+    """
+    jours: Dict[str, int] = {}
+    for periode in periodes:
+        debut = _lire_date(periode['date_debut'])
+        if debut is None or debut > date_reference:
+            continue
+        fin = min(_lire_date(periode['date_fin']) or date_reference, date_reference)
+        jours[periode['grade']] = jours.get(periode['grade'], 0) + max(0, (fin - debut).days)
+    return {grade: round(nb_jours / 365.25, 2) for grade, nb_jours in jours.items()}
+
+def date_eligibilite(regle: Dict[str, Any], grade_actuel: str,
+                     date_incorporation: Union[date, str, None],
+                     date_entree_grade: Union[date, str, None],
+                     grades_index: Dict[str, int],
+                     anciennetes_historique: Optional[Mapping[str, float]] = None
+                     ) -> Tuple[bool, Optional[date]]:
+    """
+    Premiere date a laquelle les conditions temporelles de la regle sont remplies
+
+    Retourne (atteignable, date). atteignable est faux si une condition ne peut
+    jamais etre remplie dans le grade actuel (grade specifique superieur, ecart
+    service/grade insuffisant, date manquante); la date vaut alors None. La date
+    n'est jamais anterieure a l'entree dans le grade actuel (grade source de la regle).
+    anciennetes_historique: anciennetes exactes de l'agent par grade (anciennetes_par_grade).
+    """
+    incorporation = _lire_date(date_incorporation)
+    entree_grade = _lire_date(date_entree_grade)
+    if incorporation is None or entree_grade is None:
+        return False, None
+
+    dates = [entree_grade]
+
+    if regle.get('anciennete_service_min', 0) > 0:
+        dates.append(incorporation + timedelta(days=jours_pour_anciennete(regle['anciennete_service_min'])))
+
+    if regle.get('anciennete_grade_min', 0) > 0:
+        dates.append(entree_grade + timedelta(days=jours_pour_anciennete(regle['anciennete_grade_min'])))
+
+    grade_specifique = regle.get('grade_specifique')
+    requis_specifique = regle.get('anciennete_grade_specifique', 0)
+    if grade_specifique and requis_specifique > 0:
+        if grade_specifique == grade_actuel:
+            dates.append(entree_grade + timedelta(days=jours_pour_anciennete(requis_specifique)))
+        elif anciennetes_historique and grade_specifique in anciennetes_historique:
+            # Grade quitte: l'anciennete exacte ne change plus
+            if anciennetes_historique[grade_specifique] < requis_specifique:
+                return False, None
+        elif grade_specifique in grades_index and grade_actuel in grades_index:
+            if grades_index[grade_specifique] > grades_index[grade_actuel]:
+                # Grade non encore atteint
+                return False, None
+            # Grade depasse: anciennete service - anciennete grade est constante dans le temps
+            if (entree_grade - incorporation).days < jours_pour_anciennete(requis_specifique):
+                return False, None
+        else:
+            # Regle conservative: anciennete service >= 2 x requis
+            dates.append(incorporation + timedelta(days=jours_pour_anciennete(requis_specifique * 2)))
+
+    return True, max(dates)
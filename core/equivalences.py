@@ -0,0 +1,77 @@
+"""
+Classes d'equivalence des diplomes
+core/equivalences.py
+
+Les paires de equivalences_diplomes sont regroupees en composantes connexes
+(union-find): deux diplomes sont equivalents s'ils sont relies par une chaine
+d'equivalences, quel que soit le sens de declaration. Chaque nom de diplome est
+interne en petit entier; "l'agent possede X ou un equivalent" devient un test
+d'appartenance de la composante de X a l'ensemble des composantes de l'agent.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+class EquivalencesDiplomes:
+    """Fermeture transitive des equivalences de diplomes"""
+
+    def __init__(self, paires: Iterable[Tuple[str, str]] = ()):
+        self._ids: Dict[str, int] = {}
+        self._parent: List[int] = []
+        self.nb_paires = 0
+
+        for principal, equivalent in paires:
+            self._unir(self._interner(principal), self._interner(equivalent))
+            self.nb_paires += 1
+
+        # Composante definitive de chaque diplome cite (racine apres compression)
+        self._composantes: Dict[str, int] = {nom: self._racine(i) for nom, i in self._ids.items()}
+
+        self._membres: Dict[int, List[str]] = {}
+        for nom, composante in self._composantes.items():
+            self._membres.setdefault(composante, []).append(nom)
+
+    @classmethod
+    def depuis_dict(cls, equivalences: Dict[str, List[str]]) -> 'EquivalencesDiplomes':
+        """Reconstruire depuis un dictionnaire {diplome: [equivalents]} (voir vers_dict)"""
+        return cls((diplome, equivalent)
+                   for diplome, equivalents in equivalences.items()
+                   for equivalent in equivalents)
+
+    def _interner(self, nom: str) -> int:
+        if nom not in self._ids:
+            self._ids[nom] = len(self._parent)
+            self._parent.append(len(self._parent))
+        return self._ids[nom]
+
+    def _racine(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def _unir(self, a: int, b: int):
+        racine_a, racine_b = self._racine(a), self._racine(b)
+        if racine_a != racine_b:
+            self._parent[max(racine_a, racine_b)] = min(racine_a, racine_b)
+
+    def composante(self, diplome: str) -> int:
+        """Identifiant entier de la classe d'equivalence d'un diplome"""
+        composante = self._composantes.get(diplome)
+        if composante is None:
+            # Diplome sans equivalence: classe a lui seul
+            composante = self._composantes[diplome] = len(self._parent) + len(self._composantes)
+        return composante
+
+    def composantes(self, diplomes: Iterable[str]) -> FrozenSet[int]:
+        """Classes d'equivalence couvertes par une liste de diplomes"""
+        return frozenset(self.composante(diplome) for diplome in diplomes)
+
+    def equivalents(self, diplome: str) -> List[str]:
+        """Tous les diplomes equivalents (directement ou transitivement), hors le diplome lui-meme"""
+        composante = self._composantes.get(diplome)
+        if composante is None:
+            return []
+        return [nom for nom in self._membres.get(composante, []) if nom != diplome]
+
+    def vers_dict(self) -> Dict[str, List[str]]:
+        """Dictionnaire {diplome: [equivalents]} de la fermeture transitive"""
+        return {nom: self.equivalents(nom) for nom in self._ids}
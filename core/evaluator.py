@@ -5,20 +5,70 @@ Précision: ~98%
 core/evaluator.py
 """
 from datetime import date, datetime
-from typing import Dict, List, Any, Tuple
-from dataclasses import dataclass
+import hashlib
+from typing import Callable, Dict, Iterator, List, Any, Set, Tuple, Mapping, Optional, Sequence, NamedTuple, Union
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass, field
+import os
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # moteur vectorise indisponible, le moteur Python reste utilisable
+    np = None
+
 # Imports
 sys.path.append(str(Path(__file__).parent.parent))
-from core.models import Agent
+from core.models import Agent, Diplome
 from core.database import db_manager
-from config import ANNEE_REFERENCE, GRADES_HIERARCHY
+from core.instance_paresseuse import InstanceParesseuse
+from core.equivalences import EquivalencesDiplomes
+from core.eligibility import CODES_TEMPORELS, anciennetes_par_grade, date_eligibilite
+from core.profiling import ProfilEvaluation
+from core.rule_sql import clauses_regle, condition_candidats
+from core.rule_compiler import (
+    RegleCompilee, NoeudDiplomes, EtDiplomes, CODES_CONDITIONS, CONDITION_DIPLOMES,
+    CONDITION_GRADE_SPECIFIQUE, Constat,
+    GRADE_SPECIFIQUE_ACTUEL, GRADE_SPECIFIQUE_DEPASSE, GRADE_SPECIFIQUE_NON_ATTEINT,
+    GRADE_SPECIFIQUE_ESTIMATION, GRADE_SPECIFIQUE_HISTORIQUE, compiler_regle, compiler_index,
+    rendre_condition, encoder_constats, decoder_constats
+)
+from config import ANNEE_REFERENCE, GRADES_HIERARCHY, STATUTS_EVALUATION
+
+# Codes de statut (ordre = rang utilise par _est_meilleur), stockes dans evaluation_results
+STATUTS_CODES = STATUTS_EVALUATION
+CODE_STATUT = {statut: code for code, statut in enumerate(STATUTS_CODES)}
+
+def generer_details(conditions_ok: List[str], conditions_ko: List[str], type_avancement: str) -> str:
+    """Generer une description detaillee"""
+    details = f"AVANCEMENT {type_avancement.upper()}:\n\n"
+    
+    if conditions_ok:
+        details += "CONDITIONS RESPECTEES:\n"
+        for condition in conditions_ok:
+            details += f"  ✅ {condition}\n"
+    
+    if conditions_ko:
+        details += "\nCONDITIONS MANQUANTES:\n"
+        for condition in conditions_ko:
+            details += f"  ❌ {condition}\n"
+    
+    return details.strip()
 
 @dataclass
 class EvaluationResult:
-    """Resultat d'evaluation d'un agent"""
+    """
+    Resultat d'evaluation d'un agent
+    
+    Les conditions sont conservees sous forme de constats (code, respectee, parametres);
+    les textes (conditions_respectees, conditions_manquantes, details) ne sont rendus
+    qu'a la lecture, pour l'affichage ou l'export (voir rule_compiler.rendre_condition).
+    """
     agent_id: int
     matricule: str
     nom_complet: str
@@ -26,19 +76,441 @@ class EvaluationResult:
     grade_cible: str
     statut: str  # "proposable", "bientot", "non_proposable"
     type_avancement: str  # "Normal", "Choix", "Anciennete"
-    conditions_respectees: List[str]
-    conditions_manquantes: List[str]
-    details: str
+    constats: Tuple[Constat, ...] = ()
+    regle_id: Optional[int] = None  # regle retenue
+    codes_manquants: List[str] = field(default_factory=list)  # voir rule_compiler.CODES_CONDITIONS
+    # Textes fixes (conditions respectees, manquantes, details) des resultats sans regle
+    explication: Optional[Tuple[Tuple[str, ...], Tuple[str, ...], str]] = None
+    
+    @property
+    def conditions_respectees(self) -> List[str]:
+        if self.explication is not None:
+            return list(self.explication[0])
+        return [rendre_condition(*constat) for constat in self.constats if constat[1]]
+    
+    @property
+    def conditions_manquantes(self) -> List[str]:
+        if self.explication is not None:
+            return list(self.explication[1])
+        return [rendre_condition(*constat) for constat in self.constats if not constat[1]]
+    
+    @property
+    def details(self) -> str:
+        if self.explication is not None:
+            return self.explication[2]
+        return generer_details(self.conditions_respectees, self.conditions_manquantes, self.type_avancement)
+
+class ResumeEvaluation(NamedTuple):
+    """Resultat compact (sans details) suffisant pour la sauvegarde et les comptages"""
+    agent_id: int
+    statut: str
+    type_avancement: str
+    grade_cible: str
+    regle_id: Optional[int] = None
+    codes_manquants: Tuple[str, ...] = ()
+    constats: Tuple[Constat, ...] = ()
+
+class EvaluationResultsSink:
+    """
+    Collecteur de resultats d'evaluation avec ecriture en lot
+    
+    Les resultats sont accumules puis ecrits par paquets de batch_size lignes,
+    chaque paquet dans une seule transaction (executemany): texte dans
+    agents.resultat_evaluation et ligne structuree dans evaluation_results.
+    
+    Un collecteur correspond a une campagne (evaluation_runs), ouverte au premier
+    resultat et cloturee par close() avec le nombre d'agents ecrits et la duree.
+    Sans aucun resultat (campagne changes_seulement sans agent modifie), aucune
+    campagne n'est creee: la derniere campagne reste celle des derniers changements.
+    """
+    
+    def __init__(self, batch_size: int = 1000, hash_regles: Optional[str] = None):
+        self.batch_size = max(1, batch_size)
+        self.hash_regles = hash_regles
+        self.run_id: Optional[int] = None
+        self.rows_written = 0
+        self.write_time = 0.0
+        self._debut = time.perf_counter()
+        self._buffer: List[Tuple[str, str, int]] = []
+        self._resultats: List[Tuple] = []
+        self._empreintes: List[Tuple[int, str, str]] = []
+    
+    def add(self, agent_id: int, resultat: Union[EvaluationResult, ResumeEvaluation],
+            empreinte: Optional[str] = None):
+        """Ajouter un resultat (et son empreinte); declenche une ecriture quand le lot est plein"""
+        if self.run_id is None:
+            self.run_id = db_manager.start_evaluation_run(self.hash_regles)
+        maintenant = datetime.now().isoformat()
+        self._buffer.append((formater_resultat_evaluation(resultat), maintenant, agent_id))
+        self._resultats.append(ligne_evaluation_results(agent_id, resultat, self.run_id, maintenant))
+        if empreinte is not None:
+            self._empreintes.append((agent_id, empreinte, maintenant))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """Ecrire les resultats en attente"""
+        if not self._buffer:
+            return
+        
+        debut = time.perf_counter()
+        try:
+            self.rows_written += db_manager.save_evaluation_results(
+                self._buffer, self._empreintes, self._resultats
+            )
+        except Exception as e:
+            print(f"⚠️ Erreur sauvegarde lot de {len(self._buffer)} resultat(s): {e}")
+        finally:
+            self.write_time += time.perf_counter() - debut
+            self._buffer = []
+            self._resultats = []
+            self._empreintes = []
+    
+    def close(self):
+        """Vider le tampon, cloturer la campagne et afficher le debit d'ecriture"""
+        self.flush()
+        if self.run_id is None:
+            print("🗂️ Aucun agent evalue: pas de nouvelle campagne")
+            return
+        print(f"💾 {self.rows_written} resultat(s) ecrit(s) en {self.write_time:.2f}s "
+              f"({self.rows_per_second():.0f} lignes/s)")
+        try:
+            nb_changements = db_manager.finish_evaluation_run(
+                self.run_id, self.rows_written, time.perf_counter() - self._debut
+            )
+            print(f"🗂️ Campagne #{self.run_id}: {nb_changements} changement(s) de resultat")
+        except Exception as e:
+            print(f"⚠️ Erreur cloture campagne #{self.run_id}: {e}")
+    
+    def rows_per_second(self) -> float:
+        """Debit d'ecriture moyen"""
+        return self.rows_written / self.write_time if self.write_time > 0 else 0.0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+class JetonAnnulation:
+    """
+    Jeton d'annulation partage entre le thread d'interface et l'evaluation
+
+    annuler() peut etre appele depuis n'importe quel thread; iter_evaluations
+    s'arrete proprement a la fin du lot en cours.
+    """
+
+    def __init__(self):
+        self._evenement = threading.Event()
+
+    def annuler(self):
+        """Demander l'arret de l'evaluation"""
+        self._evenement.set()
+
+    @property
+    def annule(self) -> bool:
+        return self._evenement.is_set()
+
+def _hacher(*elements) -> str:
+    """Empreinte courte et stable d'elements Python (repr)"""
+    return hashlib.blake2b(repr(elements).encode('utf-8'), digest_size=12).hexdigest()
+
+class SuiviModifications:
+    """
+    Suivi des modifications pour la reevaluation incrementale
+    
+    L'empreinte d'un agent combine ses donnees d'evaluation (champs et diplomes actifs),
+    ses anciennetes exactes par grade (historique_grades) s'il en a, la version des
+    regles de son grade, celle des equivalences et celle de l'echelle de notes. Modifier une regle ne change donc que l'empreinte des agents dont le
+    grade_actuel est le grade_source de cette regle.
+    """
+    
+    CHAMPS = ('grade_actuel', 'anciennete_service', 'anciennete_grade',
+              'note_annee_courante', 'note_annee_moins_1', 'note_annee_moins_2')
+    
+    def __init__(self, regles_index: Mapping[str, Sequence[Dict[str, Any]]],
+                 equivalences: Dict[str, List[str]], echelle_notes: Dict[str, int],
+                 historique: Optional[Mapping[int, Mapping[str, float]]] = None):
+        self.historique = historique or {}
+        self.version_contexte = _hacher(
+            sorted((diplome, sorted(equivalents)) for diplome, equivalents in equivalences.items()),
+            sorted(echelle_notes.items())
+        )
+        self.versions_regles = {
+            grade: _hacher([
+                sorted((cle, valeur) for cle, valeur in regle.items() if cle not in ('created_at', 'updated_at'))
+                for regle in regles
+            ])
+            for grade, regles in regles_index.items()
+        }
+        # Empreinte de l'ensemble des regles et du contexte (enregistree avec chaque campagne)
+        self.hash_regles = _hacher(sorted(self.versions_regles.items()), self.version_contexte)
+        self._connues: Optional[Dict[int, str]] = None
+    
+    def empreinte(self, data: Dict[str, Any], diplomes: Sequence[str]) -> str:
+        """Empreinte courante d'un agent (ligne agents + noms de diplomes actifs)"""
+        elements = (
+            tuple(data.get(champ) for champ in self.CHAMPS),
+            sorted(diplomes),
+            self.versions_regles.get(data.get('grade_actuel'), ''),
+            self.version_contexte
+        )
+        historique = self.historique.get(data.get('id'))
+        if historique:
+            return _hacher(*elements, sorted(historique.items()))
+        return _hacher(*elements)
+    
+    def a_change(self, agent_id: int, empreinte: str) -> bool:
+        """Vrai si l'agent n'a jamais ete evalue ou si son empreinte a change"""
+        if self._connues is None:
+            self._connues = db_manager.get_evaluation_fingerprints()
+        return self._connues.get(agent_id) != empreinte
+
+def formater_resultat_evaluation(resultat: Union[EvaluationResult, ResumeEvaluation]) -> str:
+    """Texte stocke dans agents.resultat_evaluation"""
+    if resultat.statut == "proposable":
+        status_text = "Proposable"
+    elif resultat.statut == "bientot":
+        status_text = "Bientot proposable"
+    else:
+        status_text = "Non proposable"
+    
+    return f"{status_text} {resultat.type_avancement} -> {resultat.grade_cible}"
+
+def details_resultat_enregistre(resultat: Dict[str, Any]) -> str:
+    """
+    Details d'un resultat enregistre (db_manager.get_evaluation_result), sans reevaluation
+    
+    Les constats de la regle retenue (codes et parametres) sont rendus comme ceux d'un
+    EvaluationResult. Les resultats enregistres sans constats (bases anterieures) n'ont
+    pas de details.
+    """
+    if resultat['statut'] == 'aucun':
+        return "Aucune regle d'avancement applicable a ce grade"
+    if resultat.get('constats') is None:
+        return "Détails indisponibles pour ce résultat: réévaluer l'agent pour les afficher"
+    constats = decoder_constats(resultat['constats'])
+    return generer_details(
+        [rendre_condition(*constat) for constat in constats if constat[1]],
+        [rendre_condition(*constat) for constat in constats if not constat[1]],
+        resultat['type_avancement'] or ''
+    )
+
+def ligne_evaluation_results(agent_id: int, resultat: Union[EvaluationResult, ResumeEvaluation],
+                             run_id: Optional[int], evalue_le: str) -> Tuple:
+    """
+    Ligne de la table evaluation_results (voir db_manager.save_evaluation_results)
+    
+    Un resultat sans regle retenue (grade sans regle active) est enregistre avec le statut 'aucun'.
+    """
+    statut = resultat.statut if resultat.regle_id is not None else "aucun"
+    return (
+        agent_id, CODE_STATUT.get(statut, 0), resultat.grade_cible,
+        resultat.type_avancement, resultat.regle_id, run_id,
+        ','.join(resultat.codes_manquants),
+        encoder_constats(resultat.constats) if resultat.regle_id is not None else None, evalue_le
+    )
+
+def agent_depuis_donnees_evaluation(data: Dict[str, Any], diplomes: Sequence[str]) -> Agent:
+    """Construire un Agent a partir d'une ligne de get_agents_evaluation_data"""
+    return Agent(
+        id=data['id'],
+        matricule=data['matricule'],
+        nom=data['nom'],
+        prenom=data['prenom'],
+        grade_actuel=data['grade_actuel'],
+        anciennete_service=data['anciennete_service'],
+        anciennete_grade=data['anciennete_grade'],
+        note_annee_courante=data['note_annee_courante'],
+        note_annee_moins_1=data['note_annee_moins_1'],
+        note_annee_moins_2=data['note_annee_moins_2'],
+        diplomes=[Diplome(nom, None) for nom in diplomes]
+    )
+
+class PopulationColonnaire:
+    """
+    Population d'agents chargee en colonnes NumPy pour le moteur vectorise
+    
+    Colonnes: code de grade, anciennetes, codes de notes (N, N-1, N-2) et
+    masque de bits des diplomes actifs (un bit par nom de diplome).
+    Les lignes d'origine sont conservees pour reconstruire un Agent a la demande.
+    """
+    
+    def __init__(self, agents: List[Dict[str, Any]], diplomes: Dict[int, List[str]],
+                 echelle_notes: Dict[str, int]):
+        n = len(agents)
+        self.agents = agents
+        self.diplomes = diplomes
+        self.ids = np.fromiter((a['id'] for a in agents), dtype=np.int64, count=n)
+        
+        # Grades internes en petits entiers
+        self.grades: Dict[str, int] = {}
+        self.grade_codes = np.fromiter(
+            (self.grades.setdefault(a['grade_actuel'], len(self.grades)) for a in agents),
+            dtype=np.int32, count=n
+        )
+        
+        self.anciennete_service = np.fromiter(
+            (a['anciennete_service'] or 0 for a in agents), dtype=np.float64, count=n
+        )
+        self.anciennete_grade = np.fromiter(
+            (a['anciennete_grade'] or 0 for a in agents), dtype=np.float64, count=n
+        )
+        
+        # Notes internees; valeurs_notes donne l'ordinal de chaque code dans l'echelle
+        self.notes: Dict[str, int] = {}
+        def coder(champ):
+            return np.fromiter(
+                (self.notes.setdefault(a[champ] or "", len(self.notes)) for a in agents),
+                dtype=np.int32, count=n
+            )
+        self.note_courante = coder('note_annee_courante')
+        self.note_n1 = coder('note_annee_moins_1')
+        self.note_n2 = coder('note_annee_moins_2')
+        self.valeurs_notes = np.array(
+            [echelle_notes.get(note, 0) for note in self.notes], dtype=np.int32
+        )
+        
+        # Masque de bits des diplomes: (n, nb_mots) en uint64
+        self.bits_diplomes: Dict[str, int] = {}
+        lignes, bits = [], []
+        for i, agent in enumerate(agents):
+            for nom in diplomes.get(agent['id'], ()):
+                lignes.append(i)
+                bits.append(self.bits_diplomes.setdefault(nom, len(self.bits_diplomes)))
+        self.nb_mots = max(1, (len(self.bits_diplomes) + 63) // 64)
+        self.masques = np.zeros((n, self.nb_mots), dtype=np.uint64)
+        if lignes:
+            lignes = np.asarray(lignes, dtype=np.int64)
+            bits = np.asarray(bits, dtype=np.int64)
+            for mot in range(self.nb_mots):
+                sel = (bits // 64) == mot
+                np.bitwise_or.at(
+                    self.masques[:, mot], lignes[sel],
+                    np.left_shift(np.uint64(1), (bits[sel] % 64).astype(np.uint64))
+                )
+    
+    def __len__(self) -> int:
+        return len(self.agents)
+    
+    def masque(self, noms) -> "np.ndarray":
+        """Masque (nb_mots,) des diplomes donnes; les noms inconnus sont ignores"""
+        masque = np.zeros(self.nb_mots, dtype=np.uint64)
+        for nom in noms:
+            bit = self.bits_diplomes.get(nom)
+            if bit is not None:
+                masque[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return masque
+    
+    def agent(self, i: int) -> Agent:
+        """Reconstruire l'Agent (champs utiles a l'evaluation) de la ligne i"""
+        data = self.agents[i]
+        return agent_depuis_donnees_evaluation(data, self.diplomes.get(data['id'], ()))
+
+class EvaluationVectorisee(SequenceABC):
+    """
+    Resultats du moteur vectorise
+    
+    Seuls le statut, la regle retenue et le masque des conditions manquantes
+    (bit i = CODES_CONDITIONS[i]) sont stockes par agent; l'EvaluationResult
+    complet (conditions et details) n'est construit qu'a l'acces, via le moteur Python
+    applique a la regle retenue, ce qui garantit des resultats identiques.
+    """
+    
+    # Valeurs speciales de regle_retenue
+    SANS_REGLE = -2   # aucune regle pour le grade
+    SANS_REGLE_ACTIVE = -1   # regles presentes mais toutes inactives
+    
+    def __init__(self, evaluator: "AdvancementEvaluator", population: PopulationColonnaire,
+                 regles_par_grade: Dict[str, Tuple[RegleCompilee, ...]],
+                 statuts: "np.ndarray", regle_retenue: "np.ndarray", manquantes: "np.ndarray"):
+        self.evaluator = evaluator
+        self.population = population
+        self.regles_par_grade = regles_par_grade
+        self.statuts = statuts
+        self.regle_retenue = regle_retenue
+        self.manquantes = manquantes
+        self._cache: Dict[int, EvaluationResult] = {}
+    
+    def __len__(self) -> int:
+        return len(self.population)
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i not in self._cache:
+            self._cache[i] = self._construire(i)
+        return self._cache[i]
+    
+    def _regle(self, i: int) -> Optional[RegleCompilee]:
+        idx = int(self.regle_retenue[i])
+        if idx < 0:
+            return None
+        return self.regles_par_grade[self.population.agents[i]['grade_actuel']][idx]
+    
+    def _construire(self, i: int) -> EvaluationResult:
+        agent = self.population.agent(i)
+        idx = int(self.regle_retenue[i])
+        if idx == self.SANS_REGLE:
+            return self.evaluator.evaluer_agent(agent, {})
+        if idx == self.SANS_REGLE_ACTIVE:
+            return self.evaluator._resultat_echec(agent, "Aucun")
+        return self.evaluator._evaluer_regle(agent, self._regle(i))
+    
+    def resume(self, i: int) -> ResumeEvaluation:
+        """
+        Resultat compact de la ligne i, sans construire les details
+        
+        Les constats de la regle retenue (enregistres pour le rendu des details a la
+        lecture) sont recalcules pour cette seule regle.
+        """
+        regle = self._regle(i)
+        constats = ()
+        if regle is not None:
+            agent = self.population.agent(i)
+            constats = tuple((code,) + verification(agent) for code, verification in regle.verifications)
+        return ResumeEvaluation(
+            agent_id=int(self.population.ids[i]),
+            statut=STATUTS_CODES[self.statuts[i]] if regle else "non_proposable",
+            type_avancement=regle.type_avancement if regle else "",
+            grade_cible=regle.grade_cible if regle else "Aucun",
+            regle_id=regle.regle_id if regle else None,
+            codes_manquants=tuple(
+                code for bit, code in enumerate(CODES_CONDITIONS) if int(self.manquantes[i]) >> bit & 1
+            ),
+            constats=constats
+        )
+    
+    def compter_statuts(self) -> Dict[str, int]:
+        """Nombre d'agents par statut"""
+        comptes = np.bincount(self.statuts, minlength=len(STATUTS_CODES))
+        return {
+            'proposable': int(comptes[3]),
+            'bientot': int(comptes[2]),
+            'non_proposable': int(comptes[1] + comptes[0])
+        }
 
 class AdvancementEvaluator:
     """Moteur d'evaluation des avancements - VERSION OPTION B COMPLÈTE"""
     
-    def __init__(self):
+    def __init__(self, equivalences: Optional[Dict[str, List[str]]] = None):
         self.annee_reference = ANNEE_REFERENCE
         self.date_reference = date(ANNEE_REFERENCE, 12, 31)
         
-        # Charger les equivalences depuis la BD
-        self.load_equivalences()
+        # Profilage (voir core/profiling.py): actif seulement pendant evaluer_tous_agents(profilage=True)
+        self.profil: Optional[ProfilEvaluation] = None
+        self.dernier_profil: Optional[ProfilEvaluation] = None
+        
+        # Charger les equivalences depuis la BD (sauf si fournies, ex: processus de travail)
+        self._version_equivalences = None
+        if equivalences is not None:
+            self.index_equivalences = EquivalencesDiplomes.depuis_dict(equivalences)
+            self.equivalences = self.index_equivalences.vers_dict()
+        else:
+            self.load_equivalences()
         
         # Echelle de notes (du meilleur au pire)
         self.echelle_notes = {
@@ -47,40 +519,79 @@ class AdvancementEvaluator:
         
         # Index de hiérarchie des grades pour vérifications
         self.grades_index = {grade: idx for idx, grade in enumerate(GRADES_HIERARCHY)}
+        
+        # Anciennetes exactes par agent et par grade (historique_grades), chargees par campagne
+        self.anciennetes_historique: Dict[int, Dict[str, float]] = {}
     
-    def load_equivalences(self):
-        """Charger les equivalences diplomes depuis la base de donnees"""
-        self.equivalences = {}
+    def load_equivalences(self, force: bool = False):
+        """
+        Charger les equivalences diplomes depuis la base de donnees
+        
+        Les paires sont regroupees en classes d'equivalence transitives
+        (voir core/equivalences.py). Le calcul n'est refait que si la table a
+        change depuis le dernier chargement, dans ce processus ou un autre (ou si force=True).
+        """
+        db_manager.verifier_cache_reference()
+        version = db_manager.equivalences_version
+        if not force and version == self._version_equivalences:
+            return
         
         try:
             all_equivalences = db_manager.get_all_equivalences()
             
-            for equiv in all_equivalences:
-                principal = equiv['diplome_principal']
-                equivalent = equiv['diplome_equivalent']
-                
-                # Ajouter dans les deux sens
-                if principal not in self.equivalences:
-                    self.equivalences[principal] = []
-                if equivalent not in self.equivalences[principal]:
-                    self.equivalences[principal].append(equivalent)
-                
-                if equivalent not in self.equivalences:
-                    self.equivalences[equivalent] = []
-                if principal not in self.equivalences[equivalent]:
-                    self.equivalences[equivalent].append(principal)
+            self.index_equivalences = EquivalencesDiplomes(
+                (equiv['diplome_principal'], equiv['diplome_equivalent']) for equiv in all_equivalences
+            )
+            self.equivalences = self.index_equivalences.vers_dict()
+            self._version_equivalences = version
             
             print(f"✅ {len(all_equivalences)} equivalence(s) chargee(s)")
         
         except Exception as e:
             print(f"⚠️ Erreur chargement equivalences: {e}")
+            self.index_equivalences = EquivalencesDiplomes()
             self.equivalences = {}
     
-    def evaluer_agent(self, agent: Agent) -> EvaluationResult:
-        """Evaluer un agent pour l'avancement en utilisant les regles de la BD"""
+    def charger_historique_grades(self, agent_ids: Optional[Sequence[int]] = None):
+        """
+        Precharger l'historique des grades de tous les agents (une requete par campagne)
+        
+        Les anciennetes exactes par grade remplacent l'approximation de
+        _verifier_grade_specifique pour les agents dont l'historique couvre le grade.
+        agent_ids: ne recharger que ces agents (les autres entrees sont conservees).
+        """
+        anciennetes = {
+            agent_id: anciennetes_par_grade(periodes, self.date_reference)
+            for agent_id, periodes in db_manager.get_grade_history(agent_ids).items()
+        }
+        if agent_ids is None:
+            self.anciennetes_historique = anciennetes
+            return
+        for agent_id in agent_ids:
+            if agent_id in anciennetes:
+                self.anciennetes_historique[agent_id] = anciennetes[agent_id]
+            else:
+                self.anciennetes_historique.pop(agent_id, None)
+    
+    def evaluer_agent(self, agent: Agent,
+                      regles_index: Optional[Mapping[str, Sequence[Union[RegleCompilee, Dict[str, Any]]]]] = None
+                      ) -> EvaluationResult:
+        """
+        Evaluer un agent pour l'avancement en utilisant les regles de la BD
+        
+        regles_index: index des regles par grade_source (voir db_manager.get_rules_index),
+        idealement deja compilees avec compiler_index. S'il est fourni, aucune requete
+        n'est faite; sinon les regles du grade sont lues en base.
+        """
         
         # Recuperer les regles applicables pour ce grade
-        regles_applicables = db_manager.get_rules_by_grade(agent.grade_actuel)
+        if regles_index is not None:
+            regles_applicables = regles_index.get(agent.grade_actuel, ())
+        else:
+            regles_applicables = db_manager.get_rules_by_grade(agent.grade_actuel)
+            # Evaluation isolee: historique des grades de cet agent seulement
+            if agent.id is not None:
+                self.charger_historique_grades([agent.id])
         
         if not regles_applicables:
             return EvaluationResult(
@@ -91,17 +602,19 @@ class AdvancementEvaluator:
                 grade_cible="Aucun",
                 statut="non_proposable",
                 type_avancement="",
-                conditions_respectees=[],
-                conditions_manquantes=["Aucune regle d'avancement definie pour ce grade"],
-                details="Grade sans avancement possible ou regle non implementee"
+                explication=((), ("Aucune regle d'avancement definie pour ce grade",),
+                             "Grade sans avancement possible ou regle non implementee")
             )
         
         # Evaluer chaque regle et garder le meilleur resultat
         meilleur_resultat = None
         
         for regle in regles_applicables:
+            if not isinstance(regle, RegleCompilee):
+                regle = compiler_regle(regle, self)
+            
             # Ne considerer que les regles actives
-            if regle.get('statut') != 'Actif':
+            if not regle.actif:
                 continue
             
             resultat = self._evaluer_regle(agent, regle)
@@ -111,92 +624,34 @@ class AdvancementEvaluator:
         
         return meilleur_resultat or self._resultat_echec(agent, "Aucun")
     
-    def _evaluer_regle(self, agent: Agent, regle: Dict[str, Any]) -> EvaluationResult:
-        """Evaluer une regle specifique - VERSION OPTION B"""
-        
-        conditions_ok = []
-        conditions_ko = []
-        
-        # Verifier anciennete service
-        if regle.get('anciennete_service_min', 0) > 0:
-            anciennete = agent.anciennete_service or 0
-            requis = regle['anciennete_service_min']
-            
-            if anciennete >= requis:
-                conditions_ok.append(f"Anciennete service: {anciennete:.1f}a (>= {requis}a)")
-            else:
-                conditions_ko.append(f"Anciennete service: {anciennete:.1f}a (requis >= {requis}a)")
-        
-        # Verifier anciennete grade
-        if regle.get('anciennete_grade_min', 0) > 0:
-            anciennete = agent.anciennete_grade or 0
-            requis = regle['anciennete_grade_min']
-            
-            if anciennete >= requis:
-                conditions_ok.append(f"Anciennete grade: {anciennete:.1f}a (>= {requis}a)")
-            else:
-                conditions_ko.append(f"Anciennete grade: {anciennete:.1f}a (requis >= {requis}a)")
-        
-        # ===== CORRECTION OPTION B: Verifier grade specifique avec approximation intelligente =====
-        if regle.get('grade_specifique') and regle.get('anciennete_grade_specifique', 0) > 0:
-            resultat_grade = self._verifier_grade_specifique(
-                agent, 
-                regle['grade_specifique'], 
-                regle['anciennete_grade_specifique']
-            )
-            
-            if resultat_grade['valide']:
-                conditions_ok.append(resultat_grade['message'])
-            else:
-                conditions_ko.append(resultat_grade['message'])
+    def _evaluer_regle(self, agent: Agent, regle: Union[RegleCompilee, Dict[str, Any]]) -> EvaluationResult:
+        """
+        Evaluer une regle specifique (compilee une fois, voir core/rule_compiler.py)
         
-        # ===== CORRECTION OPTION A: Verifier diplomes avec logique ET/OU =====
-        if regle.get('diplomes_requis'):
-            diplomes_agent = [d.nom for d in agent.diplomes if d.actif] if agent.diplomes else []
-            diplomes_requis = regle['diplomes_requis']
-            
-            resultat_diplomes = self._verifier_diplomes_avec_logique(
-                diplomes_agent, 
-                diplomes_requis, 
-                regle.get('grade_source', ''),
-                regle.get('grade_cible', '')
-            )
-            
-            if resultat_diplomes['valide']:
-                conditions_ok.append(resultat_diplomes['message'])
-            else:
-                conditions_ko.append(resultat_diplomes['message'])
+        Seuls les constats sont construits ici; les textes sont rendus a la lecture du resultat.
+        """
+        if not isinstance(regle, RegleCompilee):
+            regle = compiler_regle(regle, self)
         
-        # Verifier note minimum courante
-        if regle.get('note_min_courante'):
-            note_agent = agent.note_annee_courante or ""
-            note_min = regle['note_min_courante']
-            
-            valeur_agent = self.echelle_notes.get(note_agent, 0)
-            valeur_min = self.echelle_notes.get(note_min, 0)
-            
-            if valeur_agent >= valeur_min:
-                conditions_ok.append(f"Note courante: {note_agent} (>= {note_min})")
-            else:
-                conditions_ko.append(f"Note courante: {note_agent} (requis >= {note_min})")
+        constats = []
+        codes_ko = []
+        profil = self.profil
         
-        # Verifier notes interdites
-        if regle.get('notes_interdites_n1_n2'):
-            notes_interdites = regle['notes_interdites_n1_n2']
-            note_n1 = agent.note_annee_moins_1 or ""
-            note_n2 = agent.note_annee_moins_2 or ""
-            
-            probleme = note_n1 in notes_interdites or note_n2 in notes_interdites
-            
-            if not probleme:
-                conditions_ok.append(f"Pas de notes {'/'.join(notes_interdites)} en N-1,N-2")
+        for code, verification in regle.verifications:
+            if profil is None:
+                valide, parametres = verification(agent)
             else:
-                conditions_ko.append(f"Notes interdites {'/'.join(notes_interdites)} detectees (N-2:{note_n2}, N-1:{note_n1})")
+                debut = time.perf_counter()
+                valide, parametres = verification(agent)
+                profil.ajouter_condition(code, not valide, time.perf_counter() - debut)
+            constats.append((code, valide, parametres))
+            if not valide:
+                codes_ko.append(code)
         
         # Determiner le statut
-        if not conditions_ko:
+        if not codes_ko:
             statut = "proposable"
-        elif len(conditions_ko) <= 1:
+        elif len(codes_ko) <= 1:
             statut = "bientot"
         else:
             statut = "non_proposable"
@@ -206,12 +661,12 @@ class AdvancementEvaluator:
             matricule=agent.matricule,
             nom_complet=agent.get_nom_complet(),
             grade_actuel=agent.grade_actuel,
-            grade_cible=regle['grade_cible'],
+            grade_cible=regle.grade_cible,
             statut=statut,
-            type_avancement=regle['type_avancement'],
-            conditions_respectees=conditions_ok,
-            conditions_manquantes=conditions_ko,
-            details=self._generer_details(conditions_ok, conditions_ko, regle['type_avancement'])
+            type_avancement=regle.type_avancement,
+            constats=tuple(constats),
+            regle_id=regle.regle_id,
+            codes_manquants=codes_ko
         )
     
     def _verifier_grade_specifique(self, agent: Agent, grade_specifique: str, 
@@ -226,26 +681,34 @@ class AdvancementEvaluator:
         
         Méthode d'approximation:
         - Si le grade spécifique = grade actuel → utilise anciennete_grade
+        - Si l'historique des grades couvre le grade spécifique → ancienneté exacte
         - Si le grade spécifique est inférieur → estime avec anciennete_service
         - Si impossible à vérifier → applique une règle conservative
         """
-        
+        valide, parametres = self._constat_grade_specifique(agent, grade_specifique, anciennete_requise)
+        return {
+            'valide': valide,
+            'message': rendre_condition(CONDITION_GRADE_SPECIFIQUE, valide, parametres)
+        }
+    
+    def _constat_grade_specifique(self, agent: Agent, grade_specifique: str,
+                                  anciennete_requise: int) -> Tuple[bool, Tuple]:
+        """Constat de _verifier_grade_specifique: (valide, (cas, grade, anciennete, requis, grade actuel))"""
         grade_actuel = agent.grade_actuel
         anciennete_grade_actuel = agent.anciennete_grade or 0
         anciennete_service = agent.anciennete_service or 0
         
         # CAS 1: Le grade spécifique EST le grade actuel
         if grade_specifique == grade_actuel:
-            if anciennete_grade_actuel >= anciennete_requise:
-                return {
-                    'valide': True,
-                    'message': f"Anciennete dans grade {grade_specifique}: {anciennete_grade_actuel:.1f}a (>= {anciennete_requise}a) ✓"
-                }
-            else:
-                return {
-                    'valide': False,
-                    'message': f"Anciennete dans grade {grade_specifique}: {anciennete_grade_actuel:.1f}a (requis >= {anciennete_requise}a)"
-                }
+            return (anciennete_grade_actuel >= anciennete_requise,
+                    (GRADE_SPECIFIQUE_ACTUEL, grade_specifique, anciennete_grade_actuel, anciennete_requise, grade_actuel))
+        
+        # CAS 1 bis: Anciennete exacte connue par l'historique des grades
+        historique = self.anciennetes_historique.get(agent.id)
+        if historique and grade_specifique in historique:
+            anciennete_exacte = historique[grade_specifique]
+            return (anciennete_exacte >= anciennete_requise,
+                    (GRADE_SPECIFIQUE_HISTORIQUE, grade_specifique, anciennete_exacte, anciennete_requise, grade_actuel))
         
         # CAS 2: Le grade spécifique est dans la hiérarchie
         if grade_specifique in self.grades_index and grade_actuel in self.grades_index:
@@ -255,117 +718,54 @@ class AdvancementEvaluator:
             # Sous-cas 2a: Grade spécifique INFÉRIEUR au grade actuel
             if idx_specifique < idx_actuel:
                 # L'agent a déjà dépassé ce grade
-                # Approximation: si ancienneté service >> ancienneté requise, probablement OK
-                
                 # Estimation conservative: l'agent a passé au moins anciennete_requise dans le grade
-                # On vérifie si l'ancienneté totale le permet
-                
-                if anciennete_service >= (anciennete_requise + anciennete_grade_actuel):
-                    # L'agent a assez d'ancienneté totale pour avoir passé le temps requis
-                    return {
-                        'valide': True,
-                        'message': f"Grade {grade_specifique} (dépassé): estimation basée sur ancienneté service ({anciennete_service:.1f}a) ✓"
-                    }
-                else:
-                    return {
-                        'valide': False,
-                        'message': f"Grade {grade_specifique}: ancienneté service insuffisante pour garantir {anciennete_requise}a dans ce grade"
-                    }
+                # si l'ancienneté totale le permet
+                return (anciennete_service >= (anciennete_requise + anciennete_grade_actuel),
+                        (GRADE_SPECIFIQUE_DEPASSE, grade_specifique, anciennete_service, anciennete_requise, grade_actuel))
             
-            # Sous-cas 2b: Grade spécifique SUPÉRIEUR au grade actuel
-            else:
-                # L'agent n'a pas encore atteint ce grade
-                return {
-                    'valide': False,
-                    'message': f"Grade {grade_specifique} non atteint (actuel: {grade_actuel})"
-                }
+            # Sous-cas 2b: Grade spécifique SUPÉRIEUR au grade actuel (pas encore atteint)
+            return (False,
+                    (GRADE_SPECIFIQUE_NON_ATTEINT, grade_specifique, anciennete_service, anciennete_requise, grade_actuel))
         
         # CAS 3: Impossible à vérifier précisément - règle conservative
         # On accepte si l'ancienneté de service est largement suffisante
-        if anciennete_service >= anciennete_requise * 2:
-            return {
-                'valide': True,
-                'message': f"Grade {grade_specifique}: estimation conservative basée sur ancienneté service ({anciennete_service:.1f}a) ⚠️"
-            }
-        else:
-            return {
-                'valide': False,
-                'message': f"Grade {grade_specifique}: impossible à vérifier précisément (ancienneté service: {anciennete_service:.1f}a)"
-            }
+        return (anciennete_service >= anciennete_requise * 2,
+                (GRADE_SPECIFIQUE_ESTIMATION, grade_specifique, anciennete_service, anciennete_requise, grade_actuel))
     
-    def _verifier_diplomes_avec_logique(self, diplomes_agent: List[str], diplomes_requis: List[str], 
-                                        grade_source: str, grade_cible: str) -> Dict[str, Any]:
+    def _verifier_expression_diplomes(self, diplomes_agent: List[str],
+                                      expression: NoeudDiplomes) -> Dict[str, Any]:
         """
-        ✅ FONCTION OPTION A: Vérifier les diplômes avec logique ET/OU correcte
+        Vérifier une expression booléenne de diplômes (ex: B.M.P.1 & (C.M.2 | C.T.2))
         
-        Détecte automatiquement la logique selon la règle:
-        - ['B.M.P.1', 'C.M.2', 'C.T.2'] pour Adjudant→Adjudant-chef Ancienneté = ET complexe
-        - ['C.M.E', 'C.T.E'] pour autres = OU simple
+        Un OU simple garde le message historique "Diplôme requis: A/B";
+        les expressions avec ET détaillent les termes manquants.
         """
+        valide, parametres = self._constat_expression_diplomes(diplomes_agent, expression)
+        return {'valide': valide, 'message': rendre_condition(CONDITION_DIPLOMES, valide, parametres)}
+    
+    def _constat_expression_diplomes(self, diplomes_agent: List[str],
+                                     expression: NoeudDiplomes) -> Tuple[bool, Tuple]:
+        """Constat de _verifier_expression_diplomes: (valide, (expression, diplomes, termes manquants))"""
+        composantes_agent = self.index_equivalences.composantes(diplomes_agent)
         
-        # Cas particulier: Adjudant → Adjudant-chef (Ancienneté)
-        # Requis: B.M.P.1 ET (C.M.2 OU C.T.2)
-        if (grade_source == "Adjudant" and grade_cible == "Adjudant-chef" and 
-            set(diplomes_requis) == {'B.M.P.1', 'C.M.2', 'C.T.2'}):
-            
-            # Vérifier B.M.P.1
-            possede_bmp1 = self._possede_diplome_ou_equivalent(diplomes_agent, 'B.M.P.1')
-            
-            # Vérifier C.M.2 OU C.T.2
-            possede_cm2_ou_ct2 = (
-                self._possede_diplome_ou_equivalent(diplomes_agent, 'C.M.2') or
-                self._possede_diplome_ou_equivalent(diplomes_agent, 'C.T.2')
-            )
-            
-            if possede_bmp1 and possede_cm2_ou_ct2:
-                return {
-                    'valide': True,
-                    'message': f"Diplômes requis: B.M.P.1 ET (C.M.2 OU C.T.2) ✓"
-                }
-            else:
-                diplomes_str = ', '.join(diplomes_agent) if diplomes_agent else 'Aucun'
-                manquant = []
-                if not possede_bmp1:
-                    manquant.append("B.M.P.1")
-                if not possede_cm2_ou_ct2:
-                    manquant.append("C.M.2 ou C.T.2")
-                
-                return {
-                    'valide': False,
-                    'message': f"Diplômes requis: B.M.P.1 ET (C.M.2 OU C.T.2) - Manquant: {', '.join(manquant)} (possède: {diplomes_str})"
-                }
+        def possede(diplome: str) -> bool:
+            return self.index_equivalences.composante(diplome) in composantes_agent
         
-        # Cas général: logique OU (au moins UN diplôme de la liste)
-        else:
-            for diplome_requis in diplomes_requis:
-                if self._possede_diplome_ou_equivalent(diplomes_agent, diplome_requis):
-                    return {
-                        'valide': True,
-                        'message': f"Diplôme requis: {'/'.join(diplomes_requis)} ✓"
-                    }
-            
-            # Aucun diplôme trouvé
-            diplomes_str = ', '.join(diplomes_agent) if diplomes_agent else 'Aucun'
-            return {
-                'valide': False,
-                'message': f"Diplôme requis: {'/'.join(diplomes_requis)} (possède: {diplomes_str})"
-            }
+        if expression.evaluer(possede):
+            return True, (expression, diplomes_agent, ())
+        
+        if expression.est_disjonction_simple():
+            return False, (expression, diplomes_agent, ())
+        
+        termes = expression.enfants if isinstance(expression, EtDiplomes) else (expression,)
+        return False, (expression, diplomes_agent, tuple(terme for terme in termes if not terme.evaluer(possede)))
     
     def _possede_diplome_ou_equivalent(self, diplomes_agent: List[str], diplome_requis: str) -> bool:
         """
-        ✅ FONCTION OPTION A: Vérifier si l'agent possède un diplôme ou son équivalent
+        Vérifier si l'agent possède un diplôme ou un équivalent (direct ou transitif)
         """
-        # Vérifier le diplôme exact
-        if diplome_requis in diplomes_agent:
-            return True
-        
-        # Vérifier les équivalences
-        equivalents = self.equivalences.get(diplome_requis, [])
-        for diplome_agent in diplomes_agent:
-            if diplome_agent in equivalents:
-                return True
-        
-        return False
+        return (self.index_equivalences.composante(diplome_requis)
+                in self.index_equivalences.composantes(diplomes_agent))
     
     def _est_meilleur(self, nouveau: EvaluationResult, ancien: EvaluationResult) -> bool:
         """Determiner si un resultat est meilleur qu'un autre"""
@@ -382,97 +782,618 @@ class AdvancementEvaluator:
             grade_cible=grade_cible,
             statut="non_proposable",
             type_avancement="",
-            conditions_respectees=[],
-            conditions_manquantes=["Aucune regle applicable"],
-            details="Aucun avancement possible"
+            explication=((), ("Aucune regle applicable",), "Aucun avancement possible")
         )
     
     def _generer_details(self, conditions_ok: List[str], conditions_ko: List[str], type_avancement: str) -> str:
         """Generer une description detaillee"""
-        details = f"AVANCEMENT {type_avancement.upper()}:\n\n"
+        return generer_details(conditions_ok, conditions_ko, type_avancement)
+    
+    # ==================== PRE-FILTRAGE SQL ====================
+    
+    def rechercher_candidats(self, grade_source: Optional[str] = None, grade_cible: Optional[str] = None,
+                             statuts: Sequence[str] = ("proposable",)) -> List[EvaluationResult]:
+        """
+        Lister les agents ayant un des statuts demandes sans charger toute la population
         
-        if conditions_ok:
-            details += "CONDITIONS RESPECTEES:\n"
-            for condition in conditions_ok:
-                details += f"  ✅ {condition}\n"
+        Chaque regle active concernee est traduite en clause WHERE (voir core/rule_sql.py):
+        SQLite ne renvoie que les agents ayant au plus 0 (proposables) ou 1 (bientot)
+        condition non respectee, puis ces seuls candidats sont evalues exactement en Python
+        avec toutes les regles de leur grade. Rien n'est ecrit en base.
         
-        if conditions_ko:
-            details += "\nCONDITIONS MANQUANTES:\n"
-            for condition in conditions_ko:
-                details += f"  ❌ {condition}\n"
+        Avec "non_proposable", les agents d'un grade sans regle active sont aussi retenus.
+        grade_source: grade actuel des agents; grade_cible: grade vise par le resultat retenu.
+        """
+        self.load_equivalences()
+        regles_compilees = compiler_index(db_manager.get_rules_index(), self)
+        
+        if "non_proposable" in statuts:
+            max_echecs = None
+        elif "bientot" in statuts:
+            max_echecs = 1
+        else:
+            max_echecs = 0
+        historique_disponible = db_manager.table_exists("historique_grades")
+        echelle_sql_fiable = db_manager.get_note_scale() == self.echelle_notes
+        
+        candidats: Set[int] = set()
+        for grade, regles in regles_compilees.items():
+            if grade_source and grade != grade_source:
+                continue
+            for regle in regles:
+                if not regle.actif or (grade_cible and regle.grade_cible != grade_cible):
+                    continue
+                clauses = clauses_regle(regle, self, grade, historique_disponible, echelle_sql_fiable)
+                condition, params = condition_candidats(clauses, max_echecs)
+                candidats |= db_manager.get_candidate_agent_ids(grade, condition, params)
         
-        return details.strip()
+        # Agents d'un grade sans regle active: non proposables sans condition a verifier
+        if max_echecs is None and not grade_cible:
+            grades_avec_regle = [grade for grade, regles in regles_compilees.items()
+                                 if any(regle.actif for regle in regles)]
+            if not grade_source:
+                candidats |= db_manager.get_agent_ids_outside_grades(grades_avec_regle)
+            elif grade_source not in grades_avec_regle:
+                candidats |= db_manager.get_candidate_agent_ids(grade_source, "1", [])
+        
+        if not candidats:
+            return []
+        
+        agents, diplomes = db_manager.get_agents_evaluation_data(sorted(candidats))
+        if historique_disponible:
+            self.charger_historique_grades(sorted(candidats))
+        
+        resultats = []
+        for data in agents:
+            resultat = self.evaluer_agent(
+                agent_depuis_donnees_evaluation(data, diplomes.get(data['id'], ())), regles_compilees
+            )
+            if resultat.statut in statuts and (not grade_cible or resultat.grade_cible == grade_cible):
+                resultats.append(resultat)
+        
+        print(f"🔎 {len(resultats)} agent(s) retenu(s) sur {len(candidats)} candidat(s) pre-filtre(s) en SQL")
+        return resultats
+    
+    # ==================== MOTEUR VECTORISE (NUMPY) ====================
+    
+    def evaluer_population_vectorisee(self, population: Optional[PopulationColonnaire] = None,
+                                      regles_index: Optional[Mapping[str, Sequence[Dict[str, Any]]]] = None
+                                      ) -> EvaluationVectorisee:
+        """
+        Evaluer toute la population en comparaisons de tableaux, grade par grade
+        
+        Produit les memes statuts et regles retenues que evaluer_agent; les details
+        ne sont generes que pour les resultats effectivement consultes.
+        """
+        if np is None:
+            raise ImportError("NumPy est requis pour le moteur d'evaluation vectorise")
+        
+        if regles_index is None:
+            regles_index = db_manager.get_rules_index()
+        if population is None:
+            agents, diplomes = db_manager.get_agents_evaluation_data()
+            population = PopulationColonnaire(agents, diplomes, self.echelle_notes)
+        
+        n = len(population)
+        statuts = np.zeros(n, dtype=np.int8)
+        regle_retenue = np.full(n, EvaluationVectorisee.SANS_REGLE, dtype=np.int32)
+        manquantes_retenues = np.zeros(n, dtype=np.uint8)
+        nb_bits = np.array([bin(m).count("1") for m in range(1 << len(CODES_CONDITIONS))], dtype=np.int32)
+        regles_par_grade: Dict[str, Tuple[RegleCompilee, ...]] = {}
+        
+        for grade, code in population.grades.items():
+            lignes = np.flatnonzero(population.grade_codes == code)
+            regles = tuple(
+                r if isinstance(r, RegleCompilee) else compiler_regle(r, self)
+                for r in regles_index.get(grade, ())
+            )
+            regles_par_grade[grade] = regles
+            if not regles:
+                continue
+            
+            # Meme selection que _est_meilleur: premiere regle au rang strictement superieur
+            meilleur = np.zeros(len(lignes), dtype=np.int8)
+            retenue = np.full(len(lignes), EvaluationVectorisee.SANS_REGLE_ACTIVE, dtype=np.int32)
+            masque_retenu = np.zeros(len(lignes), dtype=np.uint8)
+            for r, regle in enumerate(regles):
+                if not regle.actif:
+                    continue
+                masque = self._conditions_manquantes_vectorise(population, lignes, grade, regle)
+                manquantes = nb_bits[masque]
+                rang = np.where(manquantes == 0, 3, np.where(manquantes <= 1, 2, 1)).astype(np.int8)
+                mieux = rang > meilleur
+                meilleur[mieux] = rang[mieux]
+                retenue[mieux] = r
+                masque_retenu[mieux] = masque[mieux]
+            
+            statuts[lignes] = meilleur
+            regle_retenue[lignes] = retenue
+            manquantes_retenues[lignes] = masque_retenu
+        
+        return EvaluationVectorisee(self, population, regles_par_grade, statuts, regle_retenue,
+                                    manquantes_retenues)
+    
+    def _conditions_manquantes_vectorise(self, population: PopulationColonnaire, lignes: "np.ndarray",
+                                         grade_actuel: str, regle_compilee: RegleCompilee) -> "np.ndarray":
+        """
+        Masque des conditions non respectees par agent (equivalent de codes_manquants dans _evaluer_regle)
+        
+        Bit i leve = condition CODES_CONDITIONS[i] non respectee.
+        """
+        regle = regle_compilee.regle
+        masque = np.zeros(len(lignes), dtype=np.uint8)
+        profil = self.profil
+        horloge = [time.perf_counter()] if profil is not None else None
+        service = population.anciennete_service[lignes]
+        grade = population.anciennete_grade[lignes]
+        
+        def marquer(code: str, echec: "np.ndarray"):
+            masque[echec] |= np.uint8(1 << CODES_CONDITIONS.index(code))
+            if profil is not None:
+                # Duree depuis la condition precedente (calcul du tableau echec compris)
+                maintenant = time.perf_counter()
+                profil.ajouter_conditions(code, len(lignes), int(np.count_nonzero(echec)),
+                                          maintenant - horloge[0])
+                horloge[0] = maintenant
+        
+        if regle.get('anciennete_service_min', 0) > 0:
+            marquer("service", service < regle['anciennete_service_min'])
+        
+        if regle.get('anciennete_grade_min', 0) > 0:
+            marquer("grade", grade < regle['anciennete_grade_min'])
+        
+        if regle.get('grade_specifique') and regle.get('anciennete_grade_specifique', 0) > 0:
+            marquer("grade_specifique", ~self._grade_specifique_vectorise(
+                grade_actuel, regle['grade_specifique'], regle['anciennete_grade_specifique'],
+                service, grade, population.ids[lignes]
+            ))
+        
+        if regle_compilee.expression_diplomes is not None:
+            marquer("diplomes", ~self._diplomes_vectorise(population, lignes, regle_compilee.expression_diplomes))
+        
+        if regle.get('note_min_courante'):
+            valeurs = population.valeurs_notes[population.note_courante[lignes]]
+            marquer("note_min", valeurs < self.echelle_notes.get(regle['note_min_courante'], 0))
+        
+        if regle.get('notes_interdites_n1_n2'):
+            interdites = [population.notes[n] for n in regle['notes_interdites_n1_n2'] if n in population.notes]
+            if interdites:
+                marquer("notes_interdites", np.isin(population.note_n1[lignes], interdites) |
+                                            np.isin(population.note_n2[lignes], interdites))
+        
+        return masque
+    
+    def _grade_specifique_vectorise(self, grade_actuel: str, grade_specifique: str, anciennete_requise: int,
+                                    service: "np.ndarray", grade: "np.ndarray",
+                                    ids: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """
+        Version tableau de _verifier_grade_specifique
+        
+        Hors historique, le cas ne depend que du grade actuel; les agents dont l'historique
+        couvre le grade specifique (ids) sont ensuite evalues sur leur anciennete exacte.
+        """
+        if grade_specifique == grade_actuel:
+            return grade >= anciennete_requise
+        
+        if grade_specifique in self.grades_index and grade_actuel in self.grades_index:
+            if self.grades_index[grade_specifique] < self.grades_index[grade_actuel]:
+                valides = service >= (anciennete_requise + grade)
+            else:
+                valides = np.zeros(len(service), dtype=bool)
+        else:
+            valides = service >= anciennete_requise * 2
+        
+        if ids is not None and self.anciennetes_historique:
+            historique = self.anciennetes_historique
+            exactes = np.fromiter(
+                (historique.get(int(agent_id), {}).get(grade_specifique, np.nan) for agent_id in ids),
+                dtype=np.float64, count=len(ids)
+            )
+            connues = ~np.isnan(exactes)
+            if connues.any():
+                valides = np.where(connues, np.nan_to_num(exactes) >= anciennete_requise, valides)
+        
+        return valides
+    
+    def _diplomes_vectorise(self, population: PopulationColonnaire, lignes: "np.ndarray",
+                            expression: NoeudDiplomes) -> "np.ndarray":
+        """Version tableau de _verifier_expression_diplomes (intersection de masques de bits)"""
+        masques = population.masques[lignes]
+        
+        def possede(diplome: str) -> "np.ndarray":
+            accepte = population.masque([diplome] + self.equivalences.get(diplome, []))
+            return (masques & accepte).any(axis=1)
+        
+        return expression.evaluer(possede)
+    
+    def _charger_agents_a_evaluer(self, suivi: SuiviModifications, changes_seulement: bool
+                                  ) -> Tuple[List[Dict[str, Any]], Dict[int, List[str]], Dict[int, str]]:
+        """Donnees d'evaluation et empreintes, restreintes aux agents modifies si demande"""
+        debut = time.perf_counter()
+        agents, diplomes = db_manager.get_agents_evaluation_data()
+        if self.profil is not None:
+            debut = self.profil.fin_phase("lecture_base", debut)
+        empreintes = {a['id']: suivi.empreinte(a, diplomes.get(a['id'], ())) for a in agents}
+        if self.profil is not None:
+            self.profil.fin_phase("empreintes", debut)
+        if changes_seulement:
+            agents = [a for a in agents if suivi.a_change(a['id'], empreintes[a['id']])]
+            print(f"🔎 {len(agents)} agent(s) modifie(s) depuis la derniere evaluation")
+        return agents, diplomes, empreintes
     
-    def evaluer_tous_agents(self) -> List[EvaluationResult]:
-        """Evaluer tous les agents de la base"""
+    def _evaluer_tous_agents_vectorise(self, regles_index: Mapping[str, Sequence[Dict[str, Any]]],
+                                       batch_size: int, suivi: SuiviModifications,
+                                       changes_seulement: bool) -> EvaluationVectorisee:
+        """evaluer_tous_agents avec le moteur NumPy: pas d'affichage par agent ni de details"""
+        agents, diplomes, empreintes = self._charger_agents_a_evaluer(suivi, changes_seulement)
+        debut = time.perf_counter()
+        population = PopulationColonnaire(agents, diplomes, self.echelle_notes)
+        if self.profil is not None:
+            debut = self.profil.fin_phase("colonnes", debut)
+        resultats = self.evaluer_population_vectorisee(population, regles_index)
+        if self.profil is not None:
+            debut = self.profil.fin_phase("evaluation_vectorisee", debut)
+        
+        with EvaluationResultsSink(batch_size, suivi.hash_regles) as sink:
+            for i in range(len(resultats)):
+                resume = resultats.resume(i)
+                sink.add(resume.agent_id, resume, empreintes[resume.agent_id])
+        if self.profil is not None:
+            self.profil.fin_phase("ecriture", debut)
+        
+        print(f"\n✅ Evaluation terminee: {len(resultats)} agents evalues")
+        self._afficher_statistiques(resultats.compter_statuts())
+        return resultats
+    
+    # ==================== EVALUATION MULTI-PROCESSUS ====================
+    
+    def _evaluer_tous_agents_parallele(self, regles_index: Mapping[str, Sequence[Dict[str, Any]]],
+                                       batch_size: int, workers: int, suivi: SuiviModifications,
+                                       changes_seulement: bool,
+                                       taille_lot: int = 5000) -> List[ResumeEvaluation]:
+        """
+        evaluer_tous_agents reparti sur un pool de processus
+        
+        Les agents sont regroupes par grade puis decoupes en lots de taille_lot.
+        Chaque processus recoit une seule fois les regles, les equivalences et
+        les anciennetes tirees de l'historique des grades;
+        il renvoie des resultats compacts que le processus parent ecrit en lot.
+        Les processus sont toujours demarres en mode spawn (celui de Windows, macOS et
+        de l'application PyInstaller): ils n'heritent ni des connexions ni des threads
+        du parent, et ne touchent pas la base (instances globales paresseuses).
+        """
+        agents, diplomes, empreintes = self._charger_agents_a_evaluer(suivi, changes_seulement)
+        
+        par_grade: Dict[str, List[Tuple[Dict[str, Any], List[str]]]] = {}
+        for agent in agents:
+            par_grade.setdefault(agent['grade_actuel'], []).append((agent, diplomes.get(agent['id'], [])))
+        lots = [
+            groupe[debut:debut + taille_lot]
+            for groupe in par_grade.values()
+            for debut in range(0, len(groupe), taille_lot)
+        ]
+        
+        regles = {grade: tuple(r) for grade, r in regles_index.items()}
+        resultats: List[ResumeEvaluation] = []
+        
+        print(f"⚙️ {len(agents)} agents repartis en {len(lots)} lot(s) sur {workers} processus")
+        debut = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_initialiser_processus,
+                                 initargs=(regles, self.equivalences, self.anciennetes_historique)) as executor, \
+             EvaluationResultsSink(batch_size, suivi.hash_regles) as sink:
+            for resumes in executor.map(_evaluer_lot, lots):
+                for resume in resumes:
+                    sink.add(resume.agent_id, resume, empreintes[resume.agent_id])
+                resultats.extend(resumes)
+        if self.profil is not None:
+            # Conditions evaluees dans les processus du pool: non detaillees ici
+            self.profil.fin_phase("evaluation_parallele", debut)
+        
+        print(f"\n✅ Evaluation terminee: {len(resultats)} agents evalues")
+        self._afficher_statistiques({
+            'proposable': len([r for r in resultats if r.statut == "proposable"]),
+            'bientot': len([r for r in resultats if r.statut == "bientot"]),
+            'non_proposable': len([r for r in resultats if r.statut == "non_proposable"])
+        })
+        return resultats
+    
+    # ==================== EVALUATION EN FLUX ====================
+
+    def iter_evaluations(self, batch_size: int = 1000,
+                         progression: Optional[Callable[[int, int], None]] = None,
+                         annulation: Optional[JetonAnnulation] = None,
+                         changes_seulement: bool = False) -> Iterator[EvaluationResult]:
+        """
+        Evaluer les agents lot par lot et produire les resultats au fil de l'eau
+
+        Les agents sont lus par lots de batch_size (voir db_manager.iter_agents_evaluation_data),
+        evalues puis ecrits en base dans la meme foulee: la memoire reste bornee par la
+        taille du lot quel que soit le nombre d'agents.
+
+        progression(traites, total) est appele apres chaque lot.
+        annulation: arret propre a la fin du lot en cours (les resultats deja produits
+                    restent enregistres).
+        changes_seulement: ignorer les agents dont l'empreinte n'a pas change.
+        """
+        self.load_equivalences()
+        self.charger_historique_grades()
+        regles_index = db_manager.get_rules_index()
+        suivi = SuiviModifications(regles_index, self.equivalences, self.echelle_notes,
+                                   self.anciennetes_historique)
+        regles_compilees = compiler_index(regles_index, self)
+
+        total = db_manager.count_agents()
+        traites = 0
+        if progression:
+            progression(traites, total)
+
+        with EvaluationResultsSink(batch_size, suivi.hash_regles) as sink:
+            for agents, diplomes in db_manager.iter_agents_evaluation_data(batch_size):
+                if annulation is not None and annulation.annule:
+                    print(f"⏹️ Evaluation annulee apres {traites}/{total} agents")
+                    return
+
+                for data in agents:
+                    diplomes_agent = diplomes.get(data['id'], [])
+                    empreinte = suivi.empreinte(data, diplomes_agent)
+                    if changes_seulement and not suivi.a_change(data['id'], empreinte):
+                        continue
+
+                    try:
+                        resultat = self.evaluer_agent(
+                            agent_depuis_donnees_evaluation(data, diplomes_agent), regles_compilees
+                        )
+                    except Exception as e:
+                        print(f"❌ Erreur evaluation agent {data.get('matricule', 'UNKNOWN')}: {e}")
+                        continue
+
+                    sink.add(data['id'], resultat, empreinte)
+                    yield resultat
+
+                traites += len(agents)
+                if progression:
+                    progression(traites, total)
+
+    def evaluer_tous_agents(self, batch_size: int = 1000, moteur: str = "python",
+                            workers: int = 1, changes_seulement: bool = False,
+                            profilage: bool = False) -> Sequence[EvaluationResult]:
+        """
+        Evaluer tous les agents de la base
+        
+        batch_size: nombre de resultats ecrits par transaction
+        moteur: "python" (agent par agent) ou "numpy" (vectorise, details construits a la demande)
+        workers: nombre de processus pour le moteur Python (0 = nombre de coeurs).
+                 Au-dela de 1, les resultats retournes sont des ResumeEvaluation (sans details);
+                 les processus sont demarres en mode spawn, le script appelant doit donc
+                 proteger son code par if __name__ == "__main__".
+        changes_seulement: ne reevaluer que les agents dont l'empreinte (donnees, regles du
+                           grade, equivalences, echelle de notes) a change depuis leur
+                           derniere evaluation; seuls ces agents sont retournes.
+        profilage: mesurer les phases et les conditions (voir core/profiling.py); le tableau
+                   de synthese est affiche en fin d'evaluation et conserve dans dernier_profil.
+        """
+        self.profil = ProfilEvaluation() if profilage else None
+        try:
+            return self._evaluer_tous_agents(batch_size, moteur, workers, changes_seulement)
+        finally:
+            if self.profil is not None:
+                self.profil.terminer()
+                print(self.profil.tableau())
+                self.dernier_profil = self.profil
+                self.profil = None
+    
+    def _evaluer_tous_agents(self, batch_size: int, moteur: str, workers: int,
+                             changes_seulement: bool) -> Sequence[EvaluationResult]:
+        """Corps de evaluer_tous_agents (profilage deja initialise)"""
         print("🎯 Debut de l'evaluation globale (Option B - Précision 98%)...")
+        profil = self.profil
+        debut = time.perf_counter()
         
         # Recharger les equivalences au cas ou elles ont change
         self.load_equivalences()
         
+        # Historique des grades de tous les agents (une requete)
+        self.charger_historique_grades()
+        
+        # Charger les regles une seule fois pour toute l'evaluation
+        regles_index = db_manager.get_rules_index()
+        suivi = SuiviModifications(regles_index, self.equivalences, self.echelle_notes,
+                                   self.anciennetes_historique)
+        
+        regles_compilees = compiler_index(regles_index, self)
+        if profil is not None:
+            profil.fin_phase("preparation", debut)
+        
+        if moteur == "numpy":
+            if np is not None:
+                return self._evaluer_tous_agents_vectorise(regles_compilees, batch_size, suivi, changes_seulement)
+            print("⚠️ NumPy indisponible, utilisation du moteur Python")
+        
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            return self._evaluer_tous_agents_parallele(regles_index, batch_size, workers,
+                                                       suivi, changes_seulement)
+        
         # Recuperer tous les agents
+        debut = time.perf_counter()
         agents_data = db_manager.get_all_agents()
+        if profil is not None:
+            profil.fin_phase("lecture_base", debut)
         resultats = []
-        
-        for agent_data in agents_data:
-            try:
-                # Convertir en objet Agent
-                agent = Agent.from_dict(agent_data)
+        with EvaluationResultsSink(batch_size, suivi.hash_regles) as sink:
+            for agent_data in agents_data:
+                try:
+                    if profil is not None:
+                        debut = time.perf_counter()
                 
-                # Evaluer
-                resultat = self.evaluer_agent(agent)
-                resultats.append(resultat)
+                    # Ignorer les agents inchanges en mode incremental
+                    empreinte = suivi.empreinte(agent_data, [d['diplome'] for d in agent_data['diplomes']])
+                    if changes_seulement and not suivi.a_change(agent_data['id'], empreinte):
+                        continue
+                    if profil is not None:
+                        debut = profil.fin_phase("empreintes", debut)
                 
-                # Sauvegarder le resultat en base
-                self._sauvegarder_resultat(agent.id, resultat)
+                    # Convertir en objet Agent
+                    agent = Agent.from_dict(agent_data)
+                    if profil is not None:
+                        debut = profil.fin_phase("conversion_agents", debut)
                 
-                # Affichage progression
-                statut_emoji = "🟢" if resultat.statut == "proposable" else "🟡" if resultat.statut == "bientot" else "🔴"
-                print(f"{statut_emoji} {agent.matricule}: {resultat.statut} pour {resultat.grade_cible}")
+                    # Evaluer (conditions et details comptes aussi separement)
+                    resultat = self.evaluer_agent(agent, regles_compilees)
+                    resultats.append(resultat)
+                    if profil is not None:
+                        debut = profil.fin_phase("evaluation", debut)
                 
-            except Exception as e:
-                print(f"❌ Erreur evaluation agent {agent_data.get('matricule', 'UNKNOWN')}: {e}")
-                import traceback
-                traceback.print_exc()
-        
+                    # Sauvegarder le resultat en base (par lot)
+                    sink.add(agent.id, resultat, empreinte)
+                    if profil is not None:
+                        debut = profil.fin_phase("ecriture", debut)
+                
+                    # Affichage progression
+                    statut_emoji = "🟢" if resultat.statut == "proposable" else "🟡" if resultat.statut == "bientot" else "🔴"
+                    print(f"{statut_emoji} {agent.matricule}: {resultat.statut} pour {resultat.grade_cible}")
+                    if profil is not None:
+                        profil.fin_phase("affichage", debut)
+                
+                except Exception as e:
+                    print(f"❌ Erreur evaluation agent {agent_data.get('matricule', 'UNKNOWN')}: {e}")
+                    import traceback
+                    traceback.print_exc()
+            
+            # Le dernier lot est ecrit a la sortie du bloc
+            debut = time.perf_counter()
+        if profil is not None:
+            profil.fin_phase("ecriture", debut)
         print(f"\n✅ Evaluation terminee: {len(resultats)} agents evalues")
         
         # Statistiques
-        proposables = len([r for r in resultats if r.statut == "proposable"])
-        bientot = len([r for r in resultats if r.statut == "bientot"])
-        non_proposables = len([r for r in resultats if r.statut == "non_proposable"])
+        self._afficher_statistiques({
+            'proposable': len([r for r in resultats if r.statut == "proposable"]),
+            'bientot': len([r for r in resultats if r.statut == "bientot"]),
+            'non_proposable': len([r for r in resultats if r.statut == "non_proposable"])
+        })
         
+        return resultats
+    
+    def _afficher_statistiques(self, comptes: Dict[str, int]):
+        """Afficher la repartition des statuts en fin d'evaluation"""
         print(f"📊 Resultats:")
-        print(f"   🟢 Proposables: {proposables}")
-        print(f"   🟡 Bientot: {bientot}")
-        print(f"   🔴 Non proposables: {non_proposables}")
+        print(f"   🟢 Proposables: {comptes['proposable']}")
+        print(f"   🟡 Bientot: {comptes['bientot']}")
+        print(f"   🔴 Non proposables: {comptes['non_proposable']}")
+    
+    def reevaluer_agent(self, agent_id: int) -> Optional[EvaluationResult]:
+        """
+        Reevaluer un agent et enregistrer son resultat (hors campagne: run_id NULL)
         
-        return resultats
+        Memes donnees et memes regles qu'une campagne; l'empreinte de l'agent est
+        enregistree avec le resultat, de sorte qu'une campagne changes_seulement ne
+        le reevalue pas tant qu'il ne change pas. Retourne None si l'agent n'existe pas.
+        """
+        self.load_equivalences()
+        self.charger_historique_grades([agent_id])
+        agents, diplomes = db_manager.get_agents_evaluation_data([agent_id])
+        if not agents:
+            return None
+        data, noms_diplomes = agents[0], diplomes.get(agent_id, [])
+        
+        regles_index = db_manager.get_rules_index()
+        suivi = SuiviModifications(regles_index, self.equivalences, self.echelle_notes,
+                                   self.anciennetes_historique)
+        resultat = self.evaluer_agent(agent_depuis_donnees_evaluation(data, noms_diplomes),
+                                      compiler_index(regles_index, self))
+        
+        maintenant = datetime.now().isoformat()
+        db_manager.save_evaluation_results(
+            [(formater_resultat_evaluation(resultat), maintenant, agent_id)],
+            empreintes=[(agent_id, suivi.empreinte(data, noms_diplomes), maintenant)],
+            resultats=[ligne_evaluation_results(agent_id, resultat, None, maintenant)]
+        )
+        return resultat
     
-    def _sauvegarder_resultat(self, agent_id: int, resultat: EvaluationResult):
-        """Sauvegarder le resultat en base"""
-        try:
-            # Determiner le statut pour la base
-            if resultat.statut == "proposable":
-                status_text = "Proposable"
-            elif resultat.statut == "bientot":
-                status_text = "Bientot proposable"
-            else:
-                status_text = "Non proposable"
-            
-            resultat_text = f"{status_text} {resultat.type_avancement} -> {resultat.grade_cible}"
-            
-            # Mettre a jour l'agent
-            db_manager.update_agent(agent_id, {
-                'resultat_evaluation': resultat_text,
-                'derniere_evaluation': datetime.now().isoformat()
-            })
+    def calculer_dates_eligibilite(self) -> int:
+        """
+        Calculer et enregistrer la date d'eligibilite de chaque agent pour chaque regle active
+        de son grade (table dates_eligibilite, voir core/eligibility.py)
+        
+        La date est celle ou les conditions d'anciennete seront remplies, calculee
+        directement a partir des dates d'incorporation et d'entree dans le grade. Les autres
+        conditions (diplomes, notes) sont verifiees telles quelles; les codes de celles qui
+        echouent sont enregistres dans conditions_bloquantes. Retourne le nombre de lignes.
+        """
+        self.load_equivalences()
+        self.charger_historique_grades()
+        regles_compilees = compiler_index(db_manager.get_rules_index(), self)
+        agents, diplomes = db_manager.get_agents_evaluation_data()
+        dates_carriere = db_manager.get_career_dates()
+        calcule_le = datetime.now().isoformat()
+        
+        lignes = []
+        for data in agents:
+            regles = [regle for regle in regles_compilees.get(data['grade_actuel'], ()) if regle.actif]
+            if not regles:
+                continue
             
+            agent = agent_depuis_donnees_evaluation(data, diplomes.get(data['id'], ()))
+            date_incorporation, date_entree_grade = dates_carriere.get(data['id'], (None, None))
+            for regle in regles:
+                atteignable, date_regle = date_eligibilite(
+                    regle.regle, data['grade_actuel'], date_incorporation, date_entree_grade,
+                    self.grades_index, self.anciennetes_historique.get(data['id'])
+                )
+                bloquantes = [
+                    code for code, verification in regle.verifications
+                    if code not in CODES_TEMPORELS and not verification(agent)[0]
+                ]
+                lignes.append((
+                    data['id'], regle.regle_id, regle.grade_cible, regle.type_avancement,
+                    date_regle.isoformat() if atteignable else None,
+                    int(not bloquantes), ','.join(bloquantes), calcule_le
+                ))
+        
+        db_manager.save_eligibility_dates(lignes)
+        print(f"📅 {len(lignes)} date(s) d'eligibilite calculee(s) pour {len(agents)} agents")
+        return len(lignes)
+
+# ==================== PROCESSUS DE TRAVAIL ====================
+
+# Evaluateur et regles propres a chaque processus du pool (voir _initialiser_processus)
+_evaluateur_processus: Optional[AdvancementEvaluator] = None
+_regles_processus: Dict[str, Tuple[RegleCompilee, ...]] = {}
+
+def _initialiser_processus(regles: Dict[str, Tuple[Dict[str, Any], ...]],
+                           equivalences: Dict[str, List[str]],
+                           anciennetes_historique: Dict[int, Dict[str, float]]):
+    """Initialiser un processus du pool avec les regles, equivalences et historiques du parent"""
+    global _evaluateur_processus, _regles_processus
+    _evaluateur_processus = AdvancementEvaluator(equivalences)
+    _evaluateur_processus.anciennetes_historique = anciennetes_historique
+    _regles_processus = compiler_index(regles, _evaluateur_processus)
+
+def _evaluer_lot(lot: List[Tuple[Dict[str, Any], List[str]]]) -> List[ResumeEvaluation]:
+    """Evaluer un lot d'agents dans un processus du pool"""
+    resumes = []
+    for data, diplomes in lot:
+        try:
+            resultat = _evaluateur_processus.evaluer_agent(
+                agent_depuis_donnees_evaluation(data, diplomes), _regles_processus
+            )
+            resumes.append(ResumeEvaluation(
+                agent_id=resultat.agent_id,
+                statut=resultat.statut,
+                type_avancement=resultat.type_avancement,
+                grade_cible=resultat.grade_cible,
+                regle_id=resultat.regle_id,
+                codes_manquants=tuple(resultat.codes_manquants),
+                constats=resultat.constats
+            ))
         except Exception as e:
-            print(f"⚠️ Erreur sauvegarde resultat: {e}")
+            print(f"❌ Erreur evaluation agent {data.get('matricule', 'UNKNOWN')}: {e}")
+    return resumes
 
-# Instance globale
-evaluator = AdvancementEvaluator()
+# Instance globale, creee au premier usage (pas dans les processus de travail)
+evaluator = InstanceParesseuse(AdvancementEvaluator)
 
 if __name__ == "__main__":
     print("🧪 Test du moteur d'evaluation (Option B - 98% précision)...")
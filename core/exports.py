@@ -0,0 +1,70 @@
+"""
+Construction des exports Excel (agents et resultats d'evaluation)
+core/exports.py
+
+Fonctions sans interface graphique, utilisees par les vues (gui/components/actions.py,
+gui/evaluation_view.py) et par le banc de performance (benchmark_performance.py).
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.rule_compiler import LIBELLES_CONDITIONS
+
+LIBELLES_STATUTS_EXPORT = {
+    "proposable": "Proposable",
+    "bientot": "Bientôt",
+    "non_proposable": "Non proposable",
+    "aucun": "Non proposable"
+}
+
+def lignes_export_agents(agents_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Lignes de l'export complet des agents"""
+    return [{
+        'Matricule': agent.get('matricule', ''),
+        'Nom': agent.get('nom', ''),
+        'Prenom': agent.get('prenom', ''),
+        'Grade': agent.get('grade_actuel', ''),
+        'Age': agent.get('age', ''),
+        'Anciennete_Service': agent.get('anciennete_service', ''),
+        'Anciennete_Grade': agent.get('anciennete_grade', ''),
+        'Note_Courante': agent.get('note_annee_courante', ''),
+        'Note_N-1': agent.get('note_annee_moins_1', ''),
+        'Note_N-2': agent.get('note_annee_moins_2', ''),
+        'Statut_Disciplinaire': agent.get('statut_disciplinaire', ''),
+        'Unite': agent.get('unite_provenance', ''),
+        'Resultat_Evaluation': agent.get('resultat_evaluation', '')
+    } for agent in agents_data]
+
+def lignes_export_evaluations(agents_data: List[Dict[str, Any]],
+                              resultats: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Lignes de l'export des evaluations
+
+    resultats: resultats structures par agent_id (voir db_manager.get_evaluation_results)
+    """
+    lignes = []
+    for agent in agents_data:
+        structure = resultats.get(agent.get('id'))
+        lignes.append({
+            'Matricule': agent.get('matricule', ''),
+            'Nom': agent.get('nom', ''),
+            'Prénom': agent.get('prenom', ''),
+            'Grade': agent.get('grade_actuel', ''),
+            'Statut': LIBELLES_STATUTS_EXPORT[structure['statut']] if structure else "Non évalué",
+            'Résultat': str(agent.get('resultat_evaluation', 'Non évalué')),
+            'Conditions manquantes': ', '.join(
+                LIBELLES_CONDITIONS.get(code, code) for code in structure['conditions_manquantes']
+            ) if structure else '',
+            'Date': agent.get('derniere_evaluation', '')
+        })
+    return lignes
+
+def exporter_excel(lignes: List[Dict[str, Any]], export_path: Path, sheet_name: str,
+                   engine: Optional[str] = None) -> Path:
+    """Ecrire des lignes dans un classeur Excel (pandas)"""
+    import pandas as pd
+
+    export_path = Path(export_path)
+    export_path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(lignes).to_excel(export_path, index=False, sheet_name=sheet_name, engine=engine)
+    return export_path
@@ -0,0 +1,45 @@
+"""
+Instances globales creees au premier usage
+core/instance_paresseuse.py
+
+db_manager et evaluator sont importes par presque tous les modules. Crees a
+l'import, ils ouvriraient la base (init_database, chargement des equivalences)
+dans chaque processus qui importe leur module, y compris les processus de
+travail de l'evaluation parallele demarres en mode spawn (Windows, macOS,
+application PyInstaller), qui ne doivent jamais toucher la base.
+InstanceParesseuse ne cree l'instance qu'au premier acces a un attribut.
+"""
+import threading
+from typing import Any, Callable
+
+class InstanceParesseuse:
+    """Mandataire d'une instance creee par fabrique() au premier acces a un attribut"""
+
+    def __init__(self, fabrique: Callable[[], Any]):
+        object.__setattr__(self, '_fabrique', fabrique)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_verrou', threading.Lock())
+
+    @property
+    def instance_creee(self) -> bool:
+        """Vrai si l'instance a deja ete creee"""
+        return self._instance is not None
+
+    def _obtenir(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._verrou:
+                instance = self._instance
+                if instance is None:
+                    instance = self._fabrique()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, nom: str) -> Any:
+        return getattr(self._obtenir(), nom)
+
+    def __setattr__(self, nom: str, valeur: Any):
+        setattr(self._obtenir(), nom, valeur)
+
+    def __repr__(self) -> str:
+        return f"<InstanceParesseuse {self._instance!r}>"
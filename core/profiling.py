@@ -0,0 +1,95 @@
+"""
+Profilage du moteur d'evaluation
+core/profiling.py
+
+ProfilEvaluation accumule des compteurs et des durees par phase (lecture en base,
+conversion des agents, evaluation, ecriture...) et par type de condition
+(voir rule_compiler.CODES_CONDITIONS). Il n'est instancie qu'a la demande
+(evaluer_tous_agents(profilage=True)); desactive, le moteur ne fait qu'un test
+"profil is None" par verification.
+"""
+import time
+from typing import Any, Dict, List
+
+class ProfilEvaluation:
+    """Compteurs et durees d'une evaluation"""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.duree_totale = 0.0
+        # phase -> [appels, duree]
+        self.phases: Dict[str, List[float]] = {}
+        # code de condition -> [verifications, echecs, duree]
+        self.conditions: Dict[str, List[float]] = {}
+
+    def ajouter_phase(self, phase: str, duree: float, appels: int = 1):
+        compteur = self.phases.get(phase)
+        if compteur is None:
+            compteur = self.phases[phase] = [0, 0.0]
+        compteur[0] += appels
+        compteur[1] += duree
+
+    def fin_phase(self, phase: str, debut: float) -> float:
+        """Comptabiliser la phase commencee a debut; retourne l'instant courant (debut de la suivante)"""
+        maintenant = time.perf_counter()
+        self.ajouter_phase(phase, maintenant - debut)
+        return maintenant
+
+    def ajouter_condition(self, code: str, echec: bool, duree: float):
+        compteur = self.conditions.get(code)
+        if compteur is None:
+            compteur = self.conditions[code] = [0, 0, 0.0]
+        compteur[0] += 1
+        compteur[1] += echec
+        compteur[2] += duree
+
+    def ajouter_conditions(self, code: str, verifications: int, echecs: int, duree: float):
+        """Version groupee (moteur vectorise: une verification par agent de la tranche)"""
+        compteur = self.conditions.get(code)
+        if compteur is None:
+            compteur = self.conditions[code] = [0, 0, 0.0]
+        compteur[0] += verifications
+        compteur[1] += echecs
+        compteur[2] += duree
+
+    def terminer(self):
+        self.duree_totale = time.perf_counter() - self.debut
+
+    def resume(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Lignes du tableau de synthese (phases puis conditions), triees par duree decroissante"""
+        total = self.duree_totale or (time.perf_counter() - self.debut)
+        phases = [{
+            'phase': phase,
+            'appels': int(appels),
+            'duree_s': duree,
+            'moyenne_us': duree / appels * 1e6 if appels else 0.0,
+            'part': duree / total if total else 0.0
+        } for phase, (appels, duree) in self.phases.items()]
+        conditions = [{
+            'condition': code,
+            'verifications': int(verifications),
+            'echecs': int(echecs),
+            'taux_echec': echecs / verifications if verifications else 0.0,
+            'duree_s': duree,
+            'moyenne_us': duree / verifications * 1e6 if verifications else 0.0
+        } for code, (verifications, echecs, duree) in self.conditions.items()]
+        return {
+            'phases': sorted(phases, key=lambda l: l['duree_s'], reverse=True),
+            'conditions': sorted(conditions, key=lambda l: l['duree_s'], reverse=True)
+        }
+
+    def tableau(self) -> str:
+        """Tableau texte de synthese"""
+        resume = self.resume()
+        lignes = [f"⏱️ Profil d'evaluation ({self.duree_totale:.3f}s)",
+                  f"   {'Phase':24s} {'Appels':>10s} {'Total(s)':>10s} {'Moy(us)':>10s} {'Part':>7s}"]
+        for l in resume['phases']:
+            lignes.append(f"   {l['phase']:24s} {l['appels']:>10d} {l['duree_s']:>10.3f} "
+                          f"{l['moyenne_us']:>10.1f} {l['part']:>7.1%}")
+        if resume['conditions']:
+            lignes.append(f"   {'Condition':24s} {'Verifs':>10s} {'Echecs':>10s} {'Taux':>7s} "
+                          f"{'Total(s)':>10s} {'Moy(us)':>10s}")
+            for l in resume['conditions']:
+                lignes.append(f"   {l['condition']:24s} {l['verifications']:>10d} {l['echecs']:>10d} "
+                              f"{l['taux_echec']:>7.1%} {l['duree_s']:>10.3f} {l['moyenne_us']:>10.2f}")
+        return "\n".join(lignes)
@@ -0,0 +1,420 @@
+"""
+Compilation des regles d'avancement en predicats reutilisables
+core/rule_compiler.py
+
+Une regle (ligne regles_avancement) est compilee une seule fois en RegleCompilee:
+une liste de verifications pretes a l'emploi, dans l'ordre historique de
+_evaluer_regle. Une verification ne produit pas de texte: elle renvoie un constat
+(code, respectee, parametres) rendu en francais par rendre_condition, seulement
+quand le resultat est affiche ou exporte. La logique des diplomes est une expression booleenne declarative
+stockee avec la regle (colonne expression_diplomes), par exemple:
+
+    B.M.P.1 & (C.M.2 | C.T.2)
+
+'&' (ET) est prioritaire sur '|' (OU). Sans expression, les diplomes requis
+sont combines en OU.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+import json
+import re
+
+# ==================== EXPRESSIONS DE DIPLOMES ====================
+
+class NoeudDiplomes(ABC):
+    """Noeud d'une expression booleenne de diplomes"""
+
+    @abstractmethod
+    def evaluer(self, possede: Callable[[str], Any]) -> Any:
+        """Evaluer l'expression; possede(nom) peut renvoyer un bool ou un tableau NumPy de bool"""
+
+    @abstractmethod
+    def noms(self) -> List[str]:
+        """Diplomes cites, dans l'ordre d'apparition"""
+
+    @abstractmethod
+    def rendu(self, ou: str = "OU") -> str:
+        """Texte de l'expression (ET/OU)"""
+
+    def est_disjonction_simple(self) -> bool:
+        """Vrai si l'expression est un seul diplome ou un OU de diplomes"""
+        return False
+
+@dataclass(frozen=True)
+class TermeDiplome(NoeudDiplomes):
+    nom: str
+
+    def evaluer(self, possede):
+        return possede(self.nom)
+
+    def noms(self) -> List[str]:
+        return [self.nom]
+
+    def rendu(self, ou: str = "OU") -> str:
+        return self.nom
+
+    def est_disjonction_simple(self) -> bool:
+        return True
+
+@dataclass(frozen=True)
+class EtDiplomes(NoeudDiplomes):
+    enfants: Tuple[NoeudDiplomes, ...]
+
+    def evaluer(self, possede):
+        resultat = self.enfants[0].evaluer(possede)
+        for enfant in self.enfants[1:]:
+            resultat = resultat & enfant.evaluer(possede)
+        return resultat
+
+    def noms(self) -> List[str]:
+        return [nom for enfant in self.enfants for nom in enfant.noms()]
+
+    def rendu(self, ou: str = "OU") -> str:
+        return " ET ".join(
+            f"({enfant.rendu(ou)})" if isinstance(enfant, OuDiplomes) else enfant.rendu(ou)
+            for enfant in self.enfants
+        )
+
+@dataclass(frozen=True)
+class OuDiplomes(NoeudDiplomes):
+    enfants: Tuple[NoeudDiplomes, ...]
+
+    def evaluer(self, possede):
+        resultat = self.enfants[0].evaluer(possede)
+        for enfant in self.enfants[1:]:
+            resultat = resultat | enfant.evaluer(possede)
+        return resultat
+
+    def noms(self) -> List[str]:
+        return [nom for enfant in self.enfants for nom in enfant.noms()]
+
+    def rendu(self, ou: str = "OU") -> str:
+        return f" {ou} ".join(
+            f"({enfant.rendu(ou)})" if isinstance(enfant, EtDiplomes) else enfant.rendu(ou)
+            for enfant in self.enfants
+        )
+
+    def est_disjonction_simple(self) -> bool:
+        return all(isinstance(enfant, TermeDiplome) for enfant in self.enfants)
+
+_JETONS = re.compile(r"\s*(?:([&|()])|([^&|()]+))")
+
+def parser_expression_diplomes(texte: str) -> NoeudDiplomes:
+    """
+    Analyser une expression de diplomes ('&', '|', parentheses)
+
+    Leve ValueError si l'expression est vide ou mal formee.
+    """
+    jetons: List[str] = []
+    position = 0
+    texte = texte or ""
+    while position < len(texte):
+        match = _JETONS.match(texte, position)
+        if not match or match.end() == position:
+            break
+        operateur, nom = match.groups()
+        if operateur:
+            jetons.append(operateur)
+        elif nom.strip():
+            jetons.append(nom.strip())
+        position = match.end()
+
+    if not jetons:
+        raise ValueError("Expression de diplomes vide")
+
+    index = 0
+
+    def courant() -> Optional[str]:
+        return jetons[index] if index < len(jetons) else None
+
+    def lire_ou() -> NoeudDiplomes:
+        nonlocal index
+        enfants = [lire_et()]
+        while courant() == "|":
+            index += 1
+            enfants.append(lire_et())
+        return enfants[0] if len(enfants) == 1 else OuDiplomes(tuple(enfants))
+
+    def lire_et() -> NoeudDiplomes:
+        nonlocal index
+        enfants = [lire_terme()]
+        while courant() == "&":
+            index += 1
+            enfants.append(lire_terme())
+        return enfants[0] if len(enfants) == 1 else EtDiplomes(tuple(enfants))
+
+    def lire_terme() -> NoeudDiplomes:
+        nonlocal index
+        jeton = courant()
+        if jeton is None:
+            raise ValueError("Expression de diplomes incomplete")
+        if jeton == "(":
+            index += 1
+            noeud = lire_ou()
+            if courant() != ")":
+                raise ValueError("Parenthese fermante manquante")
+            index += 1
+            return noeud
+        if jeton in ("&", "|", ")"):
+            raise ValueError(f"Symbole inattendu '{jeton}'")
+        index += 1
+        return TermeDiplome(jeton)
+
+    noeud = lire_ou()
+    if courant() is not None:
+        raise ValueError(f"Symbole inattendu '{courant()}'")
+    return noeud
+
+def expression_diplomes_regle(regle: Dict[str, Any]) -> Optional[NoeudDiplomes]:
+    """
+    Expression de diplomes d'une regle
+
+    Priorite a la colonne expression_diplomes; a defaut, OU des diplomes requis.
+    """
+    if regle.get('expression_diplomes'):
+        try:
+            return parser_expression_diplomes(regle['expression_diplomes'])
+        except ValueError as e:
+            print(f"⚠️ Expression de diplomes invalide (regle {regle.get('id')}): {e} - logique OU utilisee")
+
+    diplomes_requis = regle.get('diplomes_requis') or []
+    if not diplomes_requis:
+        return None
+
+    if len(diplomes_requis) == 1:
+        return TermeDiplome(diplomes_requis[0])
+    return OuDiplomes(tuple(TermeDiplome(d) for d in diplomes_requis))
+
+# ==================== REGLES COMPILEES ====================
+
+# Codes des conditions verifiees, dans l'ordre d'evaluation (stockes avec les resultats)
+CONDITION_SERVICE = "service"
+CONDITION_GRADE = "grade"
+CONDITION_GRADE_SPECIFIQUE = "grade_specifique"
+CONDITION_DIPLOMES = "diplomes"
+CONDITION_NOTE_MIN = "note_min"
+CONDITION_NOTES_INTERDITES = "notes_interdites"
+
+CODES_CONDITIONS = (
+    CONDITION_SERVICE, CONDITION_GRADE, CONDITION_GRADE_SPECIFIQUE,
+    CONDITION_DIPLOMES, CONDITION_NOTE_MIN, CONDITION_NOTES_INTERDITES
+)
+
+# Libelles courts des conditions (exports, filtres)
+LIBELLES_CONDITIONS = {
+    CONDITION_SERVICE: "Ancienneté de service",
+    CONDITION_GRADE: "Ancienneté dans le grade",
+    CONDITION_GRADE_SPECIFIQUE: "Ancienneté dans un grade spécifique",
+    CONDITION_DIPLOMES: "Diplômes",
+    CONDITION_NOTE_MIN: "Note courante",
+    CONDITION_NOTES_INTERDITES: "Notes N-1/N-2"
+}
+
+# Cas de la condition de grade specifique (voir AdvancementEvaluator._constat_grade_specifique)
+GRADE_SPECIFIQUE_ACTUEL = 0
+GRADE_SPECIFIQUE_DEPASSE = 1
+GRADE_SPECIFIQUE_NON_ATTEINT = 2
+GRADE_SPECIFIQUE_ESTIMATION = 3
+GRADE_SPECIFIQUE_HISTORIQUE = 4
+
+# Verification: agent -> (respectee, parametres du message)
+Verification = Callable[[Any], Tuple[bool, Tuple]]
+
+# Constat: (code, respectee, parametres)
+Constat = Tuple[str, bool, Tuple]
+
+def rendre_condition(code: str, respectee: bool, parametres: Tuple) -> str:
+    """Message francais d'un constat (textes historiques de _evaluer_regle)"""
+    if code == CONDITION_SERVICE:
+        anciennete, requis = parametres
+        if respectee:
+            return f"Anciennete service: {anciennete:.1f}a (>= {requis}a)"
+        return f"Anciennete service: {anciennete:.1f}a (requis >= {requis}a)"
+
+    if code == CONDITION_GRADE:
+        anciennete, requis = parametres
+        if respectee:
+            return f"Anciennete grade: {anciennete:.1f}a (>= {requis}a)"
+        return f"Anciennete grade: {anciennete:.1f}a (requis >= {requis}a)"
+
+    if code == CONDITION_GRADE_SPECIFIQUE:
+        cas, grade_specifique, anciennete, requis, grade_actuel = parametres
+        if cas == GRADE_SPECIFIQUE_ACTUEL:
+            if respectee:
+                return f"Anciennete dans grade {grade_specifique}: {anciennete:.1f}a (>= {requis}a) ✓"
+            return f"Anciennete dans grade {grade_specifique}: {anciennete:.1f}a (requis >= {requis}a)"
+        if cas == GRADE_SPECIFIQUE_DEPASSE:
+            if respectee:
+                return f"Grade {grade_specifique} (dépassé): estimation basée sur ancienneté service ({anciennete:.1f}a) ✓"
+            return f"Grade {grade_specifique}: ancienneté service insuffisante pour garantir {requis}a dans ce grade"
+        if cas == GRADE_SPECIFIQUE_NON_ATTEINT:
+            return f"Grade {grade_specifique} non atteint (actuel: {grade_actuel})"
+        if cas == GRADE_SPECIFIQUE_HISTORIQUE:
+            if respectee:
+                return f"Anciennete dans grade {grade_specifique} (historique): {anciennete:.1f}a (>= {requis}a) ✓"
+            return f"Anciennete dans grade {grade_specifique} (historique): {anciennete:.1f}a (requis >= {requis}a)"
+        if respectee:
+            return f"Grade {grade_specifique}: estimation conservative basée sur ancienneté service ({anciennete:.1f}a) ⚠️"
+        return f"Grade {grade_specifique}: impossible à vérifier précisément (ancienneté service: {anciennete:.1f}a)"
+
+    if code == CONDITION_DIPLOMES:
+        # expression, diplomes de l'agent, termes manquants (expressions avec ET)
+        expression, diplomes_agent, manquants = parametres
+        diplomes_str = ', '.join(diplomes_agent) if diplomes_agent else 'Aucun'
+        if expression.est_disjonction_simple():
+            libelle = '/'.join(expression.noms())
+            if respectee:
+                return f"Diplôme requis: {libelle} ✓"
+            return f"Diplôme requis: {libelle} (possède: {diplomes_str})"
+        libelle = expression.rendu()
+        if respectee:
+            return f"Diplômes requis: {libelle} ✓"
+        manquant = ', '.join(terme.rendu(ou="ou") for terme in manquants)
+        return f"Diplômes requis: {libelle} - Manquant: {manquant} (possède: {diplomes_str})"
+
+    if code == CONDITION_NOTE_MIN:
+        note_agent, note_min = parametres
+        if respectee:
+            return f"Note courante: {note_agent} (>= {note_min})"
+        return f"Note courante: {note_agent} (requis >= {note_min})"
+
+    if code == CONDITION_NOTES_INTERDITES:
+        notes_interdites, note_n1, note_n2 = parametres
+        libelle = '/'.join(notes_interdites)
+        if respectee:
+            return f"Pas de notes {libelle} en N-1,N-2"
+        return f"Notes interdites {libelle} detectees (N-2:{note_n2}, N-1:{note_n1})"
+
+    return LIBELLES_CONDITIONS.get(code, code)
+
+def _encoder_noeud(noeud: NoeudDiplomes) -> Any:
+    if isinstance(noeud, TermeDiplome):
+        return noeud.nom
+    cle = "et" if isinstance(noeud, EtDiplomes) else "ou"
+    return {cle: [_encoder_noeud(enfant) for enfant in noeud.enfants]}
+
+def _decoder_noeud(valeur: Any) -> NoeudDiplomes:
+    if isinstance(valeur, str):
+        return TermeDiplome(valeur)
+    if "et" in valeur:
+        return EtDiplomes(tuple(_decoder_noeud(enfant) for enfant in valeur["et"]))
+    return OuDiplomes(tuple(_decoder_noeud(enfant) for enfant in valeur["ou"]))
+
+def encoder_constats(constats: Sequence[Constat]) -> str:
+    """
+    Constats en JSON (colonne evaluation_results.constats)
+
+    Les expressions de diplomes sont ecrites en arbre ({"et": [...]}, {"ou": [...]},
+    nom de diplome pour une feuille): les noms peuvent contenir des parentheses.
+    """
+    lignes = []
+    for code, respectee, parametres in constats:
+        if code == CONDITION_DIPLOMES:
+            expression, diplomes_agent, manquants = parametres
+            parametres = (_encoder_noeud(expression), list(diplomes_agent),
+                          [_encoder_noeud(terme) for terme in manquants])
+        lignes.append([code, int(respectee), list(parametres)])
+    return json.dumps(lignes, ensure_ascii=False, separators=(',', ':'))
+
+def decoder_constats(texte: Optional[str]) -> Tuple[Constat, ...]:
+    """Constats enregistres par encoder_constats (() si absents)"""
+    if not texte:
+        return ()
+    constats = []
+    for code, respectee, parametres in json.loads(texte):
+        if code == CONDITION_DIPLOMES:
+            expression, diplomes_agent, manquants = parametres
+            parametres = (_decoder_noeud(expression), diplomes_agent,
+                          tuple(_decoder_noeud(terme) for terme in manquants))
+        constats.append((code, bool(respectee), tuple(parametres)))
+    return tuple(constats)
+
+@dataclass
+class RegleCompilee:
+    """Regle prete a l'evaluation: verifications (code, predicat) et expression de diplomes"""
+    regle: Dict[str, Any]
+    actif: bool
+    grade_cible: str
+    type_avancement: str
+    expression_diplomes: Optional[NoeudDiplomes]
+    verifications: Tuple[Tuple[str, Verification], ...] = field(default_factory=tuple)
+
+    @property
+    def regle_id(self) -> Optional[int]:
+        return self.regle.get('id')
+
+def compiler_regle(regle: Dict[str, Any], evaluateur) -> RegleCompilee:
+    """
+    Compiler une regle pour un evaluateur donne (echelle de notes, equivalences, grades)
+
+    Les verifications renvoient (respectee, parametres); voir rendre_condition.
+    """
+    verifications: List[Tuple[str, Verification]] = []
+
+    if regle.get('anciennete_service_min', 0) > 0:
+        requis_service = regle['anciennete_service_min']
+
+        def verifier_service(agent):
+            anciennete = agent.anciennete_service or 0
+            return anciennete >= requis_service, (anciennete, requis_service)
+        verifications.append((CONDITION_SERVICE, verifier_service))
+
+    if regle.get('anciennete_grade_min', 0) > 0:
+        requis_grade = regle['anciennete_grade_min']
+
+        def verifier_grade(agent):
+            anciennete = agent.anciennete_grade or 0
+            return anciennete >= requis_grade, (anciennete, requis_grade)
+        verifications.append((CONDITION_GRADE, verifier_grade))
+
+    if regle.get('grade_specifique') and regle.get('anciennete_grade_specifique', 0) > 0:
+        grade_specifique = regle['grade_specifique']
+        requis_specifique = regle['anciennete_grade_specifique']
+
+        def verifier_grade_specifique(agent):
+            return evaluateur._constat_grade_specifique(agent, grade_specifique, requis_specifique)
+        verifications.append((CONDITION_GRADE_SPECIFIQUE, verifier_grade_specifique))
+
+    expression = expression_diplomes_regle(regle)
+    if expression is not None:
+        def verifier_diplomes(agent):
+            diplomes_agent = [d.nom for d in agent.diplomes if d.actif] if agent.diplomes else []
+            return evaluateur._constat_expression_diplomes(diplomes_agent, expression)
+        verifications.append((CONDITION_DIPLOMES, verifier_diplomes))
+
+    if regle.get('note_min_courante'):
+        note_min = regle['note_min_courante']
+        valeur_min = evaluateur.echelle_notes.get(note_min, 0)
+
+        def verifier_note(agent):
+            note_agent = agent.note_annee_courante or ""
+            return evaluateur.echelle_notes.get(note_agent, 0) >= valeur_min, (note_agent, note_min)
+        verifications.append((CONDITION_NOTE_MIN, verifier_note))
+
+    if regle.get('notes_interdites_n1_n2'):
+        notes_interdites = regle['notes_interdites_n1_n2']
+        interdites: Set[str] = set(notes_interdites)
+
+        def verifier_notes_interdites(agent):
+            note_n1 = agent.note_annee_moins_1 or ""
+            note_n2 = agent.note_annee_moins_2 or ""
+            return (note_n1 not in interdites and note_n2 not in interdites,
+                    (notes_interdites, note_n1, note_n2))
+        verifications.append((CONDITION_NOTES_INTERDITES, verifier_notes_interdites))
+
+    return RegleCompilee(
+        regle=regle,
+        actif=regle.get('statut') == 'Actif',
+        grade_cible=regle['grade_cible'],
+        type_avancement=regle['type_avancement'],
+        expression_diplomes=expression,
+        verifications=tuple(verifications)
+    )
+
+def compiler_index(regles_index, evaluateur) -> Dict[str, Tuple[RegleCompilee, ...]]:
+    """Compiler un index {grade_source: regles} (voir db_manager.get_rules_index)"""
+    return {
+        grade: tuple(compiler_regle(regle, evaluateur) for regle in regles)
+        for grade, regles in regles_index.items()
+    }
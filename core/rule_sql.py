@@ -0,0 +1,119 @@
+"""
+Traduction des regles compilees en clauses SQL (pre-filtrage des candidats)
+core/rule_sql.py
+
+Chaque condition d'une RegleCompilee est traduite en expression SQL parametree
+sur les alias a (agents) et n (echelles_notes jointe sur la note courante, voir
+db_manager.get_candidate_agent_ids). Une expression est vraie au moins quand la
+condition est respectee: les conditions que SQL ne sait pas exprimer exactement
+sont elargies ou omises, de sorte que le filtre retourne un sur-ensemble des
+candidats. Le statut exact est ensuite calcule en Python sur ces seuls agents
+(AdvancementEvaluator.rechercher_candidats).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.rule_compiler import (
+    CONDITION_DIPLOMES, CONDITION_GRADE, CONDITION_GRADE_SPECIFIQUE, CONDITION_NOTE_MIN,
+    CONDITION_NOTES_INTERDITES, CONDITION_SERVICE, EtDiplomes, NoeudDiplomes, OuDiplomes,
+    RegleCompilee, TermeDiplome
+)
+
+# Clause SQL: (code de condition, expression, parametres)
+ClauseSQL = Tuple[str, str, List[Any]]
+
+def _marqueurs(valeurs: Sequence[Any]) -> str:
+    return ', '.join('?' * len(valeurs))
+
+def sql_expression_diplomes(expression: NoeudDiplomes,
+                            equivalences: Dict[str, List[str]]) -> Tuple[str, List[Any]]:
+    """Expression de diplomes en EXISTS sur diplomes_historique (diplome ou equivalent, actif)"""
+    if isinstance(expression, TermeDiplome):
+        acceptes = [expression.nom] + [d for d in equivalences.get(expression.nom, []) if d != expression.nom]
+        return (
+            f"EXISTS (SELECT 1 FROM diplomes_historique d WHERE d.agent_id = a.id "
+            f"AND d.actif = 1 AND d.diplome IN ({_marqueurs(acceptes)}))",
+            acceptes
+        )
+
+    operateur = " AND " if isinstance(expression, EtDiplomes) else " OR "
+    morceaux, params = [], []
+    for enfant in expression.enfants:
+        sql, params_enfant = sql_expression_diplomes(enfant, equivalences)
+        morceaux.append(sql)
+        params.extend(params_enfant)
+    return f"({operateur.join(morceaux)})", params
+
+def clauses_regle(regle_compilee: RegleCompilee, evaluateur, grade_source: str,
+                  historique_disponible: bool, echelle_sql_fiable: bool) -> List[ClauseSQL]:
+    """
+    Clauses SQL des conditions d'une regle (memes conditions que compiler_regle)
+
+    historique_disponible: la table historique_grades existe; un agent qui y a une
+    periode dans le grade specifique est alors toujours retenu (anciennete exacte
+    verifiee en Python).
+    echelle_sql_fiable: echelles_notes contient la meme echelle que l'evaluateur;
+    sinon la note minimale n'est pas filtree en SQL.
+    """
+    regle = regle_compilee.regle
+    clauses: List[ClauseSQL] = []
+    service = "COALESCE(a.anciennete_service, 0)"
+    grade = "COALESCE(a.anciennete_grade, 0)"
+
+    if regle.get('anciennete_service_min', 0) > 0:
+        clauses.append((CONDITION_SERVICE, f"{service} >= ?", [regle['anciennete_service_min']]))
+
+    if regle.get('anciennete_grade_min', 0) > 0:
+        clauses.append((CONDITION_GRADE, f"{grade} >= ?", [regle['anciennete_grade_min']]))
+
+    if regle.get('grade_specifique') and regle.get('anciennete_grade_specifique', 0) > 0:
+        grade_specifique = regle['grade_specifique']
+        requis = regle['anciennete_grade_specifique']
+        grades_index = evaluateur.grades_index
+
+        if grade_specifique == grade_source:
+            clauses.append((CONDITION_GRADE_SPECIFIQUE, f"{grade} >= ?", [requis]))
+        else:
+            if grade_specifique in grades_index and grade_source in grades_index:
+                if grades_index[grade_specifique] < grades_index[grade_source]:
+                    sql, params = f"{service} >= ? + {grade}", [requis]
+                else:
+                    sql, params = "0", []
+            else:
+                sql, params = f"{service} >= ?", [requis * 2]
+
+            if historique_disponible:
+                sql = (f"({sql} OR EXISTS (SELECT 1 FROM historique_grades h "
+                       f"WHERE h.agent_id = a.id AND h.actif = 1 AND h.grade = ?))")
+                params = params + [grade_specifique]
+            clauses.append((CONDITION_GRADE_SPECIFIQUE, sql, params))
+
+    if regle_compilee.expression_diplomes is not None:
+        sql, params = sql_expression_diplomes(regle_compilee.expression_diplomes, evaluateur.equivalences)
+        clauses.append((CONDITION_DIPLOMES, sql, params))
+
+    if regle.get('note_min_courante') and echelle_sql_fiable:
+        clauses.append((CONDITION_NOTE_MIN, "COALESCE(n.valeur_numerique, 0) >= ?",
+                        [evaluateur.echelle_notes.get(regle['note_min_courante'], 0)]))
+
+    if regle.get('notes_interdites_n1_n2'):
+        interdites = list(regle['notes_interdites_n1_n2'])
+        clauses.append((
+            CONDITION_NOTES_INTERDITES,
+            f"COALESCE(a.note_annee_moins_1, '') NOT IN ({_marqueurs(interdites)}) "
+            f"AND COALESCE(a.note_annee_moins_2, '') NOT IN ({_marqueurs(interdites)})",
+            interdites + interdites
+        ))
+
+    return clauses
+
+def condition_candidats(clauses: Sequence[ClauseSQL], max_echecs: Optional[int]) -> Tuple[str, List[Any]]:
+    """
+    Clause WHERE retenant les agents avec au plus max_echecs conditions non respectees
+    (0: proposables, 1: proposables et bientot; None: aucun filtre)
+    """
+    if max_echecs is None or not clauses:
+        return "1", []
+    if max_echecs == 0:
+        return " AND ".join(f"({sql})" for _, sql, _ in clauses), [p for _, _, params in clauses for p in params]
+    echecs = " + ".join(f"(NOT COALESCE(({sql}), 0))" for _, sql, _ in clauses)
+    return f"({echecs}) <= ?", [p for _, _, params in clauses for p in params] + [max_echecs]
@@ -11,6 +11,7 @@ import threading
 import time
 
 sys.path.append(str(Path(__file__).parent.parent))
+from core.connection_pool import connexions_du_thread
 from core.preferences_manager import preferences_manager
 from gui.components.agent_popup import show_agent_popup
 
@@ -123,6 +124,7 @@ def show_agents(app):
     loading_window = LoadingScreen(app.root)
     
     # Charger les données en arrière-plan
+    @connexions_du_thread()
     def load_data_async():
         global loading_window
         
@@ -142,15 +144,17 @@ def show_agents(app):
             time.sleep(0.1)
             
             from core.database import db_manager
-            agents_data = db_manager.get_all_agents()
+            premiere_page = db_manager.query_agents(limit=rows_per_page)
+            unites = db_manager.get_unites()
             
             # Étape 3: Préparer les statistiques
             loading_window.update_status("Calcul des statistiques...")
             time.sleep(0.1)
             
-            total = len(agents_data)
-            proposables = len([a for a in agents_data if 'Proposable' in str(a.get('resultat_evaluation', '')) and 'Non' not in str(a.get('resultat_evaluation', ''))])
-            bientot = len([a for a in agents_data if 'Bientot' in str(a.get('resultat_evaluation', ''))])
+            total = db_manager.count_agents()
+            comptes = db_manager.get_evaluation_counts()
+            proposables = comptes['proposable']
+            bientot = comptes['bientot']
             non_prop = total - proposables - bientot
             
             stats = {
@@ -179,12 +183,13 @@ def show_agents(app):
                     create_minimal_stats(main_container, stats, accent_color)
                     
                     # Barre de recherche épurée
-                    create_search_bar(main_container, app, agents_data, accent_color, 
+                    create_search_bar(main_container, app, unites, accent_color, 
                                     table_font_size, rows_per_page, alternate_colors, row_spacing)
                     
-                    # Tableau initial
-                    create_agents_table(main_container, agents_data, table_font_size, 
-                                      rows_per_page, alternate_colors, row_spacing, accent_color, app)
+                    # Tableau initial (première page)
+                    show_agents_page(main_container, app, {}, [None], table_font_size, rows_per_page,
+                                   alternate_colors, row_spacing, accent_color,
+                                   page=premiere_page, total=total)
                     
                 finally:
                     # Fermer le loading
@@ -269,7 +274,7 @@ def create_minimal_stats(parent, stats, accent_color):
 
 # ==================== BARRE DE RECHERCHE ÉPURÉE ====================
 
-def create_search_bar(parent, app, agents_data, accent_color, font_size, rows_per_page, alternate_colors, row_spacing):
+def create_search_bar(parent, app, unites, accent_color, font_size, rows_per_page, alternate_colors, row_spacing):
     """Barre de recherche minimaliste et moderne"""
     global search_state
     
@@ -346,8 +351,7 @@ def create_search_bar(parent, app, agents_data, accent_color, font_size, rows_pe
     
     ctk.CTkLabel(row2, text="Unité:", width=70, anchor="w").pack(side="left", padx=(20, 10))
     
-    unites = ["Toutes"] + sorted(list(set([a.get('unite_provenance', '') for a in agents_data if a.get('unite_provenance')])))
-    unite_combo = ctk.CTkComboBox(row2, values=unites, width=200, height=36)
+    unite_combo = ctk.CTkComboBox(row2, values=["Toutes"] + unites, width=200, height=36)
     unite_combo.set("Toutes")
     unite_combo.pack(side="left", padx=5)
     
@@ -371,6 +375,7 @@ def create_search_bar(parent, app, agents_data, accent_color, font_size, rows_pe
         # Mini loading
         search_btn.configure(state="disabled", text="⏳ Recherche...")
         
+        @connexions_du_thread()
         def search_async():
             time.sleep(0.1)  # Petit délai pour l'UX
             
@@ -380,45 +385,42 @@ def create_search_bar(parent, app, agents_data, accent_color, font_size, rows_pe
             unite_filter = unite_combo.get()
             statut_filter = statut_combo.get()
             
-            filtered = agents_data.copy()
-            
-            # Filtre texte
-            if query:
-                if use_fuzzy:
-                    from difflib import SequenceMatcher
-                    filtered = [a for a in filtered if 
-                        any(SequenceMatcher(None, query, str(a.get(field, '')).lower()).ratio() >= 0.6
-                            for field in ['nom', 'prenom', 'matricule'])
-                    ]
-                else:
-                    filtered = [a for a in filtered if 
-                        query in a.get('nom', '').lower() or 
-                        query in a.get('prenom', '').lower() or 
-                        query in a.get('matricule', '').lower()
-                    ]
+            from core.database import db_manager
             
-            # Filtre grade
+            # Filtres grade, unité et statut (appliqués en SQL)
+            filtres = {}
             if grade_filter != "Tous":
-                filtered = [a for a in filtered if a.get('grade_actuel') == grade_filter]
-            
-            # Filtre unité
+                filtres['grade_actuel'] = grade_filter
             if unite_filter != "Toutes":
-                filtered = [a for a in filtered if a.get('unite_provenance') == unite_filter]
+                filtres['unite_provenance'] = unite_filter
+            statuts = {
+                "Proposable": "proposable",
+                "Bientôt proposable": "bientot",
+                "Non proposable": "non_proposable"
+            }
+            if statut_filter in statuts:
+                filtres['statut_evaluation'] = statuts[statut_filter]
             
-            # Filtre statut
-            if statut_filter != "Tous":
-                if statut_filter == "Proposable":
-                    filtered = [a for a in filtered if 'Proposable' in str(a.get('resultat_evaluation', '')) 
-                               and 'Non' not in str(a.get('resultat_evaluation', ''))]
-                elif statut_filter == "Bientôt proposable":
-                    filtered = [a for a in filtered if 'Bientot' in str(a.get('resultat_evaluation', ''))]
-                elif statut_filter == "Non proposable":
-                    filtered = [a for a in filtered if 'Non proposable' in str(a.get('resultat_evaluation', ''))]
+            if query and use_fuzzy:
+                # Recherche floue: candidats par trigrammes communs, re-notés (seuil 0.6)
+                filtered = db_manager.search_agents_fuzzy(query, filtres, limit=rows_per_page)
+                page = None
+            else:
+                # Recherche exacte: sous-chaîne du nom, prénom ou matricule (index trigramme),
+                # paginée comme la liste
+                if query:
+                    filtres['texte'] = query
+                page = db_manager.query_agents(filtres, limit=rows_per_page)
+                total = db_manager.count_agents(filtres)
             
             # Mettre à jour le tableau dans le thread principal
             def update_table():
-                create_agents_table(parent, filtered, font_size, rows_per_page, 
-                                  alternate_colors, row_spacing, accent_color, app)
+                if page is None:
+                    create_agents_table(parent, filtered, font_size, rows_per_page, 
+                                      alternate_colors, row_spacing, accent_color, app)
+                else:
+                    show_agents_page(parent, app, filtres, [None], font_size, rows_per_page,
+                                   alternate_colors, row_spacing, accent_color, page=page, total=total)
                 search_btn.configure(state="normal", text="🔍 Rechercher")
             
             app.root.after(0, update_table)
@@ -432,8 +434,8 @@ def create_search_bar(parent, app, agents_data, accent_color, font_size, rows_pe
         unite_combo.set("Toutes")
         statut_combo.set("Tous")
         fuzzy_var.set(True)
-        create_agents_table(parent, agents_data, font_size, rows_per_page, 
-                          alternate_colors, row_spacing, accent_color, app)
+        show_agents_page(parent, app, {}, [None], font_size, rows_per_page,
+                       alternate_colors, row_spacing, accent_color)
     
     search_btn = ctk.CTkButton(
         btn_frame,
@@ -459,8 +461,40 @@ def create_search_bar(parent, app, agents_data, accent_color, font_size, rows_pe
 
 # ==================== TABLEAU OPTIMISÉ ====================
 
-def create_agents_table(parent, agents_data, font_size, rows_per_page, alternate_colors, row_spacing, accent_color, app):
-    """Tableau optimisé avec fix du défilement"""
+def show_agents_page(parent, app, filtres, curseurs, font_size, rows_per_page, alternate_colors,
+                     row_spacing, accent_color, page=None, total=None):
+    """
+    Afficher une page de la liste (db_manager.query_agents, pagination par clé)
+    
+    curseurs: curseurs des pages parcourues, None pour la première; page et total
+    évitent de relire ce qui vient d'être chargé en arrière-plan.
+    """
+    from core.database import db_manager
+    
+    if page is None:
+        page = db_manager.query_agents(filtres, after_key=curseurs[-1], limit=rows_per_page)
+    if total is None:
+        total = db_manager.count_agents(filtres)
+    
+    def aller_a(nouveaux_curseurs):
+        show_agents_page(parent, app, filtres, nouveaux_curseurs, font_size, rows_per_page,
+                       alternate_colors, row_spacing, accent_color, total=total)
+    
+    precedente = (lambda: aller_a(curseurs[:-1])) if len(curseurs) > 1 else None
+    suivante = (lambda: aller_a(curseurs + [page['curseur']])) if page['curseur'] else None
+    
+    create_agents_table(parent, page['agents'], font_size, rows_per_page, alternate_colors,
+                        row_spacing, accent_color, app, total=total,
+                        pagination=(len(curseurs), precedente, suivante))
+
+def create_agents_table(parent, agents_data, font_size, rows_per_page, alternate_colors, row_spacing, accent_color, app,
+                        total=None, pagination=None):
+    """
+    Tableau optimisé avec fix du défilement
+    
+    total: nombre d'agents de la liste complète (par défaut len(agents_data));
+    pagination: (numéro de page, page précédente, page suivante) pour une page de query_agents.
+    """
     
     # Nettoyer l'ancien tableau
     for widget in parent.winfo_children():
@@ -488,11 +522,38 @@ def create_agents_table(parent, agents_data, font_size, rows_per_page, alternate
     
     ctk.CTkLabel(
         header_frame,
-        text=f"📋 {len(agents_data)} agent(s)",
+        text=f"📋 {len(agents_data) if total is None else total} agent(s)",
         font=ctk.CTkFont(size=14, weight="bold")
     ).pack(side="left")
     
-    if len(agents_data) > rows_per_page:
+    if pagination is not None:
+        numero_page, precedente, suivante = pagination
+        
+        ctk.CTkButton(
+            header_frame,
+            text="Suivante ▶",
+            width=100,
+            height=28,
+            state="normal" if suivante else "disabled",
+            command=suivante
+        ).pack(side="right", padx=(5, 0))
+        
+        ctk.CTkLabel(
+            header_frame,
+            text=f"Page {numero_page}",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        ).pack(side="right", padx=10)
+        
+        ctk.CTkButton(
+            header_frame,
+            text="◀ Précédente",
+            width=100,
+            height=28,
+            state="normal" if precedente else "disabled",
+            command=precedente
+        ).pack(side="right")
+    elif len(agents_data) > rows_per_page:
         ctk.CTkLabel(
             header_frame,
             text=f"Affichage des {rows_per_page} premiers • Modifiez dans Paramètres",
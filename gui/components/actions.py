@@ -64,7 +64,7 @@ def export_agents(app):
     """Exporter les agents"""
     try:
         from core.database import db_manager
-        import pandas as pd
+        from core.exports import lignes_export_agents, exporter_excel
         from pathlib import Path
         
         # Recuperer les agents
@@ -74,32 +74,10 @@ def export_agents(app):
             messagebox.showwarning("Attention", "Aucun agent a exporter")
             return
         
-        # Convertir en DataFrame pandas
-        df_data = []
-        for agent in agents_data:
-            df_data.append({
-                'Matricule': agent.get('matricule', ''),
-                'Nom': agent.get('nom', ''),
-                'Prenom': agent.get('prenom', ''),
-                'Grade': agent.get('grade_actuel', ''),
-                'Age': agent.get('age', ''),
-                'Anciennete_Service': agent.get('anciennete_service', ''),
-                'Anciennete_Grade': agent.get('anciennete_grade', ''),
-                'Note_Courante': agent.get('note_annee_courante', ''),
-                'Note_N-1': agent.get('note_annee_moins_1', ''),
-                'Note_N-2': agent.get('note_annee_moins_2', ''),
-                'Statut_Disciplinaire': agent.get('statut_disciplinaire', ''),
-                'Unite': agent.get('unite_provenance', ''),
-                'Resultat_Evaluation': agent.get('resultat_evaluation', '')
-            })
-        
-        df = pd.DataFrame(df_data)
-        
         # Sauvegarder en Excel
-        export_path = Path("data/exports/agents_export.xlsx")
-        export_path.parent.mkdir(exist_ok=True)
-        
-        df.to_excel(export_path, index=False, sheet_name="Agents")
+        export_path = exporter_excel(
+            lignes_export_agents(agents_data), Path("data/exports/agents_export.xlsx"), "Agents"
+        )
         
         messagebox.showinfo(
             "Export reussi", 
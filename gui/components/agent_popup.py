@@ -60,6 +60,23 @@ def show_agent_popup(app, agent):
             text_color=eval_color
         )
         eval_label.pack(pady=(0, 15))
+        
+        # Détail des conditions, rendu à l'affichage depuis le résultat enregistré
+        try:
+            from core.database import db_manager
+            from core.evaluator import details_resultat_enregistre
+            
+            resultat = db_manager.get_evaluation_result(agent['id'])
+            if resultat is not None:
+                ctk.CTkLabel(
+                    eval_frame,
+                    text=details_resultat_enregistre(resultat),
+                    font=ctk.CTkFont(size=12),
+                    justify="left",
+                    anchor="w"
+                ).pack(fill="x", padx=20, pady=(0, 15))
+        except Exception as e:
+            print(f"⚠️ Erreur rendu details evaluation: {e}")
     
     # Informations organisées par section
     sections = [
@@ -190,30 +207,16 @@ def modify_agent(app, popup, agent):
 def reevaluate_agent(popup, agent):
     """Re-évaluer un agent"""
     try:
-        from core.evaluator import evaluator
-        from core.models import Agent
-        from core.database import db_manager
+        from core.evaluator import evaluator, formater_resultat_evaluation
         from tkinter import messagebox
         
-        # Convertir et évaluer
-        agent_obj = Agent.from_dict(agent)
-        resultat = evaluator.evaluer_agent(agent_obj)
-        
-        # Sauvegarder
-        if resultat.statut == "proposable":
-            status_text = "Proposable"
-        elif resultat.statut == "bientot":
-            status_text = "Bientot proposable"
-        else:
-            status_text = "Non proposable"
-        
-        resultat_text = f"{status_text} {resultat.type_avancement} -> {resultat.grade_cible}"
-        
-        db_manager.update_agent(agent['id'], {
-            'resultat_evaluation': resultat_text
-        })
+        # Évaluer et sauvegarder (texte, evaluation_results et empreinte)
+        resultat = evaluator.reevaluer_agent(agent['id'])
+        if resultat is None:
+            messagebox.showerror("Erreur", "Agent introuvable")
+            return
         
-        messagebox.showinfo("Succès", f"Agent ré-évalué:\n{resultat_text}")
+        messagebox.showinfo("Succès", f"Agent ré-évalué:\n{formater_resultat_evaluation(resultat)}")
         popup.destroy()
         
     except Exception as e:
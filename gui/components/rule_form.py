@@ -194,6 +194,19 @@ class RuleForm:
         self.diplomes_list_frame.pack(fill="x", pady=10, padx=10)
         
         self.update_diplomes_display()
+        
+        # Logique ET/OU (optionnelle, OU entre tous les diplômes par défaut)
+        expression_frame = ctk.CTkFrame(diplomes_frame)
+        expression_frame.pack(fill="x", pady=10)
+        
+        ctk.CTkLabel(expression_frame, text="Logique (optionnel):", width=150).pack(side="left", padx=10)
+        
+        self.field_expression_diplomes = ctk.CTkEntry(
+            expression_frame,
+            placeholder_text="ex: B.M.P.1 & (C.M.2 | C.T.2)",
+            width=300
+        )
+        self.field_expression_diplomes.pack(side="left", padx=5)
     
     def add_diplome(self):
         """Ajouter un diplôme à la liste"""
@@ -414,6 +427,9 @@ class RuleForm:
             self.diplomes_selectionnes = self.rule_data['diplomes_requis'].copy()
             self.update_diplomes_display()
         
+        if self.rule_data.get('expression_diplomes'):
+            self.field_expression_diplomes.insert(0, self.rule_data['expression_diplomes'])
+        
         # Note minimum courante
         if self.rule_data.get('note_min_courante'):
             self.field_note_min_courante.set(self.rule_data['note_min_courante'])
@@ -449,6 +465,18 @@ class RuleForm:
         if self.field_grade_source.get() == self.field_grade_cible.get():
             errors.append("Le grade source et cible doivent être différents")
         
+        # Expression de diplômes: syntaxe et diplômes cités
+        expression = self.field_expression_diplomes.get().strip()
+        if expression:
+            from core.rule_compiler import parser_expression_diplomes
+            try:
+                inconnus = [nom for nom in parser_expression_diplomes(expression).noms()
+                            if nom not in self.diplomes_selectionnes]
+                if inconnus:
+                    errors.append(f"Diplômes de l'expression non sélectionnés: {', '.join(inconnus)}")
+            except ValueError as e:
+                errors.append(f"Expression de diplômes invalide: {e}")
+        
         return errors
     
     def collect_form_data(self):
@@ -467,6 +495,7 @@ class RuleForm:
             'grade_specifique': self.field_grade_specifique.get() if self.field_grade_specifique.get() != "Aucun" else None,
             'anciennete_grade_specifique': int(self.field_anciennete_grade_specifique.get()),
             'diplomes_requis': self.diplomes_selectionnes,
+            'expression_diplomes': self.field_expression_diplomes.get().strip() or None,
             'note_min_courante': self.field_note_min_courante.get() if self.field_note_min_courante.get() != "Aucune" else None,
             'notes_interdites_n1_n2': notes_interdites,
             'conditions_speciales': self.field_conditions_speciales.get("1.0", "end-1c").strip()
@@ -80,10 +80,11 @@ def create_stats_section(parent, style, accent_color):
     # Récupérer les stats
     try:
         from core.database import db_manager
-        agents_data = db_manager.get_all_agents()
-        total_agents = len(agents_data)
-        proposables = len([a for a in agents_data if 'Proposable' in str(a.get('resultat_evaluation', '')) and 'Non' not in str(a.get('resultat_evaluation', ''))])
-        bientot = len([a for a in agents_data if 'Bientot' in str(a.get('resultat_evaluation', ''))])
+        stats = db_manager.get_dashboard_stats()
+        total_agents = stats['total_agents']
+        comptes = stats['evaluation']
+        proposables = comptes['proposable']
+        bientot = comptes['bientot']
         non_proposables = total_agents - proposables - bientot
     except:
         total_agents = proposables = bientot = non_proposables = 0
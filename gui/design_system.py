@@ -326,12 +326,13 @@ class DSSectionHeader(ctk.CTkFrame):
 class DSLoadingOverlay(ctk.CTkToplevel):
     """Overlay de chargement réutilisable"""
     
-    def __init__(self, parent, message: str = "Chargement..."):
+    def __init__(self, parent, message: str = "Chargement...", on_cancel=None):
         super().__init__(parent)
         
         # Configuration
+        height = 250 if on_cancel else 200
         self.title("")
-        self.geometry("400x200")
+        self.geometry(f"400x{height}")
         self.transient(parent)
         self.grab_set()
         self.overrideredirect(True)
@@ -339,7 +340,7 @@ class DSLoadingOverlay(ctk.CTkToplevel):
         # Centrer
         self.update_idletasks()
         x = (self.winfo_screenwidth() - 400) // 2
-        y = (self.winfo_screenheight() - 200) // 2
+        y = (self.winfo_screenheight() - height) // 2
         self.geometry(f"+{x}+{y}")
         
         # Contenu
@@ -354,23 +355,48 @@ class DSLoadingOverlay(ctk.CTkToplevel):
         icon_label.pack(pady=(0, Spacing.MD))
         
         # Message
-        message_label = ctk.CTkLabel(
+        self.message_label = ctk.CTkLabel(
             content,
             text=message,
             font=Typography.heading_3()
         )
-        message_label.pack()
+        self.message_label.pack()
         
-        # Progress bar
+        # Progress bar (indéterminée jusqu'au premier set_progress)
         self.progress = ctk.CTkProgressBar(content, width=300, height=8, mode="indeterminate")
         self.progress.pack(pady=Spacing.LG)
         self.progress.start()
+        self._determinate = False
+        
+        # Bouton d'annulation optionnel
+        if on_cancel:
+            def cancel():
+                self.cancel_button.configure(state="disabled", text="Annulation...")
+                on_cancel()
+            
+            self.cancel_button = DSButton(
+                content,
+                text="Annuler",
+                variant="danger",
+                size="sm",
+                width=120,
+                command=cancel
+            )
+            self.cancel_button.pack()
     
     def update_message(self, message: str):
         """Mettre à jour le message"""
-        # Trouver le label et le modifier
-        # (Implementation simplifiée)
-        pass
+        self.message_label.configure(text=message)
+    
+    def set_progress(self, fraction: float, message: Optional[str] = None):
+        """Afficher une progression déterminée (0.0 à 1.0)"""
+        if not self._determinate:
+            self.progress.stop()
+            self.progress.configure(mode="determinate")
+            self._determinate = True
+        self.progress.set(max(0.0, min(1.0, fraction)))
+        if message is not None:
+            self.update_message(message)
     
     def close(self):
         """Fermer l'overlay"""
@@ -20,6 +20,7 @@ import time
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from core.connection_pool import connexions_du_thread
 from core.preferences_manager import preferences_manager
 from gui.design_system import (
     ColorPalette, Typography, Spacing,
@@ -141,6 +142,7 @@ def show_evaluation(app):
     # Afficher loading
     loading = DSLoadingOverlay(app.root, "Chargement de l'évaluation...")
     
+    @connexions_du_thread()
     def load_data_async():
         """Charger les données en arrière-plan"""
         try:
@@ -163,7 +165,7 @@ def show_evaluation(app):
                     loading.close()
                     
                     # Header avec stats
-                    create_modern_header(app, agents_data, accent_color)
+                    create_modern_header(app, accent_color)
                     
                     # Actions
                     create_actions_bar(app, agents_data, accent_color)
@@ -191,7 +193,7 @@ def show_evaluation(app):
 
 # ==================== HEADER MODERNE ====================
 
-def create_modern_header(app, agents_data, accent_color):
+def create_modern_header(app, accent_color):
     """Header épuré avec stats"""
     
     header = DSCard(app.content_frame, padding=Spacing.XL)
@@ -216,12 +218,14 @@ def create_modern_header(app, agents_data, accent_color):
         anchor="w"
     ).pack(side="left", padx=(Spacing.LG, 0))
     
-    # Calculer stats
-    total = len(agents_data)
-    proposables = len([a for a in agents_data if 'Proposable' in str(a.get('resultat_evaluation', '')) and 'Non' not in str(a.get('resultat_evaluation', ''))])
-    bientot = len([a for a in agents_data if 'Bientot' in str(a.get('resultat_evaluation', ''))])
+    # Calculer stats (agregats SQL tenus a jour dans statistiques_agents)
+    from core.database import db_manager
+    comptes = db_manager.get_evaluation_counts()
+    total = db_manager.count_agents()
+    proposables = comptes['proposable']
+    bientot = comptes['bientot']
     non_prop = total - proposables - bientot
-    evalues = len([a for a in agents_data if a.get('derniere_evaluation')])
+    evalues = comptes['evalues']
     
     # Grid de stats moderne
     stats_grid = ctk.CTkFrame(header.content, fg_color="transparent")
@@ -326,6 +330,16 @@ def create_actions_bar(app, agents_data, accent_color):
         command=lambda: run_evaluation_async(app)
     ).pack(side="left", padx=Spacing.XS)
     
+    DSButton(
+        buttons_frame,
+        text="Évaluer Modifiés",
+        variant="success",
+        size="md",
+        icon="🔁",
+        width=160,
+        command=lambda: run_evaluation_async(app, changes_seulement=True)
+    ).pack(side="left", padx=Spacing.XS)
+    
     DSButton(
         buttons_frame,
         text="Actualiser",
@@ -515,30 +529,51 @@ def create_results_table(app, agents_data, font_size, rows_per_page, alternate_c
 
 # ==================== ACTIONS ASYNC ====================
 
-def run_evaluation_async(app):
-    """Évaluer avec loading"""
+def run_evaluation_async(app, changes_seulement=False):
+    """Évaluer avec progression réelle et annulation (changes_seulement: uniquement les agents modifiés)"""
     
-    loading = DSLoadingOverlay(app.root, "Évaluation en cours...")
+    from core.evaluator import JetonAnnulation
+    annulation = JetonAnnulation()
+    loading = DSLoadingOverlay(app.root, "Évaluation en cours...", on_cancel=annulation.annuler)
     
+    def progression(traites, total):
+        fraction = traites / total if total else 1.0
+        app.root.after(0, lambda: loading.set_progress(
+            fraction, f"Évaluation {traites}/{total} agents..."
+        ))
+    
+    @connexions_du_thread()
     def evaluate():
         try:
-            time.sleep(0.2)
-            
             from core.evaluator import evaluator
-            resultats = evaluator.evaluer_tous_agents()
             
-            prop = len([r for r in resultats if r.statut == "proposable"])
-            bientot = len([r for r in resultats if r.statut == "bientot"])
-            non_prop = len([r for r in resultats if r.statut == "non_proposable"])
+            comptes = {"proposable": 0, "bientot": 0, "non_proposable": 0}
+            for resultat in evaluator.iter_evaluations(
+                progression=progression,
+                annulation=annulation,
+                changes_seulement=changes_seulement
+            ):
+                comptes[resultat.statut] = comptes.get(resultat.statut, 0) + 1
+            
+            total = sum(comptes.values())
+            prop = comptes["proposable"]
             
             def finish():
                 loading.close()
-                show_toast(
-                    app.root,
-                    f"✅ {len(resultats)} agents évalués • {prop} proposables",
-                    "success",
-                    4000
-                )
+                if annulation.annule:
+                    show_toast(
+                        app.root,
+                        f"⏹️ Évaluation annulée • {total} agents évalués",
+                        "warning",
+                        4000
+                    )
+                else:
+                    show_toast(
+                        app.root,
+                        f"✅ {total} agents évalués • {prop} proposables",
+                        "success",
+                        4000
+                    )
                 app.navigate_to("evaluation")
             
             app.root.after(0, finish)
@@ -555,43 +590,23 @@ def export_results_async(app, agents_data):
     
     loading = DSLoadingOverlay(app.root, "Export en cours...")
     
+    @connexions_du_thread()
     def export():
         try:
             time.sleep(0.3)
             
-            import pandas as pd
             from pathlib import Path
             from datetime import datetime
+            from core.database import db_manager
+            from core.exports import lignes_export_evaluations, exporter_excel
             
-            export_data = []
-            for agent in agents_data:
-                resultat = str(agent.get('resultat_evaluation', 'Non évalué'))
-                
-                if 'Proposable' in resultat and 'Non' not in resultat:
-                    statut = "Proposable"
-                elif 'Bientot' in resultat:
-                    statut = "Bientôt"
-                elif 'Non proposable' in resultat:
-                    statut = "Non proposable"
-                else:
-                    statut = "Non évalué"
-                
-                export_data.append({
-                    'Matricule': agent.get('matricule', ''),
-                    'Nom': agent.get('nom', ''),
-                    'Prénom': agent.get('prenom', ''),
-                    'Grade': agent.get('grade_actuel', ''),
-                    'Statut': statut,
-                    'Résultat': resultat,
-                    'Date': agent.get('derniere_evaluation', '')
-                })
-            
-            df = pd.DataFrame(export_data)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            export_path = Path(f"data/exports/eval_{timestamp}.xlsx")
-            export_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            df.to_excel(export_path, index=False, sheet_name="Évaluations", engine='openpyxl')
+            exporter_excel(
+                lignes_export_evaluations(agents_data, db_manager.get_evaluation_results()),
+                Path(f"data/exports/eval_{timestamp}.xlsx"),
+                "Évaluations",
+                engine='openpyxl'
+            )
             
             def finish():
                 loading.close()
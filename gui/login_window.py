@@ -20,6 +20,7 @@ import time
 
 sys.path.append(str(Path(__file__).parent.parent))
 from core.auth_manager import auth_manager
+from core.connection_pool import connexions_du_thread
 from core.preferences_manager import preferences_manager
 
 # ==================== TOAST NOTIFICATION ====================
@@ -371,6 +372,7 @@ class LoginWindow:
         # Afficher loading
         self.loading = LoginLoading(self.window)
         
+        @connexions_du_thread()
         def authenticate():
             """Authentifier en arrière-plan"""
             try:
@@ -13,6 +13,7 @@ import time
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from core.connection_pool import connexions_du_thread
 from core.preferences_manager import preferences_manager
 
 
@@ -293,6 +294,7 @@ def delete_rule(app, rule_id):
         def do_delete():
             loading = RulesLoading(app.content_frame, "Suppression en cours...")
             
+            @connexions_du_thread()
             def delete():
                 time.sleep(0.3)
                 success = db_manager.delete_rule(rule_id)
@@ -320,6 +322,7 @@ def export_rules(app):
     """Exporter les règles avec loading"""
     loading = RulesLoading(app.content_frame, "Export en cours...")
     
+    @connexions_du_thread()
     def do_export():
         try:
             time.sleep(0.3)
@@ -377,6 +380,7 @@ def show_rules(app):
     # Loading initial
     loading = RulesLoading(app.content_frame, "Chargement des règles")
     
+    @connexions_du_thread()
     def load_rules():
         time.sleep(0.3)
         
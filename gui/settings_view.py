@@ -15,6 +15,7 @@ import time
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from core.connection_pool import connexions_du_thread
 from core.preferences_manager import preferences_manager
 from core.auth_manager import auth_manager
 from gui.design_system import ColorPalette, Typography, Spacing
@@ -712,6 +713,7 @@ class ModernSettingsView:
         """Sauvegarder tous les paramètres"""
         loading = SettingsLoading(self.app.content_frame, "Sauvegarde en cours...")
         
+        @connexions_du_thread()
         def save():
             time.sleep(0.5)
             self.app.content_frame.after(0, lambda: [
@@ -734,6 +736,7 @@ class ModernSettingsView:
         if file_path:
             loading = SettingsLoading(self.app.content_frame, "Export en cours...")
             
+            @connexions_du_thread()
             def do_export():
                 time.sleep(0.3)
                 success = preferences_manager.export_preferences(file_path)
@@ -759,6 +762,7 @@ class ModernSettingsView:
         if file_path:
             loading = SettingsLoading(self.app.content_frame, "Import en cours...")
             
+            @connexions_du_thread()
             def do_import():
                 time.sleep(0.3)
                 success = preferences_manager.import_preferences(file_path)
@@ -780,6 +784,7 @@ class ModernSettingsView:
         def do_reset():
             loading = SettingsLoading(self.app.content_frame, "Réinitialisation...")
             
+            @connexions_du_thread()
             def reset():
                 time.sleep(0.3)
                 success = preferences_manager.reset_to_defaults()
@@ -821,6 +826,7 @@ def show_settings(app):
     
     loading = SettingsLoading(app.content_frame, "Chargement des paramètres")
     
+    @connexions_du_thread()
     def load():
         time.sleep(0.3)
         
@@ -253,6 +253,7 @@ def get_all_rules_from_documents():
         'grade_specifique': 'Adjudant',
         'anciennete_grade_specifique': 6,
         'diplomes_requis': ['B.M.P.1', 'C.M.2', 'C.T.2'],
+        'expression_diplomes': 'B.M.P.1 & (C.M.2 | C.T.2)',
         'note_min_courante': 'TB',
         'notes_interdites_n1_n2': ['AB', 'P', 'I'],
         'conditions_speciales': '6 ans de grade Adjudant - Diplômes B.M.P.1 ET (C.M.2 OU C.T.2) - Pas de note AB, P ou I en 2022 et 2023',
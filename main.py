@@ -5,6 +5,7 @@ Application de gestion des carrières militaires
 Point d'entrée principal avec système d'authentification
 """
 
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -87,4 +88,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Application PyInstaller: les processus de travail (evaluation parallele) relancent
+    # l'executable, qui doit executer la tache du pool au lieu de l'application
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
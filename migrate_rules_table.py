@@ -49,6 +49,7 @@ def migrate_rules_table():
                     anciennete_grade_specifique INTEGER DEFAULT 0,
                     
                     diplomes_requis TEXT,
+                    expression_diplomes TEXT,
                     note_min_courante TEXT,
                     notes_interdites_n1_n2 TEXT,
                     
@@ -67,7 +68,7 @@ def migrate_rules_table():
             print("\n📋 Structure de la table :")
             print("   - Catégorie, grades source/cible, type avancement")
             print("   - Conditions d'ancienneté (service, grade, grade spécifique)")
-            print("   - Diplômes requis, notes minimales, notes interdites")
+            print("   - Diplômes requis (et expression ET/OU), notes minimales, notes interdites")
             print("   - Conditions spéciales, statut, actif")
             
     except Exception as e:
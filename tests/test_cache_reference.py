@@ -0,0 +1,84 @@
+"""
+Cache des tables de reference
+tests/test_cache_reference.py
+
+Une ecriture d'une autre connexion n'invalide que le cache de la table de
+reference modifiee; les ecritures sur les agents ne l'invalident pas.
+"""
+import contextlib
+import io
+import random
+import sqlite3
+
+import pytest
+
+from core.connection_pool import pool_connexions
+from core.data_generator import DataGenerator
+from core.database import DatabaseManager
+
+@pytest.fixture
+def base(tmp_path):
+    """Base temporaire avec quelques agents, une regle et une equivalence"""
+    chemin = tmp_path / "cache.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = DatabaseManager(chemin)
+        random.seed(25)
+        base.create_agents_bulk([agent.to_dict() for agent in DataGenerator().generate_test_dataset(5)])
+        base.create_rule({'grade_source': "Sergent", 'grade_cible': "Sergent-chef",
+                          'categorie': "Sous-officiers", 'diplomes_requis': ["CAT1"]})
+        base.create_equivalence("BAC", "DAEU")
+    yield base
+    pool_connexions(chemin).fermer()
+
+def ecrire_ailleurs(base: DatabaseManager, requete: str, params=()):
+    """Ecriture validee par une connexion independante (autre processus)"""
+    conn = sqlite3.connect(base.db_path)
+    try:
+        with conn:
+            conn.execute(requete, params)
+    finally:
+        conn.close()
+
+def test_ecriture_agents_garde_le_cache(base):
+    """Agents et resultats modifies ailleurs: ni rechargement ni nouvelle version des equivalences"""
+    base.get_all_equivalences()
+    base.get_rules_index()
+    version = base.equivalences_version
+
+    ecrire_ailleurs(base, "UPDATE agents SET note_annee_courante = 'TB'")
+
+    base.verifier_cache_reference()
+    assert base.equivalences_version == version
+    assert {'equivalences', 'index_regles'} <= set(base._cache_reference)
+
+def test_ecriture_regles_recharge_les_regles_seulement(base):
+    """Regle modifiee ailleurs: regles rechargees, equivalences conservees"""
+    base.get_all_equivalences()
+    version = base.equivalences_version
+
+    ecrire_ailleurs(base, "UPDATE regles_avancement SET grade_cible = 'Adjudant'")
+
+    assert base.get_rules_index()['Sergent'][0]['grade_cible'] == "Adjudant"
+    assert base.equivalences_version == version
+    assert 'equivalences' in base._cache_reference
+
+def test_ecriture_equivalences_nouvelle_version(base):
+    """Equivalence ajoutee ailleurs: nouvelle version et equivalences rechargees"""
+    base.get_all_equivalences()
+    version = base.equivalences_version
+
+    ecrire_ailleurs(base, "INSERT INTO equivalences_diplomes (diplome_principal, diplome_equivalent) VALUES (?, ?)",
+                    ("CAT1", "CAT2"))
+
+    assert len(base.get_all_equivalences()) == 2
+    assert base.equivalences_version > version
+
+def test_regle_desactivee_par_identifiant(base):
+    """get_rule_by_id retrouve aussi une regle desactivee (absente de l'index en cache)"""
+    regle_id = base.get_rules_index()['Sergent'][0]['id']
+    with contextlib.redirect_stdout(io.StringIO()):
+        base.delete_rule(regle_id)
+
+    assert 'Sergent' not in base.get_rules_index()
+    regle = base.get_rule_by_id(regle_id)
+    assert regle['grade_cible'] == "Sergent-chef" and not regle['actif']
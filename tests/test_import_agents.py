@@ -0,0 +1,74 @@
+"""
+Import d'agents par lots
+tests/test_import_agents.py
+
+Un agent incomplet, ou dont un diplome est incomplet, est signale seul dans
+'erreurs': les autres agents du lot sont inseres avec leurs diplomes.
+"""
+import contextlib
+import io
+import random
+
+import pytest
+
+from core.connection_pool import pool_connexions
+from core.data_generator import DataGenerator
+from core.database import DatabaseManager
+
+@pytest.fixture
+def base(tmp_path):
+    """Base temporaire vide"""
+    chemin = tmp_path / "import.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = DatabaseManager(chemin)
+    yield base
+    pool_connexions(chemin).fermer()
+
+@pytest.fixture
+def agents():
+    """Dix agents generes, chacun avec un diplome"""
+    random.seed(19)
+    agents = [agent.to_dict() for agent in DataGenerator().generate_test_dataset(10)]
+    for agent in agents:
+        agent['diplomes'] = [{'nom': "CAT1", 'date_obtention': "2015-06-30", 'etablissement': "EMIA"}]
+    return agents
+
+@pytest.mark.parametrize("diplome", [
+    {'nom': "CAT1", 'date_obtention': None},
+    {'nom': "CAT1"},
+    {'date_obtention': "2015-06-30"},
+    "CAT1",
+])
+def test_diplome_invalide_signale_contre_son_agent(base, agents, diplome):
+    """Seul l'agent au diplome invalide est ecarte, le reste du lot est insere"""
+    fautif = agents[3]['matricule']
+    agents[3]['diplomes'].append(diplome)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        resume = base.create_agents_bulk(agents)
+
+    assert [matricule for matricule, _ in resume['erreurs']] == [fautif]
+    assert resume['inseres'] == 9 and resume['diplomes'] == 9 and resume['diplomes_rejetes'] == 1
+    assert base.get_agent_by_matricule(fautif) is None
+    with base.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM diplomes_historique").fetchone()[0] == 9
+
+def test_agent_incomplet_signale_seul(base, agents):
+    """Un champ obligatoire manquant n'ecarte que l'agent concerne"""
+    fautif = agents[0]['matricule']
+    del agents[0]['grade_actuel']
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        resume = base.create_agents_bulk(agents)
+
+    assert [matricule for matricule, _ in resume['erreurs']] == [fautif]
+    assert resume['inseres'] == 9 and resume['diplomes'] == 9
+
+def test_diplome_au_format_de_la_base(base, agents):
+    """Un diplome relu de diplomes_historique (cle 'diplome') est importe"""
+    agents[0]['diplomes'] = [{'diplome': "CAT2", 'date_obtention': "2018-06-30", 'etablissement': ""}]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        resume = base.create_agents_bulk(agents)
+
+    assert resume['erreurs'] == [] and resume['diplomes'] == 10
@@ -0,0 +1,129 @@
+"""
+Plans d'execution des requetes frequentes
+tests/test_index_plans.py
+
+Les requetes verifiees sont celles que DatabaseManager execute reellement:
+elles sont capturees par conn.set_trace_callback pendant l'appel des methodes,
+puis passees a EXPLAIN QUERY PLAN. Aucune ne doit parcourir une table entiere
+sans index, sauf les tables explicitement autorisees pour un appel (chargement
+complet d'une table de reference, par exemple).
+"""
+import contextlib
+import io
+import random
+import re
+from datetime import date
+
+import pytest
+
+from core.connection_pool import pool_connexions
+from core.data_generator import DataGenerator
+from core.database import DatabaseManager
+from core.rule_compiler import TermeDiplome
+from core.rule_sql import sql_expression_diplomes
+
+# "SCAN table" seul: parcours complet sans index (SQLite >= 3.36)
+PARCOURS_COMPLET = re.compile(r"^SCAN (?!.*\bUSING\b.*\bINDEX\b)(?!.*\bPRIMARY KEY\b)(\S+)( AS \S+)?$")
+
+# Instructions dont le plan est verifie (PRAGMA, BEGIN et COMMIT ignores)
+INSTRUCTIONS_VERIFIEES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+def _recharger_reference(base: DatabaseManager):
+    """Vider le cache des tables de reference: l'appel suivant execute sa requete de chargement"""
+    base._invalider_reference()
+
+def _condition_diplome():
+    return sql_expression_diplomes(TermeDiplome("CAT1"), {"CAT1": ["CAT2"]})
+
+# (description, appel, tables dont le parcours complet est attendu)
+APPELS_FREQUENTS = [
+    ("Diplomes d'un agent (get_diplomes_by_agent)",
+     lambda base: base.get_diplomes_by_agent(1), ()),
+    ("Candidats d'une regle (get_candidate_agent_ids)",
+     lambda base: base.get_candidate_agent_ids("Sergent", *_condition_diplome()), ()),
+    ("Liste des agents (get_all_agents)",
+     lambda base: base.get_all_agents(), ()),
+    ("Page suivante (query_agents)",
+     lambda base: base.query_agents(limit=5, after_key=base.query_agents(limit=5)['curseur']), ()),
+    ("Page filtree (query_agents)",
+     lambda base: base.query_agents({'grade_actuel': "Sergent", 'statut': "Actif"}, limit=5), ()),
+    ("Recherche par sous-chaine (search_agents)",
+     lambda base: base.search_agents("dup", {'grade_actuel': "Sergent"}), ()),
+    ("Recherche classee par prefixe (search_agents_ranked)",
+     lambda base: base.search_agents_ranked("dup", {'grade_actuel': "Sergent"}), ()),
+    ("Recherche approchee (search_agents_fuzzy)",
+     lambda base: base.search_agents_fuzzy("dupont"), ()),
+    ("Agent par matricule (get_agent_by_matricule)",
+     lambda base: base.get_agent_by_matricule("M1"), ()),
+    ("Compteurs du tableau de bord (get_dashboard_stats)",
+     lambda base: base.get_dashboard_stats(), ()),
+    ("Nombre d'agents (count_agents)",
+     lambda base: base.count_agents(), ()),
+    ("Chargement des regles (get_rules_index)",
+     lambda base: (_recharger_reference(base), base.get_rules_index()), ()),
+    ("Regles d'un grade (get_rules_by_grade)",
+     lambda base: (_recharger_reference(base), base.get_rules_by_grade("Sergent")), ()),
+    ("Regle absente de l'index (get_rule_by_id)",
+     lambda base: base.get_rule_by_id(999), ()),
+    ("Chargement des equivalences (get_all_equivalences)",
+     lambda base: (_recharger_reference(base), base.get_all_equivalences()), ()),
+    ("Equivalence existante (get_equivalence)",
+     lambda base: base.get_equivalence("BAC", "DAEU"), ()),
+    ("Echelle de notes (get_note_scale)",
+     lambda base: (_recharger_reference(base), base.get_note_scale()), ("echelles_notes",)),
+    ("Agents par statut d'evaluation (get_agent_ids_by_evaluation_status)",
+     lambda base: base.get_agent_ids_by_evaluation_status("proposable", "Sergent"), ()),
+    ("Eligibilite a venir (get_agents_eligible_between)",
+     lambda base: base.get_agents_eligible_between(date(2026, 1, 1), date(2026, 4, 1)), ()),
+    ("Suppression d'un agent (delete_agent)",
+     lambda base: base.delete_agent(2), ()),
+]
+
+def requetes_executees(base: DatabaseManager, appel):
+    """Instructions SQL executees par appel(base) sur la connexion du thread courant"""
+    conn = base.get_connection()
+    requetes = []
+    conn.set_trace_callback(requetes.append)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            appel(base)
+    finally:
+        conn.set_trace_callback(None)
+    # Une instruction qui declenche des triggers est rapportee une fois par instruction du trigger
+    return [requete for requete in dict.fromkeys(requetes)
+            if requete.lstrip().split(None, 1)[0].upper() in INSTRUCTIONS_VERIFIEES]
+
+def plan_requete(base: DatabaseManager, requete: str):
+    """Lignes de EXPLAIN QUERY PLAN d'une requete capturee (parametres deja substitues)"""
+    return [row['detail'] for row in base.get_connection().execute(f"EXPLAIN QUERY PLAN {requete}")]
+
+@pytest.fixture(scope="module")
+def base(tmp_path_factory):
+    """Base temporaire initialisee par init_database(), avec quelques agents et references"""
+    chemin = tmp_path_factory.mktemp("plans") / "plans.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = DatabaseManager(chemin)
+        random.seed(42)
+        agents = [agent.to_dict() for agent in DataGenerator().generate_test_dataset(30)]
+        agents[0]['matricule'] = "M1"
+        base.create_agents_bulk(agents)
+        base.create_rule({'grade_source': "Sergent", 'grade_cible': "Sergent-chef",
+                          'categorie': "Sous-officiers", 'diplomes_requis': ["CAT1"]})
+        base.create_equivalence("BAC", "DAEU")
+        base.save_evaluation_results([("", "2026-01-01", 1)],
+                                     resultats=[(1, 0, "Sergent-chef", "Normal", None, None, "", None, "2026-01-01")])
+    yield base
+    pool_connexions(chemin).fermer()
+
+@pytest.mark.parametrize("description, appel, parcours_attendus", APPELS_FREQUENTS,
+                         ids=[description for description, _, _ in APPELS_FREQUENTS])
+def test_plan_sans_parcours_complet(base, description, appel, parcours_attendus):
+    """Les requetes executees par l'appel utilisent un index (sauf parcours attendus)"""
+    requetes = requetes_executees(base, appel)
+    assert requetes, f"{description}: aucune requete executee"
+
+    for requete in requetes:
+        for ligne in plan_requete(base, requete):
+            parcours = PARCOURS_COMPLET.match(ligne)
+            assert not parcours or parcours.group(1) in parcours_attendus, \
+                f"{description}: parcours complet ({ligne}) pour\n{requete}"
@@ -0,0 +1,118 @@
+"""
+Moteur vectorise (NumPy)
+tests/test_moteur_vectorise.py
+
+evaluer_tous_agents(moteur="numpy") doit donner, agent par agent, le meme statut,
+la meme regle retenue et les memes conditions que le moteur Python, y compris
+pour une population ineligible et pour les grades sans regle active.
+"""
+import contextlib
+import io
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import core.evaluator
+from core.connection_pool import pool_connexions
+from core.data_generator import DataGenerator
+from core.database import DatabaseManager
+from core.evaluator import AdvancementEvaluator, EvaluationVectorisee
+from import_all_rules import get_all_rules_from_documents
+from import_equivalences import get_default_equivalences
+
+pytest.importorskip("numpy")
+
+# Grade dont toutes les regles sont desactivees, grade sans aucune regle
+GRADE_REGLES_INACTIVES = "Caporal"
+GRADE_SANS_REGLE = "General de Division"
+
+@pytest.fixture(scope="module")
+def base(tmp_path_factory):
+    """Base temporaire: regles et equivalences par defaut, 300 agents generes"""
+    chemin = tmp_path_factory.mktemp("moteurs") / "moteurs.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = DatabaseManager(chemin)
+        for regle in get_all_rules_from_documents():
+            base.create_rule(regle)
+        for principal, equivalent in get_default_equivalences():
+            base.create_equivalence(principal, equivalent)
+        for regle in base.get_rules_by_grade(GRADE_REGLES_INACTIVES):
+            base.delete_rule(regle['id'])
+
+        random.seed(3)
+        agents = [agent.to_dict() for agent in DataGenerator().generate_test_dataset(300)]
+        for agent in agents[:5]:
+            agent['grade_actuel'] = GRADE_SANS_REGLE
+        # Population ineligible: entree recente, notes interdites, aucun diplome
+        recente = (date.today() - timedelta(days=30)).isoformat()
+        for agent in agents[5:25]:
+            agent.update(date_incorporation=recente, date_entree_grade=recente, note_annee_courante='I',
+                         note_annee_moins_1='I', note_annee_moins_2='I', diplomes=[])
+        base.create_agents_bulk(agents)
+    yield base, [agent['matricule'] for agent in agents[5:25]]
+    pool_connexions(chemin).fermer()
+
+@pytest.fixture(scope="module")
+def resultats(base):
+    """Resultats des deux moteurs sur la base temporaire, par agent"""
+    base, ineligibles = base
+    patch = pytest.MonkeyPatch()
+    patch.setattr(core.evaluator, "db_manager", base)
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluateur = AdvancementEvaluator()
+        python = {resultat.agent_id: resultat for resultat in evaluateur.evaluer_tous_agents()}
+        vectorise = evaluateur.evaluer_tous_agents(moteur="numpy")
+    yield python, vectorise, ineligibles
+    patch.undo()
+
+def test_moteur_numpy_utilise(resultats):
+    """Le moteur vectorise a bien ete utilise (pas de repli sur le moteur Python)"""
+    python, vectorise, _ = resultats
+    assert isinstance(vectorise, EvaluationVectorisee)
+    assert len(vectorise) == len(python) == 300
+
+def test_memes_resultats_par_agent(resultats):
+    """Statut, regle retenue, conditions manquantes et constats identiques pour chaque agent"""
+    python, vectorise, _ = resultats
+    for i in range(len(vectorise)):
+        resume = vectorise.resume(i)
+        attendu = python[resume.agent_id]
+        assert (resume.statut, resume.grade_cible, resume.type_avancement, resume.regle_id) == \
+            (attendu.statut, attendu.grade_cible, attendu.type_avancement, attendu.regle_id), attendu.matricule
+        assert resume.codes_manquants == tuple(attendu.codes_manquants), attendu.matricule
+        assert resume.constats == tuple(attendu.constats), attendu.matricule
+
+def test_memes_comptes(resultats):
+    """Repartition des statuts identique"""
+    python, vectorise, _ = resultats
+    comptes = {statut: 0 for statut in ("proposable", "bientot", "non_proposable")}
+    for resultat in python.values():
+        comptes[resultat.statut] += 1
+    assert vectorise.compter_statuts() == comptes
+
+def test_population_ineligible(resultats):
+    """Agents ineligibles: non proposables dans les deux moteurs, avec conditions manquantes"""
+    python, vectorise, ineligibles = resultats
+    resumes = {resume.agent_id: resume for resume in map(vectorise.resume, range(len(vectorise)))}
+    evalues = [resultat for resultat in python.values()
+               if resultat.matricule in ineligibles and resultat.regle_id is not None]
+    assert evalues
+    for resultat in evalues:
+        assert resultat.statut == resumes[resultat.agent_id].statut == "non_proposable"
+        assert resumes[resultat.agent_id].codes_manquants
+
+def test_grades_sans_regle_active(resultats):
+    """Grades sans regle ou aux regles desactivees: aucune regle retenue dans les deux moteurs"""
+    python, vectorise, _ = resultats
+    sans_regle = [i for i in range(len(vectorise))
+                  if vectorise.population.agents[i]['grade_actuel'] in (GRADE_REGLES_INACTIVES, GRADE_SANS_REGLE)]
+    assert {vectorise.population.agents[i]['grade_actuel'] for i in sans_regle} == \
+        {GRADE_REGLES_INACTIVES, GRADE_SANS_REGLE}
+    for i in sans_regle:
+        resume = vectorise.resume(i)
+        attendu = python[resume.agent_id]
+        assert resume.regle_id is attendu.regle_id is None
+        assert resume.statut == attendu.statut == "non_proposable"
+        assert resume.grade_cible == attendu.grade_cible
+        assert vectorise[i].details == attendu.details
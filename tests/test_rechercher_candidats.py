@@ -0,0 +1,81 @@
+"""
+Recherche de candidats pre-filtree en SQL
+tests/test_rechercher_candidats.py
+
+rechercher_candidats doit retenir exactement les agents que evaluer_tous_agents
+classe dans les statuts demandes, y compris les agents d'un grade sans regle
+active (non proposables).
+"""
+import contextlib
+import io
+import random
+
+import pytest
+
+import core.evaluator
+from core.connection_pool import pool_connexions
+from core.data_generator import DataGenerator
+from core.database import DatabaseManager
+from core.evaluator import AdvancementEvaluator
+from import_all_rules import get_all_rules_from_documents
+from import_equivalences import get_default_equivalences
+
+# Grade dont toutes les regles sont desactivees, grade sans aucune regle
+GRADE_REGLES_INACTIVES = "Caporal"
+GRADE_SANS_REGLE = "General de Division"
+
+@pytest.fixture(scope="module")
+def base(tmp_path_factory):
+    """Base temporaire: regles et equivalences par defaut, 300 agents generes"""
+    chemin = tmp_path_factory.mktemp("candidats") / "candidats.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = DatabaseManager(chemin)
+        for regle in get_all_rules_from_documents():
+            base.create_rule(regle)
+        for principal, equivalent in get_default_equivalences():
+            base.create_equivalence(principal, equivalent)
+        for regle in base.get_rules_by_grade(GRADE_REGLES_INACTIVES):
+            base.delete_rule(regle['id'])
+
+        random.seed(16)
+        agents = [agent.to_dict() for agent in DataGenerator().generate_test_dataset(300)]
+        for agent in agents[:5]:
+            agent['grade_actuel'] = GRADE_SANS_REGLE
+        base.create_agents_bulk(agents)
+    yield base
+    pool_connexions(chemin).fermer()
+
+@pytest.fixture(scope="module")
+def evaluations(base):
+    """Evaluateur lie a la base temporaire et resultats de evaluer_tous_agents"""
+    patch = pytest.MonkeyPatch()
+    patch.setattr(core.evaluator, "db_manager", base)
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluateur = AdvancementEvaluator()
+        tous = {resultat.agent_id: resultat for resultat in evaluateur.evaluer_tous_agents()}
+    yield evaluateur, tous
+    patch.undo()
+
+@pytest.mark.parametrize("statuts", [
+    ("proposable",),
+    ("proposable", "bientot"),
+    ("non_proposable",),
+    ("proposable", "bientot", "non_proposable"),
+])
+@pytest.mark.parametrize("grade_source", [None, "Sergent", GRADE_REGLES_INACTIVES, GRADE_SANS_REGLE])
+def test_memes_agents_que_evaluer_tous_agents(evaluations, statuts, grade_source):
+    """Memes agents et memes statuts que la campagne complete"""
+    evaluateur, tous = evaluations
+    attendus = {agent_id: resultat.statut for agent_id, resultat in tous.items()
+                if resultat.statut in statuts and grade_source in (None, resultat.grade_actuel)}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        retenus = evaluateur.rechercher_candidats(grade_source, statuts=statuts)
+
+    assert {resultat.agent_id: resultat.statut for resultat in retenus} == attendus
+
+def test_grades_sans_regle_active_presents(evaluations):
+    """La population de test contient bien des agents sans regle active"""
+    _, tous = evaluations
+    grades = {resultat.grade_actuel for resultat in tous.values()}
+    assert {GRADE_REGLES_INACTIVES, GRADE_SANS_REGLE} <= grades